@@ -0,0 +1,82 @@
+"""Measure the cold start cost of ndx-nirs
+
+Each measurement runs in a fresh Python process and records:
+  - the time to import pynwb alone, which ndx-nirs cannot avoid,
+  - the additional time to import ndx_nirs, which loads the ndx-nirs namespace and
+    generates the NIRSDevice and NIRSSeries classes, and
+  - the time to read the parsed spec from the spec cache and, for comparison, the
+    time to parse the YAML spec files which the cache replaces.
+
+Usage:
+    python benchmarks/import_time.py [--repeat N] [--output results.json]
+
+The results are printed as JSON (medians over the repetitions, in seconds) so that
+they can be tracked across commits.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+MEASURE_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import pynwb
+t1 = time.perf_counter()
+import ndx_nirs
+t2 = time.perf_counter()
+from ndx_nirs.spec_cache import load_spec_cache
+reader = load_spec_cache(ndx_nirs.ndx_nirs_specpath)
+reader.read_namespace(ndx_nirs.ndx_nirs_specpath)
+reader.read_spec("ndx-nirs.extensions.yaml")
+t3 = time.perf_counter()
+from hdmf.spec.namespace import YAMLSpecReader
+reader = YAMLSpecReader(indir=reader.source)
+reader.read_namespace(ndx_nirs.ndx_nirs_specpath)
+reader.read_spec("ndx-nirs.extensions.yaml")
+t4 = time.perf_counter()
+print(json.dumps({
+    "import_pynwb": t1 - t0,
+    "import_ndx_nirs": t2 - t1,
+    "read_spec_cache": t3 - t2,
+    "parse_yaml_spec": t4 - t3,
+}))
+"""
+
+
+def measure_once():
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="path of a JSON file to write results to")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.repeat)]
+    results = {
+        "benchmark": "import_time",
+        "repeat": args.repeat,
+        "python": sys.version.split()[0],
+        "median_seconds": {
+            key: statistics.median(run[key] for run in runs) for key in runs[0]
+        },
+    }
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
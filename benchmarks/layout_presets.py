@@ -0,0 +1,131 @@
+"""Measure the read and write throughput of the NIRSSeries data layout presets
+
+For each montage size and layout preset, a (time, channels) float64 dataset of
+synthetic NIRS-like data is written with the chunking and compression of the preset,
+then read with the two common access patterns:
+  - per-channel: all samples of a few channels, as in per-channel analyses, and
+  - time-window: all channels for a short span of time, as in plotting.
+
+An uncompressed, contiguous dataset is measured as a baseline. Each read is done
+after reopening the file so that the HDF5 chunk cache starts empty, although the
+operating system page cache is not dropped.
+
+Usage:
+    python benchmarks/layout_presets.py [--channels 32 128 512] [--duration 600]
+        [--rate 10] [--output results.json]
+
+The results are printed as JSON, with throughputs in MB/s of uncompressed data.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+from ndx_nirs.layout import LAYOUT_PRESETS
+from ndx_nirs.selection import read_columns
+
+# the number of channels read together by the per-channel pattern
+CHANNELS_PER_READ = 4
+
+# the length in seconds of the spans read by the time-window pattern
+WINDOW_SECONDS = 10.0
+
+
+def make_data(n_samples, n_channels, rate, seed=0):
+    """Returns slowly varying signals with noise, which compress like real NIRS data"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples)[:, None] / rate
+    frequencies = rng.uniform(0.05, 1.5, size=n_channels)
+    signals = 1.0 + 0.1 * np.sin(2 * np.pi * frequencies * t)
+    return signals + rng.normal(scale=0.01, size=(n_samples, n_channels))
+
+
+def layouts():
+    yield "contiguous", {}
+    for name, preset in LAYOUT_PRESETS.items():
+        yield name, preset
+
+
+def measure(path, data, rate, layout, rng):
+    megabytes = data.nbytes / 1e6
+    kwargs = {} if not layout else layout.dataset_kwargs(data.shape, data.dtype)
+
+    start = time.perf_counter()
+    with h5py.File(path, "w") as f:
+        f.create_dataset("data", data=data, **kwargs)
+    write_seconds = time.perf_counter() - start
+
+    n_samples, n_channels = data.shape
+    columns = np.sort(
+        rng.choice(n_channels, size=min(CHANNELS_PER_READ, n_channels), replace=False)
+    )
+    start = time.perf_counter()
+    with h5py.File(path, "r") as f:
+        read_columns(f["data"], columns)
+    channel_seconds = time.perf_counter() - start
+    channel_megabytes = n_samples * len(columns) * data.itemsize / 1e6
+
+    window = min(int(WINDOW_SECONDS * rate), n_samples)
+    window_start = int(rng.integers(0, n_samples - window + 1))
+    window_stop = window_start + window
+    start = time.perf_counter()
+    with h5py.File(path, "r") as f:
+        f["data"][window_start:window_stop]
+    window_seconds = time.perf_counter() - start
+    window_megabytes = window * n_channels * data.itemsize / 1e6
+
+    return {
+        "file_size_mb": os.path.getsize(path) / 1e6,
+        "chunks": kwargs.get("chunks"),
+        "write_mb_per_s": megabytes / write_seconds,
+        "per_channel_read_mb_per_s": channel_megabytes / channel_seconds,
+        "per_channel_read_seconds": channel_seconds,
+        "time_window_read_mb_per_s": window_megabytes / window_seconds,
+        "time_window_read_seconds": window_seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--duration", type=float, default=600.0, help="in seconds")
+    parser.add_argument("--rate", type=float, default=10.0, help="in Hz")
+    parser.add_argument("--output", help="path of a JSON file to write results to")
+    args = parser.parse_args()
+
+    n_samples = int(args.duration * args.rate)
+    rng = np.random.default_rng(0)
+    results = {
+        "benchmark": "layout_presets",
+        "python": sys.version.split()[0],
+        "h5py": h5py.version.version,
+        "hdf5": h5py.version.hdf5_version,
+        "duration_seconds": args.duration,
+        "rate_hz": args.rate,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "layout.h5")
+        for n_channels in args.channels:
+            data = make_data(n_samples, n_channels, args.rate)
+            for name, layout in layouts():
+                result = measure(path, data, args.rate, layout, rng)
+                results["results"].append(
+                    {"channels": n_channels, "layout": name, **result}
+                )
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Measure the latency and dropped samples of LiveIngest for a simulated device
+
+A thread simulates a device which sends packets of samples at a fixed rate to a
+QueueSource, in real time, while a LiveIngest writes them to a NIRSSeries created with
+create_streaming_series and the main thread reads the most recent window of samples
+as a display would.
+
+The results give the IngestStats of the ingest, i.e. the number of samples received,
+flushed and dropped, and the mean and largest latency from the acquisition of each
+sample to its reception in the ring buffer and to its flush to disk, together with the
+mean time of reading the most recent window of samples with LiveIngest.latest.
+
+Usage:
+    python benchmarks/live_ingest.py [--channels 128] [--duration 10] [--rate 50]
+        [--packet 5] [--chunk-size 256] [--window 4096] [--output results.json]
+
+The results are printed as JSON, with times in seconds.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import h5py
+import numpy as np
+from hdmf.common import DynamicTableRegion
+from pynwb import NWBHDF5IO, NWBFile
+
+from ndx_nirs import LiveIngest, NIRSSeriesWriter, QueueSource, create_streaming_series
+from nirs_types import build_device, build_tables
+
+
+def write_file(path, n_channels, chunk_size):
+    nwbfile = NWBFile(
+        session_description="ndx-nirs live ingest benchmark",
+        identifier="live_ingest",
+        session_start_time=datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+    device = build_device(build_tables(n_channels))
+    nwbfile.add_device(device)
+    series = create_streaming_series(
+        name="nirs_data",
+        description="Synthetic NIRS data",
+        channels=DynamicTableRegion(
+            name="channels",
+            description="the channels of the series",
+            table=device.channels,
+            data=list(range(n_channels)),
+        ),
+        chunk_size=chunk_size,
+        unit="V",
+    )
+    nwbfile.add_acquisition(series)
+    with NWBHDF5IO(path, "w") as io:
+        io.write(nwbfile)
+    return series
+
+
+def acquire(source, n_channels, duration, rate, packet):
+    """Puts packets of random samples on the source at the given sampling rate"""
+    rng = np.random.default_rng(0)
+    n_packets = int(duration * rate / packet)
+    start = time.time()
+    for i in range(n_packets):
+        acquired = start + (i + 1) * packet / rate
+        time.sleep(max(acquired - time.time(), 0.0))
+        timestamps = (i * packet + np.arange(packet)) / rate
+        source.put(rng.random((packet, n_channels)), timestamps, acquired=acquired)
+    source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=10.0, help="in seconds")
+    parser.add_argument("--rate", type=float, default=50.0, help="in Hz")
+    parser.add_argument("--packet", type=int, default=5, help="samples per packet")
+    parser.add_argument("--chunk-size", type=int, default=256, help="in samples")
+    parser.add_argument("--window", type=int, default=4096, help="in samples")
+    parser.add_argument("--output", help="path of a JSON file to write results to")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "live_ingest",
+        "python": sys.version.split()[0],
+        "h5py": h5py.version.version,
+        "hdf5": h5py.version.hdf5_version,
+        "channels": args.channels,
+        "rate": args.rate,
+        "packet": args.packet,
+        "chunk_size": args.chunk_size,
+        "window": args.window,
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "live_ingest.nwb")
+        series = write_file(path, args.channels, args.chunk_size)
+        source = QueueSource()
+        device = threading.Thread(
+            target=acquire,
+            args=(source, args.channels, args.duration, args.rate, args.packet),
+        )
+        reads = []
+        with NIRSSeriesWriter(path, series) as writer:
+            with LiveIngest(writer, source, window=args.window) as ingest:
+                device.start()
+                while device.is_alive():
+                    start = time.perf_counter()
+                    ingest.latest()
+                    reads.append(time.perf_counter() - start)
+                    time.sleep(1 / 30)
+                ingest.wait()
+        results.update(ingest.stats().as_dict())
+        results["latest_seconds_mean"] = float(np.mean(reads)) if reads else None
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Measure the time and memory of the ndx-nirs types at realistic scale
+
+For each channel count and recording duration, the following operations are timed
+and their peak Python memory allocations measured with tracemalloc:
+  - build_tables: creating the sources, detectors and channels tables,
+  - build_device: creating the NIRSDevice from those tables,
+  - write: writing an NWB file with the device and a NIRSSeries with NWBHDF5IO,
+    from containers built beforehand,
+  - read: reading the NWB file and the NIRSSeries data with NWBHDF5IO,
+  - channel_slice: reading all samples of the channels of one wavelength, and
+  - time_slice: reading all channels for a 10 second window.
+
+The montage is a grid of sources and detectors, each source paired with enough
+detectors to make the requested number of channels at two wavelengths.
+
+Usage:
+    python benchmarks/nirs_types.py [--channels 10 100 1000 5000]
+        [--durations 60 600] [--rate 10] [--repeat 3] [--output results.json]
+
+The results are printed as JSON (median times over the repetitions, in seconds, and
+peak memory of a separate run, in MB), along with the git commit of the repository if
+it is available, so that they can be compared across commits.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from hdmf.common import DynamicTableRegion
+from pynwb import NWBHDF5IO, NWBFile
+
+from ndx_nirs import (
+    NIRSChannelsTable,
+    NIRSDetectorsTable,
+    NIRSDevice,
+    NIRSSeries,
+    NIRSSourcesTable,
+)
+
+WAVELENGTHS = (760.0, 850.0)
+
+# the length in seconds of the window read by time_slice
+WINDOW_SECONDS = 10.0
+
+
+def montage(n_channels):
+    """Returns the source and detector coordinates and the source, detector and
+    wavelength of each channel of a grid montage with n_channels channels
+    """
+    n_pairs = math.ceil(n_channels / len(WAVELENGTHS))
+    n_optodes = max(math.ceil(math.sqrt(n_pairs)), 1)
+    grid = np.arange(n_optodes) * 0.03
+    sources = np.stack([grid, np.zeros(n_optodes), np.zeros(n_optodes)], axis=1)
+    detectors = sources + [0.015, 0.015, 0.0]
+    pairs = np.arange(n_pairs)
+    source = np.repeat(pairs // n_optodes, len(WAVELENGTHS))[:n_channels]
+    detector = np.repeat(pairs % n_optodes, len(WAVELENGTHS))[:n_channels]
+    wavelength = np.tile(WAVELENGTHS, n_pairs)[:n_channels]
+    return sources, detectors, source, detector, wavelength
+
+
+def build_tables(n_channels):
+    sources, detectors, source, detector, wavelength = montage(n_channels)
+    sources_table = NIRSSourcesTable.from_coordinates(
+        label=[f"S{index + 1}" for index in range(len(sources))], coordinates=sources
+    )
+    detectors_table = NIRSDetectorsTable.from_coordinates(
+        label=[f"D{index + 1}" for index in range(len(detectors))],
+        coordinates=detectors,
+    )
+    channels_table = NIRSChannelsTable(sources=sources_table, detectors=detectors_table)
+    channels_table.add_channels(
+        label=[f"CH{index}" for index in range(n_channels)],
+        source=source,
+        detector=detector,
+        source_wavelength=wavelength,
+    )
+    return channels_table
+
+
+def build_device(channels):
+    return NIRSDevice(
+        name="device",
+        description="A benchmark NIRS device",
+        manufacturer="XYZ",
+        nirs_mode="continuous-wave",
+        channels=channels,
+        sources=channels.source.table,
+        detectors=channels.detector.table,
+    )
+
+
+def create_nwbfile(n_channels, n_samples, rate):
+    nwbfile = NWBFile(
+        session_description="ndx-nirs benchmark",
+        identifier="benchmark",
+        session_start_time=datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+    device = build_device(build_tables(n_channels))
+    nwbfile.add_device(device)
+    nwbfile.add_acquisition(
+        NIRSSeries(
+            name="nirs_data",
+            description="Random NIRS data",
+            rate=rate,
+            channels=DynamicTableRegion(
+                name="channels",
+                description="the channels of the series",
+                table=device.channels,
+                data=list(range(n_channels)),
+            ),
+            data=np.random.default_rng(0).random((n_samples, n_channels)),
+            unit="V",
+        )
+    )
+    return nwbfile
+
+
+def write(path, nwbfile):
+    with NWBHDF5IO(path, "w") as io:
+        io.write(nwbfile)
+
+
+def read(path):
+    with NWBHDF5IO(path, "r") as io:
+        io.read().acquisition["nirs_data"].data[:]
+
+
+def channel_slice(path):
+    with NWBHDF5IO(path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        series.get_channel_data(source_wavelength=WAVELENGTHS[0])
+
+
+def time_slice(path, duration):
+    start_time = max(duration / 2 - WINDOW_SECONDS / 2, 0.0)
+    with NWBHDF5IO(path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        series.get_time_window(
+            start_time=start_time, stop_time=start_time + WINDOW_SECONDS
+        )
+
+
+def operations(path, n_channels, duration, rate):
+    """Returns the benchmarked operations, in the order they need to run, as pairs of a
+    function and a setup function which returns its arguments
+    """
+    n_samples = int(duration * rate)
+    return {
+        "build_tables": (build_tables, lambda: (n_channels,)),
+        "build_device": (build_device, lambda: (build_tables(n_channels),)),
+        "write": (write, lambda: (path, create_nwbfile(n_channels, n_samples, rate))),
+        "read": (read, lambda: (path,)),
+        "channel_slice": (channel_slice, lambda: (path,)),
+        "time_slice": (time_slice, lambda: (path, duration)),
+    }
+
+
+def measure(operation, setup, repeat):
+    """Returns the median time of operation over repeat runs and its peak memory in MB
+
+    The arguments returned by setup are created before each run, outside of the
+    measurements.
+    """
+    times = []
+    for _ in range(repeat):
+        arguments = setup()
+        start = time.perf_counter()
+        operation(*arguments)
+        times.append(time.perf_counter() - start)
+    arguments = setup()
+    tracemalloc.start()
+    operation(*arguments)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": statistics.median(times), "peak_mb": peak / 1e6}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--channels", type=int, nargs="+", default=[10, 100, 1000, 5000]
+    )
+    parser.add_argument(
+        "--durations", type=float, nargs="+", default=[60.0, 600.0], help="in seconds"
+    )
+    parser.add_argument("--rate", type=float, default=10.0, help="in Hz")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="path of a JSON file to write results to")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "nirs_types",
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "rate_hz": args.rate,
+        "repeat": args.repeat,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "benchmark.nwb")
+        for n_channels in args.channels:
+            for duration in args.durations:
+                case = {"channels": n_channels, "duration_seconds": duration}
+                for name, (operation, setup) in operations(
+                    path, n_channels, duration, args.rate
+                ).items():
+                    case[name] = measure(operation, setup, args.repeat)
+                case["file_size_mb"] = os.path.getsize(path) / 1e6
+                results["results"].append(case)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
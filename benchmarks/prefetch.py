@@ -0,0 +1,174 @@
+"""Measure how much reading overlaps with processing with PrefetchingBlockIterator
+
+A NIRSSeries of synthetic NIRS-like data is written with the chunking and gzip
+compression of the "balanced" layout preset, then processed block by block with
+NIRSSeries.iter_blocks for each number of prefetched blocks. The processing of each
+block regresses a set of slow drifts out of every channel with NumPy matrix products,
+repeated to make its cost comparable to reading and decompressing the block.
+
+For each prefetch value, the results give:
+  - total_seconds: the time of the whole loop,
+  - wait_seconds: the time the loop waited for blocks to be read,
+  - read_seconds: the total time spent reading blocks, in the loop or in the
+    background,
+  - overlap: the fraction of the shorter of reading alone and processing alone which
+    was hidden by running them at the same time, i.e. (read_only + compute_only -
+    total) / min(read_only, compute_only), where prefetch=0 reads each block in the
+    loop, and
+  - speedup: the time of the loop with prefetch=0 divided by total_seconds.
+
+Reading and processing only overlap when a core is free for the reading thread, so
+the benchmark should be run on a machine with at least two cores, with the BLAS
+threads limited (e.g., OPENBLAS_NUM_THREADS=1) so that they do not take every core.
+
+Usage:
+    python benchmarks/prefetch.py [--channels 128] [--duration 3600] [--rate 10]
+        [--block-size 2048] [--prefetch 0 1 2 4] [--workers 1] [--compute-repeat 8]
+        [--output results.json]
+
+The results are printed as JSON, with times in seconds.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+import h5py
+import numpy as np
+from hdmf.common import DynamicTableRegion
+from pynwb import NWBHDF5IO, NWBFile
+
+from layout_presets import make_data
+from ndx_nirs import NIRSSeries, layout_data_io
+from nirs_types import build_device, build_tables
+
+# the number of slow drifts regressed out of each block
+N_REGRESSORS = 16
+
+
+def write_series(path, n_channels, n_samples, rate):
+    nwbfile = NWBFile(
+        session_description="ndx-nirs prefetch benchmark",
+        identifier="prefetch",
+        session_start_time=datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc),
+    )
+    device = build_device(build_tables(n_channels))
+    nwbfile.add_device(device)
+    nwbfile.add_acquisition(
+        NIRSSeries(
+            name="nirs_data",
+            description="Synthetic NIRS data",
+            rate=rate,
+            channels=DynamicTableRegion(
+                name="channels",
+                description="the channels of the series",
+                table=device.channels,
+                data=list(range(n_channels)),
+            ),
+            data=layout_data_io(make_data(n_samples, n_channels, rate), "balanced"),
+            unit="V",
+        )
+    )
+    with NWBHDF5IO(path, "w") as io:
+        io.write(nwbfile)
+
+
+def process(data, repeat):
+    """Regresses slow drifts out of each channel of a block, repeat times"""
+    t = np.linspace(0.0, 1.0, len(data))
+    drifts = np.stack([np.cos(np.pi * k * t) for k in range(N_REGRESSORS)], axis=1)
+    projection = np.linalg.pinv(drifts)
+    for _ in range(repeat):
+        data = data - drifts @ (projection @ data)
+    return data
+
+
+def run(path, block_size, prefetch, workers, repeat):
+    """Returns the time of the processing loop and the wait and read times of its
+    iterator, or the time of processing blocks already in memory if prefetch is None
+    """
+    with NWBHDF5IO(path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        if prefetch is None:
+            blocks = list(series.iter_blocks(block_size=block_size, prefetch=0))
+            start = time.perf_counter()
+            for _, data in blocks:
+                process(data, repeat)
+            return {"total_seconds": time.perf_counter() - start}
+        start = time.perf_counter()
+        with series.iter_blocks(
+            block_size=block_size, prefetch=prefetch, workers=workers
+        ) as blocks:
+            for _, data in blocks:
+                if repeat:
+                    process(data, repeat)
+        return {
+            "total_seconds": time.perf_counter() - start,
+            "wait_seconds": blocks.wait_seconds,
+            "read_seconds": blocks.read_seconds,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--channels", type=int, default=128)
+    parser.add_argument("--duration", type=float, default=3600.0, help="in seconds")
+    parser.add_argument("--rate", type=float, default=10.0, help="in Hz")
+    parser.add_argument("--block-size", type=int, default=2048, help="in samples")
+    parser.add_argument("--prefetch", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--compute-repeat", type=int, default=8)
+    parser.add_argument("--output", help="path of a JSON file to write results to")
+    args = parser.parse_args()
+
+    n_samples = int(args.duration * args.rate)
+    results = {
+        "benchmark": "prefetch",
+        "python": sys.version.split()[0],
+        "h5py": h5py.version.version,
+        "hdf5": h5py.version.hdf5_version,
+        "channels": args.channels,
+        "samples": n_samples,
+        "block_size": args.block_size,
+        "workers": args.workers,
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "prefetch.nwb")
+        write_series(path, args.channels, n_samples, args.rate)
+        # warm up the page cache so that every run reads from memory
+        run(path, args.block_size, 0, args.workers, 0)
+        read_only = run(path, args.block_size, 0, args.workers, 0)["total_seconds"]
+        compute_only = run(
+            path, args.block_size, None, args.workers, args.compute_repeat
+        )
+        compute_only = compute_only["total_seconds"]
+        results["read_only_seconds"] = read_only
+        results["compute_only_seconds"] = compute_only
+        baseline = None
+        for prefetch in args.prefetch:
+            result = run(
+                path, args.block_size, prefetch, args.workers, args.compute_repeat
+            )
+            total = result["total_seconds"]
+            if prefetch == 0 and baseline is None:
+                baseline = total
+            result["overlap"] = (read_only + compute_only - total) / min(
+                read_only, compute_only
+            )
+            result["speedup"] = None if baseline is None else baseline / total
+            results["results"].append({"prefetch": prefetch, **result})
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,14 +32,22 @@ setup_args = {
     "license": "BSD 3-Clause",
     "python_requires": ">=3.7,<3.11",
     "install_requires": ["hdmf>=3.3.2,<4", "pynwb>=2.1.0,<3"],
+    "extras_require": {
+        "zarr": ["hdmf-zarr>=0.3.0,<0.10"],
+        "arrow": ["pyarrow>=8.0.0"],
+    },
     "packages": find_packages("src/pynwb"),
     "package_dir": {"": "src/pynwb"},
     "package_data": {
         "ndx_nirs": [
             "spec/ndx-nirs.namespace.yaml",
             "spec/ndx-nirs.extensions.yaml",
+            "spec/ndx-nirs.spec.json",
         ]
     },
+    "entry_points": {
+        "console_scripts": ["ndx-nirs-convert=ndx_nirs.cli:main"],
+    },
     "classifiers": [
         "Programming Language :: Python",
         "Programming Language :: Python :: 3.7",
@@ -56,6 +64,7 @@ setup_args = {
 def _copy_spec_files(project_dir):
     ns_path = os.path.join(project_dir, "spec", "ndx-nirs.namespace.yaml")
     ext_path = os.path.join(project_dir, "spec", "ndx-nirs.extensions.yaml")
+    cache_path = os.path.join(project_dir, "spec", "ndx-nirs.spec.json")
 
     dst_dir = os.path.join(project_dir, "src", "pynwb", "ndx_nirs", "spec")
     if not os.path.exists(dst_dir):
@@ -63,6 +72,7 @@ def _copy_spec_files(project_dir):
 
     copy2(ns_path, dst_dir)
     copy2(ext_path, dst_dir)
+    copy2(cache_path, dst_dir)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,123 @@
+import importlib
 import os
-from pynwb import load_namespaces, get_class, register_class
+from collections.abc import Callable
 
-from hdmf.common import DynamicTable
-from hdmf.utils import docval, getargs, popargs, AllowPositional
+import numpy as np
+import pynwb
+from pynwb import load_namespaces, get_class, register_class, register_map
 
+from hdmf.build import TypeMap
+from hdmf.common import DynamicTable, ElementIdentifiers, VectorData
+from hdmf.utils import docval, get_docval, getargs, popargs, AllowPositional
+
+from ndx_nirs.encoding import decode_columns
+from ndx_nirs.mappers import NIRSChannelsTableMap, NIRSSeriesMap, NIRSTableMap
+from ndx_nirs.prefetch import DEFAULT_PREFETCH
+from ndx_nirs.spec_cache import load_spec_cache
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE
 from ndx_nirs.utils import update_docval
 
+# the submodule of each name which is imported when the name is first accessed, so that
+# importing ndx_nirs only imports what the NIRS types need
+_LAZY_NAMES = {
+    "channels_to_arrow": "arrow",
+    "channels_to_dataframe": "arrow",
+    "series_to_arrow": "arrow",
+    "series_to_record_batches": "arrow",
+    "concatenate_series": "concatenation",
+    "ChannelGeometry": "geometry",
+    "ChannelIndex": "indexing",
+    "LAYOUT_PRESETS": "layout",
+    "LayoutPreset": "layout",
+    "layout_data_io": "layout",
+    "IngestStats": "live",
+    "LiveIngest": "live",
+    "QueueSource": "live",
+    "SocketSource": "live",
+    "pack_frame": "live",
+    "memmap_dataset": "memmap",
+    "Overview": "overview",
+    "add_overview": "overview",
+    "read_overview": "overview",
+    "PrefetchingBlockIterator": "prefetch",
+    "HemoglobinConverter": "processing",
+    "add_hemoglobin_series": "processing",
+    "ProfileReport": "profiling",
+    "profile": "profiling",
+    "profile_from_environment": "profiling",
+    "find_sample_range": "selection",
+    "find_series_columns": "selection",
+    "read_columns": "selection",
+    "nwb_to_snirf": "snirf",
+    "snirf_to_nwb": "snirf",
+    "DatasetChunkIterator": "streaming",
+    "NIRSSeriesWriter": "streaming",
+    "create_streaming_series": "streaming",
+    "ValidationProblem": "validation",
+    "validate_device": "validation",
+    "validate_nwbfile": "validation",
+    "validate_series": "validation",
+    "write_zarr": "zarr_io",
+    "zarr_data_io": "zarr_io",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | _LAZY_NAMES.keys())
+
+
+__all__ = [
+    "NIRSSourcesTable",
+    "NIRSDetectorsTable",
+    "NIRSChannelsTable",
+    "NIRSDevice",
+    "NIRSSeries",
+    "ChannelIndex",
+    "ChannelGeometry",
+    "LAYOUT_PRESETS",
+    "LayoutPreset",
+    "layout_data_io",
+    "NIRSSeriesWriter",
+    "LiveIngest",
+    "IngestStats",
+    "QueueSource",
+    "SocketSource",
+    "pack_frame",
+    "HemoglobinConverter",
+    "add_hemoglobin_series",
+    "concatenate_series",
+    "Overview",
+    "add_overview",
+    "channels_to_arrow",
+    "channels_to_dataframe",
+    "series_to_arrow",
+    "series_to_record_batches",
+    "create_streaming_series",
+    "DatasetChunkIterator",
+    "PrefetchingBlockIterator",
+    "snirf_to_nwb",
+    "nwb_to_snirf",
+    "ProfileReport",
+    "profile",
+    "update_docval",
+    "ValidationProblem",
+    "validate_device",
+    "validate_nwbfile",
+    "validate_series",
+    "write_zarr",
+    "zarr_data_io",
+]
+
 
 # Set path of the namespace.yaml file to the expected install location
 ndx_nirs_specpath = os.path.join(
@@ -26,8 +138,116 @@ if not os.path.exists(ndx_nirs_specpath):
         )
     )
 
+
+def _global_type_map():
+    """Returns the global TypeMap of pynwb, or None if it cannot be found.
+
+    pynwb has no public API for the TypeMap its load_namespaces, get_class and
+    NWBHDF5IO use (get_type_map returns a copy), so it is looked up as the private
+    module variable __TYPE_MAP, which pynwb 2.x (the versions required by setup.py) has.
+    tests/unit/test_spec_cache.py checks that it is still found after upgrading pynwb.
+    """
+    type_map = vars(pynwb).get("__TYPE_MAP")
+    return type_map if isinstance(type_map, TypeMap) else None
+
+
+def _load_namespace():
+    """Loads the ndx-nirs namespace into pynwb.
+
+    The parsed spec is read from the pre-serialized spec cache next to the namespace
+    file when it is up to date, which avoids parsing the YAML spec files on import.
+    Otherwise, or if the global type map of pynwb cannot be found, the namespace is
+    loaded from the YAML spec files with pynwb.load_namespaces.
+    """
+    reader = load_spec_cache(ndx_nirs_specpath)
+    # pynwb.load_namespaces does not accept a spec reader, so the cached spec is loaded
+    # directly into pynwb's global type map
+    type_map = _global_type_map()
+    if reader is not None and type_map is not None:
+        type_map.load_namespaces(namespace_path=ndx_nirs_specpath, reader=reader)
+    else:
+        load_namespaces(ndx_nirs_specpath)
+
+
 # Load the namespace
-load_namespaces(ndx_nirs_specpath)
+_load_namespace()
+
+
+def _from_coordinates(cls, kwargs):
+    """Builds an optode table of type cls from a label array and a coordinates array.
+
+    The coordinates are split into contiguous float64 arrays which are used directly as
+    the data of the x, y and (optional) z columns.
+    """
+    label, coordinates = popargs("label", "coordinates", kwargs)
+    label = np.asarray(label)
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    if coordinates.ndim != 2 or coordinates.shape[1] not in (2, 3):
+        msg = f"coordinates must have shape (N, 2) or (N, 3), not {coordinates.shape}"
+        raise ValueError(msg)
+    if label.ndim != 1 or len(label) != len(coordinates):
+        msg = f"label must be a 1D array with one value for each of the {len(coordinates)} rows of coordinates"
+        raise ValueError(msg)
+
+    descriptions = {col["name"]: col["description"] for col in cls.__columns__}
+    columns = [
+        VectorData(name="label", description=descriptions["label"], data=label.tolist())
+    ]
+    for axis, name in enumerate("xyz"[: coordinates.shape[1]]):
+        columns.append(
+            VectorData(
+                name=name,
+                description=descriptions[name],
+                data=np.ascontiguousarray(coordinates[:, axis]),
+            )
+        )
+    ids = ElementIdentifiers(name="id", data=np.arange(len(coordinates)))
+    return cls(id=ids, columns=columns, **kwargs)
+
+
+# the docval item of the compact argument of the NIRS tables
+_compact_docval = {
+    "name": "compact",
+    "type": bool,
+    "doc": (
+        "Whether to write the table in its compact representation: the labels as"
+        " fixed-length strings and the wavelengths as an EnumData of the distinct"
+        " wavelengths. The values read from the file are the same."
+    ),
+    "default": False,
+}
+
+
+def _pop_compact(kwargs):
+    """Pops the compact argument of a NIRS table, decoding the columns of a compact table
+    read from a file, which is then compact too.
+    """
+    compact = popargs("compact", kwargs)
+    if kwargs.get("columns") is not None:
+        kwargs["columns"], decoded = decode_columns(kwargs["columns"])
+        compact = compact or decoded
+    return compact
+
+
+def _from_coordinates_docval(table_docval, optode):
+    """Returns the docval items for the from_coordinates constructor of an optode table."""
+    return [
+        {
+            "name": "label",
+            "type": "array_data",
+            "doc": f"The label of each optical {optode}.",
+        },
+        {
+            "name": "coordinates",
+            "type": "array_data",
+            "doc": (
+                f"An (N, 2) or (N, 3) array with the x, y and (optionally) z coordinates in meters"
+                f" of each optical {optode}."
+            ),
+        },
+        *(item for item in table_docval if item["name"] in ("name", "description")),
+        _compact_docval,
+    ]
 
 
 _sources_docval = update_docval(
@@ -56,17 +276,39 @@ class NIRSSourcesTable(DynamicTable):
         ),
     )
 
-    @docval(*_sources_docval, allow_positional=AllowPositional.ERROR)
+    @docval(*_sources_docval, _compact_docval, allow_positional=AllowPositional.ERROR)
     def __init__(self, **kwargs):
         """Initializes a NIRSSourcesTable instance.
 
         Users should only use the following parameters:
-            (name, description)
+            (name, description, compact)
         The following should only be the build backend for constructing containers
         when loading an nwb file from disk:
             (id, columns, colnames)
         """
+        compact = _pop_compact(kwargs)
         super().__init__(**kwargs)
+        self.compact = compact
+
+    @classmethod
+    @docval(
+        *_from_coordinates_docval(_sources_docval, "source"),
+        allow_positional=AllowPositional.ERROR,
+    )
+    def from_coordinates(cls, **kwargs):
+        """Creates a NIRSSourcesTable from an array of labels and an array of coordinates.
+
+        The z column is only created when the coordinates have three columns.
+
+        Example:
+        ```python
+        sources = NIRSSourcesTable.from_coordinates(
+            label=["S1", "S2"],
+            coordinates=np.array([[-0.02, 0.0], [0.02, 0.0]]),
+        )
+        ```
+        """
+        return _from_coordinates(cls, kwargs)
 
 
 _detectors_docval = update_docval(
@@ -95,17 +337,39 @@ class NIRSDetectorsTable(DynamicTable):
         ),
     )
 
-    @docval(*_detectors_docval, allow_positional=AllowPositional.ERROR)
+    @docval(*_detectors_docval, _compact_docval, allow_positional=AllowPositional.ERROR)
     def __init__(self, **kwargs):
         """Initializes a NIRSDetectorsTable instance.
 
         Users should only use the following parameters:
-            (name, description)
+            (name, description, compact)
         The following should only be the build backend for constructing containers
         when loading an nwb file from disk:
             (id, columns, colnames)
         """
+        compact = _pop_compact(kwargs)
         super().__init__(**kwargs)
+        self.compact = compact
+
+    @classmethod
+    @docval(
+        *_from_coordinates_docval(_detectors_docval, "detector"),
+        allow_positional=AllowPositional.ERROR,
+    )
+    def from_coordinates(cls, **kwargs):
+        """Creates a NIRSDetectorsTable from an array of labels and an array of coordinates.
+
+        The z column is only created when the coordinates have three columns.
+
+        Example:
+        ```python
+        detectors = NIRSDetectorsTable.from_coordinates(
+            label=["D1", "D2"],
+            coordinates=np.array([[-0.02, 0.0], [0.02, 0.0]]),
+        )
+        ```
+        """
+        return _from_coordinates(cls, kwargs)
 
 
 _channels_docval = [
@@ -130,6 +394,7 @@ _channels_docval = [
             },
         ),
     ),
+    _compact_docval,
 ]
 
 
@@ -202,14 +467,16 @@ class NIRSChannelsTable(DynamicTable):
         """Initializes a NIRSChannelsTable instance.
 
         Users should only use the following parameters:
-            (name, description, sources, detectors)
+            (name, description, sources, detectors, compact)
         The following should only be the build backend for constructing containers
         when loading an nwb file from disk:
             (id, columns, colnames)
         """
         sources = popargs("sources", kwargs)
         detectors = popargs("detectors", kwargs)
+        compact = _pop_compact(kwargs)
         super().__init__(**kwargs)
+        self.compact = compact
         if sources is not None:
             self.set_sources_table(sources)
         if detectors is not None:
@@ -239,9 +506,548 @@ class NIRSChannelsTable(DynamicTable):
         detectors = getargs("detectors", kwargs)
         self.detector.table = detectors
 
+    @docval(
+        {
+            "name": "label",
+            "type": "array_data",
+            "doc": "The label of each channel.",
+        },
+        {
+            "name": "source",
+            "type": "array_data",
+            "doc": "The row index in the sources table of the optical source of each channel.",
+        },
+        {
+            "name": "detector",
+            "type": "array_data",
+            "doc": "The row index in the detectors table of the optical detector of each channel.",
+        },
+        {
+            "name": "source_wavelength",
+            "type": "array_data",
+            "doc": "The wavelength of light in nm emitted by the source for each channel.",
+        },
+        {
+            "name": "emission_wavelength",
+            "type": "array_data",
+            "doc": "The wavelength of light in nm emitted by the fluorophore for each channel.",
+            "default": None,
+        },
+        {
+            "name": "source_power",
+            "type": "array_data",
+            "doc": "The power of the source in mW used for each channel.",
+            "default": None,
+        },
+        {
+            "name": "detector_gain",
+            "type": "array_data",
+            "doc": "The gain applied to the detector for each channel.",
+            "default": None,
+        },
+        allow_positional=AllowPositional.ERROR,
+    )
+    def add_channels(self, **kwargs):
+        """Adds many channels to the table at once from parallel arrays.
+
+        This is equivalent to calling add_row once per channel, but the source and
+        detector indices are validated in a single vectorized pass and every column is
+        extended in bulk. The sources and detectors tables must be assigned beforehand.
+
+        Example:
+        ```python
+        channels.add_channels(
+            label=["S1D1 690", "S1D1 830"],
+            source=[0, 0],
+            detector=[0, 0],
+            source_wavelength=[690.0, 830.0],
+        )
+        ```
+        """
+        values = {
+            name: np.asarray(value)
+            for name, value in kwargs.items()
+            if value is not None
+        }
+        n_channels = len(values["label"])
+        for name, value in values.items():
+            if value.ndim != 1 or len(value) != n_channels:
+                msg = f"'{name}' must be a 1D array with one value for each of the {n_channels} channels"
+                raise ValueError(msg)
+        if n_channels == 0:
+            return
+
+        self._check_region_indices(self.source, values["source"])
+        self._check_region_indices(self.detector, values["detector"])
+
+        missing = set(self.colnames) - set(values)
+        if missing:
+            msg = f"values for the existing columns {sorted(missing)} were not provided"
+            raise ValueError(msg)
+        for col in self.__columns__:
+            if col["name"] in values and col["name"] not in self.colnames:
+                if len(self) > 0:
+                    msg = f"cannot add optional column '{col['name']}' to a table which already has rows"
+                    raise ValueError(msg)
+                self.add_column(name=col["name"], description=col["description"])
+
+        first_id = len(self)
+        self.id.extend(list(range(first_id, first_id + n_channels)))
+        for name, value in values.items():
+            self[name].extend(value.tolist())
+
+    @property
+    def channel_index(self):
+        """The ChannelIndex of this table.
+
+        The index is built on first access and rebuilt when rows have been added to this
+        table or to the sources or detectors tables, or when either of those tables has
+        been replaced. Changes made in place to existing values of the source, detector
+        or source_wavelength columns are not detected.
+        """
+        from ndx_nirs.indexing import ChannelIndex
+
+        index = getattr(self, "_channel_index", None)
+        if index is None or index.signature != ChannelIndex.signature_of(self):
+            index = ChannelIndex(self)
+            self._channel_index = index
+        return index
+
+    @property
+    def geometry(self):
+        """The ChannelGeometry of this table, with the optode positions, source-detector
+        distances and midpoints of all channels.
+
+        The geometry is computed on first access and recomputed when rows have been added
+        to this table or to the sources or detectors tables, or when either of those
+        tables has been replaced. Changes made in place to existing coordinates or
+        source and detector indices are not detected.
+
+        Example:
+        ```python
+        distances = channels.geometry.distances
+        short_channels = channels.geometry.short_channel_mask(threshold=0.01)
+        ```
+        """
+        from ndx_nirs.geometry import ChannelGeometry
+
+        geometry = getattr(self, "_geometry", None)
+        if geometry is None or geometry.signature != ChannelGeometry.signature_of(self):
+            geometry = ChannelGeometry(self)
+            self._geometry = geometry
+        return geometry
+
+    @docval(
+        {
+            "name": "source",
+            "type": (int, str),
+            "doc": "The row index or label of the source.",
+            "default": None,
+        },
+        {
+            "name": "detector",
+            "type": (int, str),
+            "doc": "The row index or label of the detector.",
+            "default": None,
+        },
+        {
+            "name": "source_wavelength",
+            "type": (int, float),
+            "doc": "The wavelength of light in nm emitted by the source.",
+            "default": None,
+        },
+        returns="the sorted row indices of the matching channels",
+        rtype=np.ndarray,
+    )
+    def find_channels(self, **kwargs):
+        """Returns the row indices of the channels matching all of the given fields.
+
+        Any subset of the fields can be given. The lookup uses the channel_index of the
+        table rather than scanning its columns.
+
+        Example:
+        ```python
+        # all channels of the source labeled "S3"
+        rows = channels.find_channels(source="S3")
+        # the channels between the 3rd source and the 7th detector at 830 nm
+        rows = channels.find_channels(source=2, detector=6, source_wavelength=830.0)
+        ```
+        """
+        return self.channel_index.find(**kwargs)
+
+    @docval(
+        {
+            "name": "source",
+            "type": (int, str),
+            "doc": "The row index or label of the source.",
+        },
+        {
+            "name": "detector",
+            "type": (int, str),
+            "doc": "The row index or label of the detector.",
+        },
+        {
+            "name": "source_wavelength",
+            "type": (int, float),
+            "doc": "The wavelength of light in nm emitted by the source.",
+        },
+        returns="the row index of the channel",
+        rtype=int,
+    )
+    def get_channel(self, **kwargs):
+        """Returns the row index of the single channel with the given source, detector and wavelength.
+
+        Raises a KeyError if there is no such channel or if it is not unique.
+        """
+        return self.channel_index.get(**kwargs)
+
+    def to_arrow(self):
+        """Returns the channels as a flat pyarrow.Table, with the label and coordinates of
+        the source and detector of each channel in their own columns.
+
+        This requires pyarrow. See channels_to_arrow.
+        """
+        from ndx_nirs.arrow import channels_to_arrow
+
+        return channels_to_arrow(self)
+
+    @staticmethod
+    def _check_region_indices(region, indices):
+        """Raises an IndexError if any of the indices is out of bounds for the region's table.
+
+        Raises a ValueError if the table is not set or the indices are not integers.
+        """
+        if region.table is None:
+            msg = f"the table referenced by the {region.name} column must be set before adding channels"
+            raise ValueError(msg)
+        if not np.issubdtype(indices.dtype, np.integer):
+            msg = f"'{region.name}' indices must be integers, not {indices.dtype}"
+            raise ValueError(msg)
+        n_rows = len(region.table)
+        out_of_bounds = (indices < 0) | (indices >= n_rows)
+        if out_of_bounds.any():
+            msg = (
+                f"'{region.name}' indices {np.unique(indices[out_of_bounds]).tolist()} are out of "
+                f"bounds for the {n_rows} rows in {region.table.name}"
+            )
+            raise IndexError(msg)
+
 
 NIRSDevice = get_class("NIRSDevice", "ndx-nirs")
 NIRSDevice.__doc__ = "Metadata about a NIRS device."
 
-NIRSSeries = get_class("NIRSSeries", "ndx-nirs")
-NIRSSeries.__doc__ = "A timeseries of recorded NIRS data."
+_channel_selection_docval = [
+    {
+        "name": "rows",
+        "type": "array_data",
+        "doc": "Row indices of channels in the NIRSChannelsTable.",
+        "default": None,
+    },
+    {
+        "name": "labels",
+        "type": (str, "array_data"),
+        "doc": "Labels of channels in the NIRSChannelsTable.",
+        "default": None,
+    },
+    {
+        "name": "where",
+        "type": Callable,
+        "doc": (
+            "A predicate which is given a dict mapping each column name of the"
+            " NIRSChannelsTable to an array of its values for the channels of this series"
+            " (in data column order) and returns a boolean mask over those channels."
+        ),
+        "default": None,
+    },
+    {
+        "name": "source",
+        "type": (int, str),
+        "doc": "The row index or label of the source of the channels.",
+        "default": None,
+    },
+    {
+        "name": "detector",
+        "type": (int, str),
+        "doc": "The row index or label of the detector of the channels.",
+        "default": None,
+    },
+    {
+        "name": "source_wavelength",
+        "type": (int, float),
+        "doc": "The wavelength of light in nm emitted by the source of the channels.",
+        "default": None,
+    },
+]
+
+
+@register_class("NIRSSeries", "ndx-nirs")
+class NIRSSeries(get_class("NIRSSeries", "ndx-nirs")):
+    """A timeseries of recorded NIRS data.
+
+    The columns of data correspond to the rows of the NIRSChannelsTable referenced by
+    the channels DynamicTableRegion, in order.
+    """
+
+    @docval(
+        *_channel_selection_docval,
+        returns="the sorted indices of the data columns of the matching channels",
+        rtype=np.ndarray,
+    )
+    def find_columns(self, **kwargs):
+        """Returns the data columns of the channels matching all of the given criteria.
+
+        If no criteria are given, all columns are returned.
+        """
+        from ndx_nirs.selection import find_series_columns
+
+        return find_series_columns(self, **kwargs)
+
+    @docval(
+        *_channel_selection_docval,
+        returns="a (time, channels) array with the data of the matching channels",
+        rtype=np.ndarray,
+    )
+    def get_channel_data(self, **kwargs):
+        """Reads the data of the channels matching all of the given criteria.
+
+        The channels are resolved with find_columns and only their columns are read. When
+        the data is on disk, each run of adjacent columns is read with a single read.
+        The columns of the returned array are in data column order.
+
+        Example:
+        ```python
+        # all channels at 830 nm
+        data = series.get_channel_data(source_wavelength=830.0)
+        # the channels of the source labeled "S3"
+        data = series.get_channel_data(source="S3")
+        # channels with a high source power
+        data = series.get_channel_data(where=lambda ch: ch["source_power"] > 10.0)
+        ```
+        """
+        from ndx_nirs.selection import find_series_columns, read_columns
+
+        return read_columns(self.data, find_series_columns(self, **kwargs))
+
+    @docval(
+        {
+            "name": "start_time",
+            "type": (int, float),
+            "doc": "The start of the time window in seconds. Defaults to the first sample.",
+            "default": None,
+        },
+        {
+            "name": "stop_time",
+            "type": (int, float),
+            "doc": "The exclusive end of the time window in seconds. Defaults to after the last sample.",
+            "default": None,
+        },
+        returns="the range of sample indices in the time window",
+        rtype=slice,
+    )
+    def find_samples(self, **kwargs):
+        """Returns the slice of samples with start_time <= time < stop_time.
+
+        With a sampling rate, the sample indices are computed from the rate and starting
+        time. With timestamps, they are found by a chunk-aware binary search which does
+        not load the timestamps from disk.
+        """
+        from ndx_nirs.selection import find_sample_range
+
+        return find_sample_range(self, **kwargs)
+
+    @docval(
+        *get_docval(find_samples, "start_time", "stop_time"),
+        *_channel_selection_docval,
+        returns="a (time, channels) array with the data in the time window",
+        rtype=np.ndarray,
+    )
+    def get_time_window(self, **kwargs):
+        """Reads the data in the time window start_time <= time < stop_time.
+
+        Only the samples in the window are read. The channels can be narrowed down with
+        the same criteria as get_channel_data, in which case only their columns are read.
+
+        Example:
+        ```python
+        # all channels between 10 s and 20 s
+        data = series.get_time_window(start_time=10.0, stop_time=20.0)
+        # the 830 nm channels in the same window
+        data = series.get_time_window(
+            start_time=10.0, stop_time=20.0, source_wavelength=830.0
+        )
+        ```
+        """
+        from ndx_nirs.selection import (
+            find_sample_range,
+            find_series_columns,
+            read_columns,
+        )
+
+        start_time, stop_time = popargs("start_time", "stop_time", kwargs)
+        samples = find_sample_range(self, start_time=start_time, stop_time=stop_time)
+        if not any(value is not None for value in kwargs.values()):
+            return np.asarray(self.data[samples])
+        return read_columns(self.data, find_series_columns(self, **kwargs), samples)
+
+    @docval(
+        *get_docval(find_samples, "start_time", "stop_time"),
+        {
+            "name": "width",
+            "type": int,
+            "doc": "The minimum number of bins to return, e.g. the width in pixels of a plot.",
+            "default": 2000,
+        },
+        *_channel_selection_docval,
+        returns="the minimum, maximum and mean of each channel in bins over the time span",
+        rtype="Overview",
+    )
+    def get_overview(self, **kwargs):
+        """Reads the envelope of the data over a time span from its overview pyramid.
+
+        The coarsest level of the overview written by add_overview which still has at
+        least width bins in the time span is read, so a long span is drawn from a small
+        number of precomputed bins instead of all raw samples. If no level is fine
+        enough, or the series has no overview, the raw samples are read. The channels
+        can be narrowed down with the same criteria as get_channel_data.
+
+        Example:
+        ```python
+        overview = series.get_overview(start_time=0.0, stop_time=3600.0, width=2000)
+        plt.fill_between(overview.times, overview.min[:, 0], overview.max[:, 0])
+        ```
+        """
+        from ndx_nirs.overview import read_overview
+        from ndx_nirs.selection import find_series_columns
+
+        start_time, stop_time, width = popargs(
+            "start_time", "stop_time", "width", kwargs
+        )
+        columns = None
+        if any(value is not None for value in kwargs.values()):
+            columns = find_series_columns(self, **kwargs)
+        return read_overview(
+            self,
+            start_time=start_time,
+            stop_time=stop_time,
+            width=width,
+            columns=columns,
+        )
+
+    def memmap_data(self):
+        """Returns a read-only memory map of the data if its layout allows, else the data.
+
+        When the data is stored on disk contiguously and uncompressed, it is returned as a
+        numpy.memmap which reads directly from the file, so repeated reads are served from
+        the page cache without copying the whole dataset. Otherwise, e.g. for chunked or
+        compressed data, the data is returned as is.
+        """
+        from ndx_nirs.memmap import memmap_dataset
+
+        mapped = memmap_dataset(self.data)
+        return self.data if mapped is None else mapped
+
+    def memmap_timestamps(self):
+        """Returns a read-only memory map of the timestamps if their layout allows, else the
+        timestamps, which are None for a series with a sampling rate.
+        """
+        from ndx_nirs.memmap import memmap_dataset
+
+        mapped = memmap_dataset(self.timestamps)
+        return self.timestamps if mapped is None else mapped
+
+    @docval(
+        {
+            "name": "block_size",
+            "type": int,
+            "doc": "The number of samples of each block.",
+            "default": DEFAULT_CHUNK_SIZE,
+        },
+        {
+            "name": "prefetch",
+            "type": int,
+            "doc": (
+                "The number of blocks read ahead in background threads, or 0 to read each"
+                " block when it is requested."
+            ),
+            "default": DEFAULT_PREFETCH,
+        },
+        {
+            "name": "workers",
+            "type": int,
+            "doc": "The number of threads reading blocks.",
+            "default": 1,
+        },
+        *get_docval(find_samples, "start_time", "stop_time"),
+        allow_positional=AllowPositional.ERROR,
+        rtype="PrefetchingBlockIterator",
+    )
+    def iter_blocks(self, **kwargs):
+        """Returns an iterator over the (timestamps, data) blocks of the series, which
+        reads the next blocks in background threads while the current one is processed.
+
+        At most prefetch blocks are read ahead. Use the iterator as a context manager,
+        or close it, to stop the background reads when it is not consumed to the end.
+        See PrefetchingBlockIterator.
+
+        Example:
+        ```python
+        with series.iter_blocks(block_size=10000, prefetch=4) as blocks:
+            for timestamps, data in blocks:
+                process(timestamps, data)
+        ```
+        """
+        from ndx_nirs.prefetch import PrefetchingBlockIterator
+
+        return PrefetchingBlockIterator(self, **kwargs)
+
+    @docval(
+        {
+            "name": "chunk_size",
+            "type": int,
+            "doc": "The number of samples of each record batch.",
+            "default": DEFAULT_CHUNK_SIZE,
+        },
+        *get_docval(find_samples, "start_time", "stop_time"),
+        {
+            "name": "layout",
+            "type": str,
+            "doc": (
+                'The layout of the batches: "wide" for one column per channel, or "list"'
+                " for a single column with a fixed-size list of the values of all channels."
+            ),
+            "default": "wide",
+        },
+        allow_positional=AllowPositional.ERROR,
+    )
+    def to_record_batches(self, **kwargs):
+        """Yields the samples of the series as pyarrow.RecordBatches, with a "timestamp"
+        column followed by the data of the channels, named by their labels.
+
+        The data is read one chunk of samples at a time and each batch is backed by the
+        buffer read, so the series can be streamed to Arrow, Polars or an IPC stream
+        without holding it in memory. This requires pyarrow. See
+        series_to_record_batches.
+
+        Example:
+        ```python
+        table = pyarrow.Table.from_batches(series.to_record_batches(chunk_size=10000))
+        ```
+        """
+        from ndx_nirs.arrow import series_to_record_batches
+
+        return series_to_record_batches(self, **kwargs)
+
+
+# Write the row indices of the channel regions with compact integer dtypes, and
+# the columns of compact tables in their compact representation
+register_map(NIRSSourcesTable, NIRSTableMap)
+register_map(NIRSDetectorsTable, NIRSTableMap)
+register_map(NIRSChannelsTable, NIRSChannelsTableMap)
+register_map(NIRSSeries, NIRSSeriesMap)
+
+# Start profiling the whole process if it was requested with NDX_NIRS_PROFILE. The
+# profiling module is only imported then.
+if os.environ.get("NDX_NIRS_PROFILE", "") not in ("", "0"):
+    from ndx_nirs.profiling import profile_from_environment
+
+    profile_from_environment()
@@ -0,0 +1,188 @@
+import numpy as np
+from hdmf.data_utils import DataIO
+
+from ndx_nirs.memmap import memmap_dataset
+from ndx_nirs.selection import find_sample_range, sample_times
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE
+
+# the layouts of the record batches of a series: one column per channel, or a single
+# column with a fixed-size list of the values of all channels at each sample
+ARROW_LAYOUTS = ("wide", "list")
+
+# the name of the column holding the time of each sample in the record batches of a series
+TIME_COLUMN = "timestamp"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        msg = (
+            "exporting NIRS data to Arrow requires pyarrow: pip install ndx-nirs[arrow]"
+        )
+        raise ImportError(msg) from None
+    return pyarrow
+
+
+def flatten_channels(channels):
+    """Returns the columns of a NIRSChannelsTable with the columns of the source and
+    detector of each channel resolved
+
+    Each column of the sources and detectors tables, e.g. "label", "x" and "y", gives a
+    column prefixed with "source_" or "detector_" holding the value of the optode of each
+    channel. The source and detector columns hold the row indices of the optodes.
+
+    Args:
+        channels (NIRSChannelsTable): the channels, with their sources and detectors tables
+
+    Returns:
+        dict: a 1D numpy.ndarray for each column, in the order label, source, source_*,
+            detector, detector_*, followed by the other columns of the channels table
+    """
+    columns = dict(label=np.asarray(channels.label.data[:]))
+    for name in ("source", "detector"):
+        region = channels[name]
+        indices = np.asarray(region.data[:])
+        columns[name] = indices
+        for column in region.table.colnames:
+            values = np.asarray(region.table[column].data[:])
+            columns[f"{name}_{column}"] = values[indices]
+    for name in channels.colnames:
+        if name not in columns:
+            columns[name] = np.asarray(channels[name].data[:])
+    return columns
+
+
+def channels_to_dataframe(channels):
+    """Returns a flat pandas.DataFrame of a NIRSChannelsTable, indexed by channel id
+
+    Unlike NIRSChannelsTable.to_dataframe, the source and detector references are
+    resolved into flat columns (see flatten_channels) instead of nested tables.
+    """
+    import pandas
+
+    ids = pandas.Index(np.asarray(channels.id.data[:]), name="id")
+    return pandas.DataFrame(flatten_channels(channels), index=ids, copy=False)
+
+
+def channels_to_arrow(channels):
+    """Returns a flat pyarrow.Table of a NIRSChannelsTable
+
+    The columns are those of flatten_channels. Numeric columns are backed by the NumPy
+    arrays read from the tables, without another copy.
+    """
+    pa = _import_pyarrow()
+    return pa.table(
+        {name: pa.array(values) for name, values in flatten_channels(channels).items()}
+    )
+
+
+def series_schema(series, layout="wide"):
+    """Returns the pyarrow.Schema of the record batches of a NIRSSeries
+
+    The first column, "timestamp", holds the time in seconds of each sample. With the
+    "wide" layout, it is followed by one column per channel of the series, named by the
+    label of the channel. With the "list" layout, it is followed by a single "data"
+    column holding a fixed-size list of the values of every channel. The name, unit,
+    conversion and offset of the series, and the channel labels for the "list" layout,
+    are stored in the metadata of the schema.
+    """
+    pa = _import_pyarrow()
+    if layout not in ARROW_LAYOUTS:
+        msg = f"layout must be one of {ARROW_LAYOUTS}, not {layout!r}"
+        raise ValueError(msg)
+    labels = _channel_labels(series)
+    dtype = pa.from_numpy_dtype(np.dtype(_data(series).dtype))
+    metadata = dict(
+        name=series.name,
+        unit=series.unit,
+        conversion=str(series.conversion),
+        offset=str(getattr(series, "offset", 0.0)),
+    )
+    fields = [pa.field(TIME_COLUMN, pa.float64())]
+    if layout == "wide":
+        fields.extend(pa.field(label, dtype) for label in labels)
+    else:
+        fields.append(pa.field("data", pa.list_(dtype, len(labels))))
+        metadata["channels"] = "\n".join(labels)
+    return pa.schema(fields, metadata=metadata)
+
+
+def series_to_record_batches(
+    series,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    start_time=None,
+    stop_time=None,
+    layout="wide",
+):
+    """Yields the samples of a NIRSSeries as pyarrow.RecordBatches of chunk_size samples
+
+    The data is read one chunk of samples at a time, from a memory map of the file when
+    its layout allows (see NIRSSeries.memmap_data). With the "list" layout, each batch
+    is backed by the buffer of the chunk read, or by the memory map itself, without a
+    copy. With the "wide" layout, the chunk is transposed once so that the values of
+    each channel are contiguous, and each channel column is backed by that buffer.
+
+    Args:
+        series (NIRSSeries): the series to export
+        chunk_size (int): the number of samples of each record batch
+        start_time (float): the start of the time window in seconds, or None for the
+            first sample
+        stop_time (float): the (exclusive) end of the time window in seconds, or None
+            for the end of the series
+        layout (str): "wide" or "list", see series_schema
+
+    Returns:
+        generator: the record batches, with the schema given by series_schema
+
+    Example:
+    ```python
+    schema = series_schema(series)
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        for batch in series_to_record_batches(series, chunk_size=10000):
+            writer.write_batch(batch)
+    ```
+    """
+    pa = _import_pyarrow()
+    schema = series_schema(series, layout)
+    samples = find_sample_range(series, start_time=start_time, stop_time=stop_time)
+    data = _data(series)
+    mapped = memmap_dataset(data)
+    if mapped is not None:
+        data = mapped
+    for start in range(samples.start, samples.stop, chunk_size):
+        chunk = slice(start, min(start + chunk_size, samples.stop))
+        values = np.asarray(data[chunk])
+        times = sample_times(series, chunk)
+        if layout == "wide":
+            columns = [pa.array(column) for column in np.ascontiguousarray(values.T)]
+        else:
+            flat = pa.array(np.ascontiguousarray(values).reshape(-1))
+            columns = [pa.FixedSizeListArray.from_arrays(flat, values.shape[1])]
+        yield pa.RecordBatch.from_arrays([pa.array(times), *columns], schema=schema)
+
+
+def series_to_arrow(series, **kwargs):
+    """Returns the samples of a NIRSSeries as a pyarrow.Table of record batches
+
+    The keyword arguments are those of series_to_record_batches.
+    """
+    pa = _import_pyarrow()
+    schema = series_schema(series, kwargs.get("layout", "wide"))
+    return pa.Table.from_batches(series_to_record_batches(series, **kwargs), schema)
+
+
+def _data(series):
+    data = series.data
+    return data.data if isinstance(data, DataIO) else data
+
+
+def _channel_labels(series):
+    """Returns the label of each channel of a series, which must be unique"""
+    region = series.channels
+    rows = np.asarray(region.data[:], dtype=np.int64)
+    labels = [str(label) for label in np.asarray(region.table.label.data[:])[rows]]
+    if len(set(labels)) != len(labels):
+        msg = f"the channels of {series.name} do not have unique labels"
+        raise ValueError(msg)
+    return labels
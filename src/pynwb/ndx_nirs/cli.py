@@ -0,0 +1,300 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE
+
+# the suffix of the temporary file an NWB file is written to before it is complete
+PARTIAL_SUFFIX = ".part"
+
+
+def convert_file(snirf_path, nwb_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Converts one SNIRF file to NWB, reporting rather than raising any failure
+
+    The NWB file is first written to a temporary file next to it, which is renamed once
+    the conversion is complete, so that an NWB file at nwb_path is always complete.
+
+    Returns:
+        dict: the input path, the status ("converted" or "failed"), the number of bytes of
+            time series data converted, the time taken in seconds and the error message
+            of a failure
+    """
+    from ndx_nirs.snirf import snirf_to_nwb
+
+    start = time.perf_counter()
+    partial_path = nwb_path + PARTIAL_SUFFIX
+    result = dict(path=snirf_path, status="converted", bytes=0, error=None)
+    try:
+        result["bytes"] = snirf_to_nwb(snirf_path, partial_path, chunk_size=chunk_size)
+        os.replace(partial_path, nwb_path)
+    except Exception as error:
+        result.update(status="failed", error=f"{type(error).__name__}: {error}")
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def expand_inputs(patterns):
+    """Returns the unique paths matching a list of paths or glob patterns
+
+    Returns:
+        dict: the root of each path, by path in sorted order. The root is the directory
+            of the pattern before its first wildcard, e.g. "data" for "data/**/*.snirf",
+            or the directory of a path which is not a pattern. A path matched by several
+            patterns has the root of the first one.
+    """
+    roots = {}
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True)
+        if not matches and not _is_pattern(pattern):
+            matches = [pattern]
+        root = _glob_root(pattern)
+        for match in matches:
+            roots.setdefault(os.path.abspath(match), root)
+    return dict(sorted(roots.items()))
+
+
+def output_path(input_path, output_dir=None, root=None):
+    """Returns the path of the NWB file converted from an input file
+
+    Args:
+        input_path (str): the path of the SNIRF file
+        output_dir (str): the directory to write the NWB files to, or None to write the
+            NWB file next to the input file
+        root (str): the root of the input path, see expand_inputs. The NWB file is
+            written under output_dir at the path of the input file relative to its root,
+            so that inputs with the same name in different directories do not overwrite
+            each other. Defaults to the directory of the input file.
+
+    Returns:
+        str: the path of the NWB file
+    """
+    directory = os.path.dirname(input_path)
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    if output_dir is not None:
+        relative = os.path.relpath(directory, root) if root is not None else os.curdir
+        directory = os.path.normpath(os.path.join(output_dir, relative))
+    return os.path.join(directory, stem + ".nwb")
+
+
+def _is_pattern(path):
+    return any(char in path for char in "*?[")
+
+
+def _glob_root(pattern):
+    """Returns the directory of a glob pattern before its first wildcard"""
+    if not _is_pattern(pattern):
+        return os.path.dirname(os.path.abspath(pattern))
+    parts = []
+    for part in os.path.normpath(pattern).split(os.sep):
+        if _is_pattern(part):
+            break
+        parts.append(part)
+    return os.path.abspath(os.sep.join(parts) or os.curdir)
+
+
+def convert(
+    inputs,
+    output_dir=None,
+    jobs=None,
+    overwrite=False,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    out=None,
+):
+    """Converts SNIRF files to NWB files in parallel
+
+    Each file is converted in a separate process of a pool. A failure to convert one file,
+    including the crash of its process, is reported and does not stop or fail the
+    conversion of the others. Files whose NWB file already exists are skipped unless overwrite is True,
+    so an interrupted batch can be resumed by running it again.
+
+    Args:
+        inputs (list): the paths or glob patterns of the SNIRF files
+        output_dir (str): the directory to write the NWB files to, in the directories of
+            the input files relative to the root of their pattern (see output_path).
+            Defaults to the directory of each input file.
+        jobs (int): the number of processes. Defaults to the number of CPUs.
+        overwrite (bool): whether to convert files whose NWB file already exists
+        chunk_size (int): the number of samples copied at a time
+        out: the stream to write progress and the summary to. Defaults to sys.stdout.
+
+    Returns:
+        list: the result of each file, as returned by convert_file, with a status of
+            "skipped" for skipped files. The throughput in the summary is that of the
+            time series data converted.
+
+    Raises:
+        ValueError: if several input files would be converted to the same NWB file
+    """
+    out = sys.stdout if out is None else out
+    roots = expand_inputs(inputs)
+    targets = {
+        path: output_path(path, output_dir, root) for path, root in roots.items()
+    }
+    _check_unique_targets(targets)
+    paths = list(targets)
+    results = []
+    pending = {}
+    for path, nwb_path in targets.items():
+        if os.path.exists(nwb_path) and not overwrite:
+            results.append(
+                dict(path=path, status="skipped", bytes=0, seconds=0.0, error=None)
+            )
+            _report(len(results), len(paths), results[-1], out)
+        else:
+            os.makedirs(os.path.dirname(nwb_path), exist_ok=True)
+            pending[path] = nwb_path
+
+    start = time.perf_counter()
+    for result in _convert_pending(pending, jobs, chunk_size):
+        results.append(result)
+        _report(len(results), len(paths), result, out)
+    elapsed = time.perf_counter() - start
+
+    counts = {
+        status: sum(result["status"] == status for result in results)
+        for status in ("converted", "skipped", "failed")
+    }
+    megabytes = sum(result["bytes"] for result in results) / 1e6
+    throughput = megabytes / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{counts['converted']} converted, {counts['skipped']} skipped,"
+        f" {counts['failed']} failed: {megabytes:.1f} MB in {elapsed:.1f} s"
+        f" ({throughput:.1f} MB/s)",
+        file=out,
+        flush=True,
+    )
+    return results
+
+
+def _convert_pending(pending, jobs, chunk_size):
+    """Converts files in a pool of processes and yields the result of each file
+
+    If a process crashes, e.g. it is killed, the pool breaks and the conversions which
+    did not complete fail with a BrokenProcessPool error, whichever file caused it.
+    These files are then converted again one at a time, each in a process of its own,
+    so that only the file whose process crashes again fails.
+
+    Args:
+        pending (dict): the path of the NWB file of each SNIRF file to convert
+        jobs (int): the number of processes
+        chunk_size (int): the number of samples copied at a time
+    """
+    unfinished = dict(pending)
+    if unfinished:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(convert_file, path, nwb_path, chunk_size): path
+                for path, nwb_path in pending.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    continue
+                del unfinished[futures[future]]
+                yield result
+    for path, nwb_path in unfinished.items():
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(convert_file, path, nwb_path, chunk_size)
+            try:
+                result = future.result()
+            except BrokenProcessPool as error:
+                # the process converting the file crashed before removing its output
+                partial_path = nwb_path + PARTIAL_SUFFIX
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                result = dict(
+                    path=path,
+                    status="failed",
+                    bytes=0,
+                    seconds=0.0,
+                    error=f"{type(error).__name__}: {error}",
+                )
+        yield result
+
+
+def _check_unique_targets(targets):
+    """Raises a ValueError if several inputs have the same NWB file"""
+    inputs = {}
+    for path, nwb_path in targets.items():
+        inputs.setdefault(nwb_path, []).append(path)
+    duplicates = {
+        nwb_path: paths for nwb_path, paths in inputs.items() if len(paths) > 1
+    }
+    if duplicates:
+        nwb_path, paths = next(iter(duplicates.items()))
+        msg = (
+            f"{len(duplicates)} NWB files would be converted from several inputs, e.g."
+            f" {nwb_path} from {', '.join(paths)}"
+        )
+        raise ValueError(msg)
+
+
+def _report(done, total, result, out):
+    line = f"[{done}/{total}] {result['status']} {result['path']}"
+    if result["status"] == "converted":
+        megabytes = result["bytes"] / 1e6
+        line += f" ({megabytes:.1f} MB in {result['seconds']:.1f} s)"
+    elif result["status"] == "failed":
+        line += f": {result['error']}"
+    print(line, file=out, flush=True)
+
+
+def main(argv=None):
+    """Entry point of the ndx-nirs-convert command"""
+    parser = argparse.ArgumentParser(
+        prog="ndx-nirs-convert",
+        description="Convert SNIRF files to NWB files with a NIRSDevice and NIRSSeries.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="SNIRF files or glob patterns, e.g. 'data/**/*.snirf'"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        help=(
+            "directory to write the NWB files to, in the subdirectories of the inputs"
+            " below the directory of their pattern (default: next to each input file)"
+        ),
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of files to convert in parallel (default: the number of CPUs)",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="convert files whose NWB file already exists instead of skipping them",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"number of samples copied at a time (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        results = convert(
+            args.inputs,
+            output_dir=args.output_dir,
+            jobs=args.jobs,
+            overwrite=args.overwrite,
+            chunk_size=args.chunk_size,
+        )
+    except ValueError as error:
+        parser.error(str(error))
+    return 1 if any(result["status"] == "failed" for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
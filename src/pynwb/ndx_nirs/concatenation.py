@@ -0,0 +1,258 @@
+import numpy as np
+from hdmf.common import DynamicTableRegion
+from hdmf.data_utils import DataIO, GenericDataChunkIterator
+
+from ndx_nirs.layout import series_data_shape
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE
+
+# the TimeSeries fields which must be equal for series to be concatenated
+_MATCHING_FIELDS = ("unit", "conversion", "resolution", "offset")
+
+# relative tolerance, in samples, for deciding that regularly sampled runs are adjacent
+_SAMPLE_TOLERANCE = 1e-6
+
+
+def concatenate_series(
+    series,
+    name,
+    description=None,
+    time_offsets=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """Concatenates several NIRSSeries recorded with the same channels into one series
+
+    The data of the new series is copied from the data of the runs one chunk at a time
+    when it is written, so the runs are never loaded into memory at once. They need to
+    remain readable until then, e.g. by writing the new series to a file while the files
+    the runs were read from are open.
+
+    The runs must have the same channels, i.e. their channels regions must reference the
+    same rows of NIRSChannelsTables with equal values (and equal source and detector
+    labels and positions), as well as the same unit, conversion, resolution and offset.
+    The new series references the NIRSChannelsTable of the first run.
+
+    The times of each run, shifted by its time offset, must start after the end of the
+    previous run. If the runs are regularly sampled at the same rate and each starts one
+    sample after the end of the previous one, the new series has a rate and starting
+    time. Otherwise, its timestamps are the times of all runs, copied chunk by chunk
+    like the data.
+
+    Args:
+        series (list): the NIRSSeries to concatenate, in order
+        name (str): the name of the new series
+        description (str): the description of the new series. Defaults to a
+            description listing the names of the runs.
+        time_offsets (list): the time in seconds to add to the times of each run, e.g.
+            to place runs which each start at time 0 one after the other. Defaults to
+            no offsets.
+        chunk_size (int): the number of samples copied at a time, which is also the
+            number of samples in each chunk of the new datasets
+
+    Returns:
+        NIRSSeries: the concatenated series
+
+    Raises:
+        ValueError: if the runs cannot be concatenated
+
+    Example:
+    ```python
+    with NWBHDF5IO(path, "a") as io:
+        nwbfile = io.read()
+        runs = [nwbfile.acquisition[f"run{index}"] for index in range(1, 4)]
+        nwbfile.add_acquisition(concatenate_series(runs, name="nirs_data"))
+        io.write(nwbfile)
+    ```
+    """
+    from ndx_nirs import NIRSSeries
+
+    series = list(series)
+    if not series:
+        raise ValueError("at least one NIRSSeries is needed")
+    if time_offsets is None:
+        time_offsets = [0.0] * len(series)
+    if len(time_offsets) != len(series):
+        msg = f"{len(time_offsets)} time offsets were given for {len(series)} series"
+        raise ValueError(msg)
+
+    first = series[0]
+    shape, dtype = series_data_shape(first.data)
+    channels = _channel_values(first.channels)
+    for run in series[1:]:
+        for field in _MATCHING_FIELDS:
+            if getattr(run, field, None) != getattr(first, field, None):
+                msg = f"{run.name} has a different {field} than {first.name}"
+                raise ValueError(msg)
+        run_shape, run_dtype = series_data_shape(run.data)
+        if run_shape[1:] != shape[1:] or np.dtype(run_dtype) != np.dtype(dtype):
+            msg = (
+                f"{run.name} has data of shape {run_shape} and dtype {run_dtype}, which"
+                f" cannot be concatenated with data of shape {shape} and dtype {dtype}"
+            )
+            raise ValueError(msg)
+        if not _equal_values(_channel_values(run.channels), channels):
+            msg = f"{run.name} does not have the same channels as {first.name}"
+            raise ValueError(msg)
+
+    times = [_times(run) for run in series]
+    previous_end = None
+    for run, run_times, offset in zip(series, times, time_offsets):
+        if len(run_times) == 0:
+            continue
+        start = float(run_times[0]) + offset
+        if previous_end is not None and start <= previous_end:
+            msg = (
+                f"{run.name} starts at {start} s, before the end of the previous series"
+                f" at {previous_end} s: give time_offsets to shift the series in time"
+            )
+            raise ValueError(msg)
+        previous_end = float(run_times[len(run_times) - 1]) + offset
+
+    timing = _regular_timing(series, time_offsets)
+    if timing is None:
+        timing = dict(
+            timestamps=_ConcatenatedIterator(
+                times, offsets=time_offsets, chunk_size=chunk_size
+            )
+        )
+    return NIRSSeries(
+        name=name,
+        description=(
+            description
+            or f"The concatenation of {', '.join(run.name for run in series)}."
+        ),
+        channels=DynamicTableRegion(
+            name="channels",
+            description=first.channels.description,
+            table=first.channels.table,
+            data=np.asarray(first.channels.data[:]).tolist(),
+        ),
+        data=_ConcatenatedIterator([run.data for run in series], chunk_size=chunk_size),
+        unit=first.unit,
+        conversion=first.conversion,
+        resolution=first.resolution,
+        offset=first.offset,
+        **timing,
+    )
+
+
+class _ConcatenatedIterator(GenericDataChunkIterator):
+    """Iterates over the concatenation of several arrays or datasets along their first
+    axis, reading only the part of each one needed for each block
+
+    Args:
+        sources (list): the arrays or datasets, which must have the same trailing shape
+            and dtype
+        offsets (list): a value to add to the values of each source, or None
+        chunk_size (int): the number of elements along the first axis of each block
+        **kwargs: additional arguments to GenericDataChunkIterator, e.g.
+            display_progress
+    """
+
+    def __init__(self, sources, offsets=None, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+        self.sources = []
+        for source in sources:
+            if isinstance(source, DataIO):
+                source = source.data
+            if isinstance(source, (list, tuple)):
+                source = np.asarray(source)
+            self.sources.append(source)
+        self.offsets = offsets
+        self.bounds = np.cumsum([0] + [len(source) for source in self.sources])
+        maxshape = self._get_maxshape()
+        shape = (min(chunk_size, max(maxshape[0], 1)), *maxshape[1:])
+        super().__init__(buffer_shape=shape, chunk_shape=shape, **kwargs)
+
+    def _get_data(self, selection):
+        start, stop = selection[0].start, selection[0].stop
+        pieces = []
+        for index, source in enumerate(self.sources):
+            first, last = self.bounds[index], self.bounds[index + 1]
+            if last <= start or first >= stop:
+                continue
+            local = slice(max(start, first) - first, min(stop, last) - first)
+            piece = np.asarray(source[(local, *selection[1:])])
+            if self.offsets is not None and self.offsets[index]:
+                piece = piece + self.offsets[index]
+            pieces.append(piece)
+        return np.concatenate(pieces)
+
+    def _get_maxshape(self):
+        return (int(self.bounds[-1]), *self.sources[0].shape[1:])
+
+    def _get_dtype(self):
+        return np.dtype(self.sources[0].dtype)
+
+
+class _RegularTimes:
+    """The times of the samples of a regularly sampled series, computed when sliced"""
+
+    def __init__(self, starting_time, rate, n_samples):
+        self.starting_time = starting_time
+        self.rate = rate
+        self.shape = (n_samples,)
+        self.dtype = np.dtype("float64")
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            (index,) = index
+        if isinstance(index, slice):
+            samples = np.arange(*index.indices(self.shape[0]))
+        else:
+            samples = np.arange(self.shape[0])[index]
+        return self.starting_time + samples / self.rate
+
+
+def _times(series):
+    """Returns the timestamps of a series, or its sample times computed from its rate"""
+    if series.timestamps is not None:
+        timestamps = series.timestamps
+        return timestamps.data if isinstance(timestamps, DataIO) else timestamps
+    return _RegularTimes(series.starting_time or 0.0, series.rate, len(series.data))
+
+
+def _regular_timing(series, time_offsets):
+    """Returns the rate and starting time of the concatenation of regularly sampled runs
+    which follow each other without gaps, or None
+    """
+    if any(run.timestamps is not None for run in series):
+        return None
+    rate = series[0].rate
+    if any(run.rate != rate for run in series):
+        return None
+    starting_time = (series[0].starting_time or 0.0) + time_offsets[0]
+    expected = starting_time
+    for run, offset in zip(series, time_offsets):
+        start = (run.starting_time or 0.0) + offset
+        if abs(start - expected) * rate > _SAMPLE_TOLERANCE:
+            return None
+        expected = start + len(run.data) / rate
+    return dict(rate=rate, starting_time=starting_time)
+
+
+def _channel_values(region):
+    """Returns the values of the channels referenced by a region, with the label and
+    position of their source and detector instead of row indices
+    """
+    table = region.table
+    rows = np.asarray(region.data[:], dtype=np.int64)
+    values = {"rows": rows}
+    for column in table.colnames:
+        if column in ("source", "detector"):
+            optodes = table[column].table
+            optode_rows = np.asarray(table[column].data[:], dtype=np.int64)[rows]
+            values[f"{column}_label"] = np.asarray(optodes.label[:])[optode_rows]
+        else:
+            values[column] = np.asarray(table[column].data[:])[rows]
+    geometry = table.geometry
+    values["source_positions"] = geometry.source_positions[rows]
+    values["detector_positions"] = geometry.detector_positions[rows]
+    return values
+
+
+def _equal_values(values, other):
+    return values.keys() == other.keys() and all(
+        np.array_equal(values[key], other[key]) for key in values
+    )
@@ -0,0 +1,117 @@
+import h5py
+import numpy as np
+from hdmf.common import EnumData, VectorData
+from hdmf.utils import StrDataset
+
+# the dtypes which row indices are written with, smallest first. The spec dtype of the
+# regions is int, which the validator only accepts as 32- or 64-bit signed integers.
+INDEX_DTYPES = (np.int32, np.int64)
+
+# the dtypes which dictionary codes are written with, smallest first. The spec dtype of
+# an EnumData is uint8, which the validator accepts as any unsigned integer.
+CODE_DTYPES = (np.uint8, np.uint16, np.uint32, np.uint64)
+
+# the columns of a NIRSChannelsTable which are dictionary-encoded in compact tables
+ENCODED_COLUMNS = ("source_wavelength", "emission_wavelength")
+
+# the suffix of the name of the column holding the distinct values of an encoded column
+ELEMENTS_SUFFIX = "_elements"
+
+
+def compact_index_dtype(indices, dtypes=INDEX_DTYPES):
+    """Returns the smallest of the dtypes which holds all of the row indices
+
+    Args:
+        indices (array_like): non-negative row indices
+        dtypes (tuple): the integer dtypes to choose from, smallest first
+
+    Returns:
+        numpy.dtype: one of the dtypes, int32 or int64 by default
+    """
+    indices = np.asarray(indices)
+    largest = int(indices.max()) if indices.size else 0
+    for dtype in dtypes:
+        if largest <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    msg = f"row index {largest} does not fit in any of the index dtypes"
+    raise ValueError(msg)
+
+
+def encode_labels(labels):
+    """Returns labels as an array of fixed-length UTF-8 strings, as long as the longest
+    encoded label
+
+    Fixed-length strings are stored inline in HDF5 datasets, so they are read in a single
+    contiguous read instead of one heap lookup per label.
+
+    Args:
+        labels (array_like): the labels, as str
+
+    Returns:
+        numpy.ndarray: the UTF-8 encoded labels, with an h5py fixed-length string dtype
+    """
+    encoded = np.char.encode(np.asarray(labels, dtype=str), "utf-8")
+    return encoded.astype(h5py.string_dtype("utf-8", max(encoded.dtype.itemsize, 1)))
+
+
+def encode_values(values):
+    """Dictionary-encodes values with few distinct values
+
+    Args:
+        values (array_like): the values to encode
+
+    Returns:
+        tuple: the index of each value into the distinct values, as an array of the
+            smallest of the CODE_DTYPES which holds them, and the sorted distinct values
+    """
+    elements, codes = np.unique(np.asarray(values), return_inverse=True)
+    codes = codes.reshape(-1)
+    return codes.astype(compact_index_dtype(codes, CODE_DTYPES)), elements
+
+
+def decode_columns(columns):
+    """Replaces the dictionary-encoded and encoded label columns of a table read from a
+    file by columns with the values they encode
+
+    The codes and distinct values of an encoded column are read at once and replaced by
+    a VectorData of the values, and the column of distinct values is dropped. Datasets of
+    encoded labels are wrapped so that they are read as str instead of bytes.
+
+    Args:
+        columns (list): the columns passed to the constructor of the table
+
+    Returns:
+        tuple: the decoded columns, and whether any column was decoded
+    """
+    elements = {
+        column.elements.name for column in columns if isinstance(column, EnumData)
+    }
+    decoded, changed = [], False
+    for column in columns:
+        if column.name in elements:
+            changed = True
+            continue
+        if isinstance(column, EnumData):
+            codes = np.asarray(column.data[:], dtype=np.int64)
+            column = VectorData(
+                name=column.name,
+                description=column.description,
+                data=np.asarray(column.elements.data[:])[codes],
+            )
+            changed = True
+        elif _is_encoded_text(column.data):
+            column.transform(lambda data: StrDataset(data, "utf-8"))
+            changed = True
+        decoded.append(column)
+    return decoded, changed
+
+
+def _is_encoded_text(data):
+    """Returns whether data is a dataset of a file holding encoded labels"""
+    if isinstance(data, h5py.Dataset):
+        return (
+            data.dtype.kind == "S" and h5py.check_string_dtype(data.dtype) is not None
+        )
+    # Zarr stores the fixed-length strings as variable-length bytes
+    attrs = getattr(data, "attrs", None)
+    return attrs is not None and attrs.get("zarr_dtype") == "bytes_"
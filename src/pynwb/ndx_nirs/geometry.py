@@ -0,0 +1,80 @@
+import numpy as np
+
+from ndx_nirs.indexing import ChannelIndex
+
+# the default source-detector distance in meters below which a channel is considered a
+# short-separation channel
+DEFAULT_SHORT_CHANNEL_DISTANCE = 0.015
+
+
+class ChannelGeometry:
+    """The positions of the optodes of every channel of a NIRSChannelsTable
+
+    The x, y and (if both optode tables have it) z coordinates of the source and detector
+    of all channels are gathered at once, and the source-detector distances and midpoints
+    are computed from them in a vectorized way. All arrays are read-only and are indexed
+    by the rows of the NIRSChannelsTable.
+
+    Attributes:
+        source_positions (numpy.ndarray): the (channels, dims) positions in meters of the
+            source of each channel, where dims is 3 if both optode tables have a z
+            column and 2 otherwise
+        detector_positions (numpy.ndarray): the (channels, dims) positions in meters of the
+            detector of each channel
+        distances (numpy.ndarray): the source-detector distance in meters of each channel
+        midpoints (numpy.ndarray): the (channels, dims) positions in meters of the
+            midpoint between the source and detector of each channel
+
+    A geometry is a snapshot of the tables when it was built. Use
+    NIRSChannelsTable.geometry to get a geometry which is rebuilt when rows are added to
+    the channels, sources or detectors tables or when either referenced table is
+    replaced.
+    """
+
+    def __init__(self, channels):
+        """Computes the geometry of a NIRSChannelsTable"""
+        self.signature = self.signature_of(channels)
+        sources, detectors = channels.source.table, channels.detector.table
+        if sources is None or detectors is None:
+            msg = f"{channels.name} needs both a sources and a detectors table"
+            raise ValueError(msg)
+        axes = ["x", "y"]
+        if "z" in sources.colnames and "z" in detectors.colnames:
+            axes.append("z")
+        self.source_positions = _positions(sources, axes)[
+            np.asarray(channels.source.data[:], dtype=np.int64)
+        ]
+        self.detector_positions = _positions(detectors, axes)[
+            np.asarray(channels.detector.data[:], dtype=np.int64)
+        ]
+        self.distances = np.linalg.norm(
+            self.detector_positions - self.source_positions, axis=1
+        )
+        self.midpoints = (self.source_positions + self.detector_positions) / 2
+        for array in (
+            self.source_positions,
+            self.detector_positions,
+            self.distances,
+            self.midpoints,
+        ):
+            array.flags.writeable = False
+
+    @staticmethod
+    def signature_of(channels):
+        """Returns a value which changes when the rows or tables of the geometry would
+        change
+        """
+        return ChannelIndex.signature_of(channels)
+
+    def short_channel_mask(self, threshold=DEFAULT_SHORT_CHANNEL_DISTANCE):
+        """Returns a boolean mask of the channels with a source-detector distance below
+        threshold, in meters
+        """
+        return self.distances < threshold
+
+
+def _positions(table, axes):
+    """Returns the (rows, len(axes)) array of the coordinates of an optode table"""
+    return np.stack(
+        [np.asarray(table[axis].data[:], dtype=np.float64) for axis in axes], axis=1
+    ).reshape(len(table), len(axes))
@@ -0,0 +1,137 @@
+from itertools import combinations
+
+import numpy as np
+
+CHANNEL_KEY_FIELDS = ("source", "detector", "source_wavelength")
+
+
+class ChannelIndex:
+    """A lookup index from (source, detector, source_wavelength) keys to channel rows
+
+    The index maps every full key, and every partial key made of a subset of the key
+    fields, to the array of matching row indices in the NIRSChannelsTable, so that
+    lookups are O(1) instead of a scan over the table columns. Sources and detectors
+    can be given either as row indices or as labels.
+
+    An index is a snapshot of the table when it was built. Use
+    NIRSChannelsTable.channel_index to get an index which is rebuilt when rows are
+    added to the channels, sources or detectors tables or when either referenced
+    table is replaced.
+    """
+
+    def __init__(self, channels):
+        """Builds the index for a NIRSChannelsTable"""
+        self.signature = self.signature_of(channels)
+        key_columns = {
+            "source": np.asarray(channels.source.data[:], dtype=np.int64),
+            "detector": np.asarray(channels.detector.data[:], dtype=np.int64),
+            "source_wavelength": np.asarray(
+                channels.source_wavelength.data[:], dtype=np.float64
+            ),
+        }
+        self._labels = {
+            "source": _label_lookup(channels.source.table),
+            "detector": _label_lookup(channels.detector.table),
+        }
+        self._rows = {
+            fields: _group_rows([key_columns[field] for field in fields])
+            for n_fields in range(1, len(CHANNEL_KEY_FIELDS) + 1)
+            for fields in combinations(CHANNEL_KEY_FIELDS, n_fields)
+        }
+
+    @staticmethod
+    def signature_of(channels):
+        """Returns a value which changes when the rows or tables indexed would change"""
+        sources, detectors = channels.source.table, channels.detector.table
+        return (
+            len(channels),
+            id(sources),
+            len(sources) if sources is not None else 0,
+            id(detectors),
+            len(detectors) if detectors is not None else 0,
+        )
+
+    def find(self, source=None, detector=None, source_wavelength=None):
+        """Returns the rows of the channels matching all of the given key fields
+
+        Args:
+            source (int or str): the row index or label of the source
+            detector (int or str): the row index or label of the detector
+            source_wavelength (float): the source wavelength in nm
+
+        Returns:
+            numpy.ndarray: the read-only, sorted array of matching row indices. If no key
+                fields are given, all rows are returned.
+        """
+        given = dict(
+            source=source, detector=detector, source_wavelength=source_wavelength
+        )
+        fields = tuple(
+            field for field in CHANNEL_KEY_FIELDS if given[field] is not None
+        )
+        if not fields:
+            return np.arange(self.signature[0])
+        key = tuple(self._resolve(field, given[field]) for field in fields)
+        return self._rows[fields].get(key, _NO_ROWS)
+
+    def get(self, source, detector, source_wavelength):
+        """Returns the row of the single channel with the given full key
+
+        Raises:
+            KeyError: if there is no channel, or more than one channel, with the key
+        """
+        rows = self.find(source, detector, source_wavelength)
+        if len(rows) != 1:
+            msg = (
+                f"{len(rows)} channels found for source={source!r}, detector={detector!r}"
+                f" and source_wavelength={source_wavelength!r}, expected exactly one"
+            )
+            raise KeyError(msg)
+        return int(rows[0])
+
+    def _resolve(self, field, value):
+        if field == "source_wavelength":
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return self._labels[field][value]
+            except KeyError:
+                msg = f"no {field} with label {value!r}"
+                raise KeyError(msg) from None
+        return int(value)
+
+
+_NO_ROWS = np.array([], dtype=np.int64)
+_NO_ROWS.flags.writeable = False
+
+
+def _label_lookup(table):
+    """Returns a dict from each label in an optode table to its row index"""
+    if table is None:
+        return {}
+    return {label: row for row, label in enumerate(table.label[:])}
+
+
+def _group_rows(columns):
+    """Groups row indices by the tuple of values in the given key columns
+
+    Returns:
+        dict: a map from each distinct key tuple to the sorted, read-only array of row
+            indices with that key
+    """
+    if len(columns[0]) == 0:
+        return {}
+    # lexsort is stable and sorts by the last column first, so within each group the
+    # row indices stay in ascending order
+    order = np.lexsort(columns[::-1])
+    sorted_columns = [column[order] for column in columns]
+    is_start = np.zeros(len(order), dtype=bool)
+    is_start[0] = True
+    for column in sorted_columns:
+        is_start[1:] |= column[1:] != column[:-1]
+    starts = np.flatnonzero(is_start)
+    keys = zip(*(column[starts].tolist() for column in sorted_columns))
+    groups = np.split(order, starts[1:])
+    for group in groups:
+        group.flags.writeable = False
+    return dict(zip(keys, groups))
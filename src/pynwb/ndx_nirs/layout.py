@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from hdmf.backends.hdf5 import H5DataIO
+from hdmf.utils import get_data_shape
+
+
+@dataclass(frozen=True)
+class LayoutPreset:
+    """A chunking and compression layout for the (time, channels) data of a NIRSSeries
+
+    Attributes:
+        name (str): the name of the preset
+        chunk_bytes (int): the target size in bytes of each uncompressed chunk
+        chunk_channels (int): the maximum number of channels in each chunk, or None for all
+            channels
+        compression (str): the HDF5 compression filter, or None for no compression
+        compression_opts: the options of the compression filter, e.g. the gzip level
+        shuffle (bool): whether to apply the HDF5 shuffle filter before compression
+    """
+
+    name: str
+    chunk_bytes: int
+    chunk_channels: Optional[int]
+    compression: Optional[str]
+    compression_opts: Optional[int]
+    shuffle: bool
+
+    def chunk_shape(self, n_samples, n_channels, itemsize):
+        """Returns the chunk shape for data with the given shape and item size
+
+        Args:
+            n_samples (int): the number of samples, or None if the data will be extended
+            n_channels (int): the number of channels
+            itemsize (int): the size in bytes of one data element
+
+        Returns:
+            tuple: the (samples, channels) shape of each chunk
+        """
+        n_channels = max(n_channels, 1)
+        channels = n_channels
+        if self.chunk_channels is not None:
+            channels = min(self.chunk_channels, n_channels)
+        samples = max(self.chunk_bytes // (channels * itemsize), 1)
+        if n_samples is not None:
+            samples = min(samples, max(n_samples, 1))
+        return samples, channels
+
+    def dataset_kwargs(self, shape, dtype):
+        """Returns the chunks, compression, compression_opts and shuffle options of this
+        preset for a dataset with the given (time, channels) shape and dtype, as accepted
+        by H5DataIO and h5py.Group.create_dataset
+        """
+        n_samples, n_channels = shape
+        return dict(
+            chunks=self.chunk_shape(n_samples, n_channels, np.dtype(dtype).itemsize),
+            compression=self.compression,
+            compression_opts=self.compression_opts,
+            shuffle=self.shuffle,
+        )
+
+
+LAYOUT_PRESETS = {
+    preset.name: preset
+    for preset in (
+        # per-channel analyses read all samples of a few channels: each chunk holds a
+        # long stretch of a single channel
+        LayoutPreset(
+            name="channel-major",
+            chunk_bytes=1024 * 1024,
+            chunk_channels=1,
+            compression="gzip",
+            compression_opts=4,
+            shuffle=True,
+        ),
+        # time-window plotting reads all channels for a short span: each chunk holds a
+        # short stretch of all channels, compressed with the fastest gzip level
+        LayoutPreset(
+            name="time-major",
+            chunk_bytes=256 * 1024,
+            chunk_channels=None,
+            compression="gzip",
+            compression_opts=1,
+            shuffle=True,
+        ),
+        # a compromise between the two access patterns
+        LayoutPreset(
+            name="balanced",
+            chunk_bytes=512 * 1024,
+            chunk_channels=16,
+            compression="gzip",
+            compression_opts=2,
+            shuffle=True,
+        ),
+    )
+}
+
+
+def layout_data_io(data, layout="balanced", maxshape=None):
+    """Wraps NIRSSeries data in an H5DataIO with the chunking and compression of a preset
+
+    Args:
+        data (array_like or AbstractDataChunkIterator): the (time, channels) data
+        layout (str or LayoutPreset): the name of one of the LAYOUT_PRESETS
+            ("channel-major", "time-major" or "balanced") or a custom LayoutPreset
+        maxshape (tuple): the maximum shape of the dataset, e.g. (None, n_channels) for
+            data which will be extended along time
+
+    Returns:
+        H5DataIO: the wrapped data, to be passed as the data of a NIRSSeries
+
+    Example:
+    ```python
+    series = NIRSSeries(
+        name="nirs_data",
+        data=layout_data_io(data, "channel-major"),
+        ...
+    )
+    ```
+    """
+    layout = get_layout_preset(layout)
+    shape, dtype = series_data_shape(data)
+    n_samples = shape[0] if maxshape is None else maxshape[0]
+    return H5DataIO(
+        data=data,
+        maxshape=maxshape,
+        **layout.dataset_kwargs((n_samples, shape[1]), dtype),
+    )
+
+
+def get_layout_preset(layout):
+    """Returns the LayoutPreset named layout, or layout itself if it is a LayoutPreset"""
+    if isinstance(layout, str):
+        try:
+            return LAYOUT_PRESETS[layout]
+        except KeyError:
+            msg = f"unknown layout {layout!r}, expected one of {list(LAYOUT_PRESETS)}"
+            raise ValueError(msg) from None
+    return layout
+
+
+def series_data_shape(data):
+    """Returns the shape and dtype of NIRSSeries data, which must be 2D"""
+    shape = get_data_shape(data)
+    if shape is None or len(shape) != 2:
+        msg = f"NIRSSeries data must be 2D (time, channels), not of shape {shape}"
+        raise ValueError(msg)
+    dtype = getattr(data, "dtype", None)
+    if dtype is None:
+        dtype = np.asarray(data[:1]).dtype
+    return shape, dtype
@@ -0,0 +1,431 @@
+import queue
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+# the number of blocks of samples held by the ring buffer of a LiveIngest by default
+DEFAULT_WINDOW_BLOCKS = 8
+
+# the header of a frame sent to a SocketSource: the wall-clock time in seconds at which
+# the frame was acquired, and the number of samples of the frame
+FRAME_HEADER = struct.Struct("<dI")
+
+# the dtype of the timestamp and channel values of each sample of a frame
+FRAME_DTYPE = np.dtype("<f8")
+
+
+class QueueSource:
+    """Receives packets of samples put on a queue by an acquisition thread of the same
+    process, e.g. the callback of a device driver
+
+    Packets are put without blocking the acquisition thread: when the queue is full,
+    the packet is dropped and its samples are counted in dropped_samples.
+
+    Example:
+    ```python
+    source = QueueSource(maxsize=64)
+    device.on_samples(lambda data, timestamps: source.put(data, timestamps))
+    ```
+    """
+
+    def __init__(self, maxsize=0):
+        """
+        Args:
+            maxsize (int): the number of packets the queue holds, or 0 for no limit
+        """
+        self.queue = queue.Queue(maxsize)
+        self.dropped_samples = 0
+
+    def put(self, data, timestamps=None, acquired=None):
+        """Queues a packet of samples
+
+        Args:
+            data (array_like): a (n_samples, n_channels) array, or a single sample of
+                shape (n_channels,)
+            timestamps (array_like): the timestamp in seconds of each sample, or None
+            acquired (float): the wall-clock time (time.time()) at which the samples were
+                acquired, or None for now
+        """
+        acquired = time.time() if acquired is None else acquired
+        try:
+            self.queue.put_nowait((data, timestamps, acquired))
+        except queue.Full:
+            self.dropped_samples += len(np.atleast_2d(data))
+
+    def close(self):
+        """Ends the stream: read raises EOFError once the queued packets are read"""
+        self.queue.put(None)
+
+    def read(self, timeout):
+        """Returns the next packet as (data, timestamps, acquired), or None if none arrived
+        within timeout seconds. Raises EOFError at the end of the stream.
+        """
+        try:
+            packet = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if packet is None:
+            raise EOFError("the queue was closed")
+        return packet
+
+
+class SocketSource:
+    """Receives frames of samples sent over a connected stream socket, e.g. by a device
+    bridge process on the same machine
+
+    Each frame is a FRAME_HEADER, with the wall-clock time at which the frame was acquired
+    and its number of samples, followed by the timestamp and the value of each channel of
+    every sample as little-endian float64, see pack_frame. The stream ends when the peer
+    closes the connection.
+    """
+
+    def __init__(self, sock, n_channels):
+        """
+        Args:
+            sock (socket.socket): a connected stream socket
+            n_channels (int): the number of channels of each sample
+        """
+        self.socket = sock
+        self.n_channels = n_channels
+        self._buffer = bytearray()
+
+    def read(self, timeout):
+        """Returns the next frame as (data, timestamps, acquired), or None if no complete
+        frame arrived within timeout seconds. Raises EOFError at the end of the stream.
+        """
+        self.socket.settimeout(timeout)
+        while True:
+            frame = self._frame()
+            if frame is not None:
+                return frame
+            try:
+                received = self.socket.recv(1 << 16)
+            except socket.timeout:
+                return None
+            if not received:
+                raise EOFError("the connection was closed")
+            self._buffer += received
+
+    def _frame(self):
+        """Returns the first frame of the buffer and removes it, or None if incomplete"""
+        if len(self._buffer) < FRAME_HEADER.size:
+            return None
+        acquired, n_samples = FRAME_HEADER.unpack_from(self._buffer)
+        shape = (n_samples, self.n_channels + 1)
+        size = FRAME_HEADER.size + shape[0] * shape[1] * FRAME_DTYPE.itemsize
+        if len(self._buffer) < size:
+            return None
+        values = np.frombuffer(
+            self._buffer, FRAME_DTYPE, shape[0] * shape[1], FRAME_HEADER.size
+        ).reshape(shape)
+        values = values.astype(np.float64)
+        del self._buffer[:size]
+        return values[:, 1:], values[:, 0], acquired
+
+
+def pack_frame(data, timestamps, acquired=None):
+    """Returns the bytes of a frame of samples to send to a SocketSource
+
+    Args:
+        data (array_like): a (n_samples, n_channels) array
+        timestamps (array_like): the timestamp in seconds of each sample
+        acquired (float): the wall-clock time (time.time()) at which the samples were
+            acquired, or None for now
+
+    Returns:
+        bytes: the frame
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=FRAME_DTYPE))
+    timestamps = np.asarray(timestamps, dtype=FRAME_DTYPE).reshape(-1, 1)
+    acquired = time.time() if acquired is None else acquired
+    header = FRAME_HEADER.pack(acquired, len(data))
+    return header + np.hstack([timestamps, data]).tobytes()
+
+
+@dataclass(frozen=True)
+class IngestStats:
+    """The counters of a LiveIngest
+
+    The latencies are measured from the acquisition time of each sample, as given by its
+    source, to when it was available in the ring buffer (receive) or flushed to the file
+    (flush), in seconds. They are None until a sample is received or flushed.
+
+    Attributes:
+        received_samples (int): the samples received from the source
+        flushed_samples (int): the samples written to the series and flushed to disk
+        dropped_samples (int): the samples which were not written, because the source
+            dropped them or they were overwritten in the ring buffer before being flushed
+        buffered_samples (int): the received samples waiting to be flushed
+        receive_latency_mean (float): the mean latency of the received samples
+        receive_latency_max (float): the largest latency of the received samples
+        flush_latency_mean (float): the mean end-to-end latency of the flushed samples
+        flush_latency_max (float): the largest end-to-end latency of the flushed samples
+    """
+
+    received_samples: int
+    flushed_samples: int
+    dropped_samples: int
+    buffered_samples: int
+    receive_latency_mean: float = None
+    receive_latency_max: float = None
+    flush_latency_mean: float = None
+    flush_latency_max: float = None
+
+    def as_dict(self):
+        """Returns the counters as a dict, e.g. to serialize them to JSON"""
+        return dict(self.__dict__)
+
+
+class LiveIngest:
+    """Receives samples from a live source into a ring buffer, and writes them to a
+    NIRSSeries in the background
+
+    A receiving thread reads packets of samples from the source and copies them into a
+    preallocated ring buffer holding the most recent window samples, which latest reads
+    without touching the file. A flushing thread takes the samples from the ring buffer
+    in blocks of block_size samples, appends them to the series with a NIRSSeriesWriter
+    and flushes the file, so memory stays bounded however long the recording.
+
+    If the flushing thread falls behind by more than window samples, e.g. because the
+    disk stalls, the oldest unflushed samples are overwritten and counted as dropped
+    instead of blocking the source. Their timestamps are then missing from the series,
+    so a series with a sampling rate should use a window large enough for any stall.
+
+    A source is any object with a read(timeout) method returning a packet (data,
+    timestamps, acquired), or None if no packet arrived within timeout seconds, and
+    raising EOFError at the end of the stream, e.g. a QueueSource or a SocketSource.
+
+    Example:
+    ```python
+    source = QueueSource()
+    with NIRSSeriesWriter(path, series) as writer:
+        with LiveIngest(writer, source) as ingest:
+            while recording:
+                timestamps, data = ingest.latest(500)
+                display(timestamps, data)
+        print(ingest.stats())
+    ```
+    """
+
+    def __init__(self, writer, source, block_size=None, window=None, timeout=0.1):
+        """
+        Args:
+            writer (NIRSSeriesWriter): the writer of the series to append samples to
+            source: the source of the packets of samples
+            block_size (int): the number of samples appended to the series at once, by
+                default the chunk size of the series
+            window (int): the number of samples held by the ring buffer, by default
+                DEFAULT_WINDOW_BLOCKS blocks
+            timeout (float): the longest time in seconds the receiving thread waits for
+                a packet before checking whether it is stopped
+        """
+        block_size = writer.chunk_size if block_size is None else block_size
+        window = DEFAULT_WINDOW_BLOCKS * block_size if window is None else window
+        if block_size < 1 or window < block_size:
+            msg = (
+                "block_size must be at least 1 and window at least block_size, not"
+                f" {block_size} and {window}"
+            )
+            raise ValueError(msg)
+        self.writer = writer
+        self.source = source
+        self.block_size = block_size
+        self.window = window
+        self.timeout = timeout
+        self.n_channels = writer.n_channels
+        self._data = np.empty((window, self.n_channels), writer.dtype)
+        self._timestamps = np.full((window,), np.nan)
+        self._acquired = np.empty((window,), np.float64)
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+        self._receiving = False
+        self._error = None
+        self._threads = []
+        self._received = 0
+        self._flushed = 0
+        self._overwritten = 0
+        self._written = 0
+        self._receive_latency = [0.0, 0.0]
+        self._flush_latency = [0.0, 0.0]
+
+    def start(self):
+        """Starts the receiving and flushing threads"""
+        if self._threads:
+            msg = "the ingest was already started"
+            raise RuntimeError(msg)
+        self._receiving = True
+        self._threads = [
+            threading.Thread(
+                target=self._receive, name="ndx-nirs-receive", daemon=True
+            ),
+            threading.Thread(target=self._flush, name="ndx-nirs-flush", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Waits until the source ends and every received sample is flushed
+
+        Returns:
+            bool: whether the samples were flushed before timeout seconds, if given
+        """
+        for thread in self._threads:
+            thread.join(timeout)
+        self._raise_error()
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def stop(self):
+        """Stops receiving samples, flushes the received ones and waits for the threads
+
+        The packets which the source has not delivered yet are left in the source.
+        """
+        self._stopped.set()
+        self.wait()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def latest(self, n_samples=None):
+        """Returns copies of the timestamps and data of the most recent samples received
+
+        The timestamps of samples received without timestamps are NaN.
+
+        Args:
+            n_samples (int): the number of samples, at most window, or None for window
+
+        Returns:
+            tuple: the (n,) timestamps and the (n, n_channels) data of the most recent n
+                samples, where n is n_samples or fewer if fewer were received
+        """
+        n_samples = self.window if n_samples is None else min(n_samples, self.window)
+        with self._condition:
+            n = min(n_samples, self._received)
+            rows = self._rows(self._received - n, n)
+            return self._timestamps[rows], self._data[rows]
+
+    def stats(self):
+        """Returns the counters of the ingest as an IngestStats"""
+        with self._condition:
+            receive_total, receive_max = self._receive_latency
+            flush_total, flush_max = self._flush_latency
+            return IngestStats(
+                received_samples=self._received,
+                flushed_samples=self._written,
+                dropped_samples=self._overwritten
+                + getattr(self.source, "dropped_samples", 0),
+                buffered_samples=self._received - self._flushed,
+                receive_latency_mean=(
+                    receive_total / self._received if self._received else None
+                ),
+                receive_latency_max=receive_max if self._received else None,
+                flush_latency_mean=(
+                    flush_total / self._written if self._written else None
+                ),
+                flush_latency_max=flush_max if self._written else None,
+            )
+
+    def _rows(self, start, n):
+        """Returns the indices into the ring buffer of n samples from sample start"""
+        return np.arange(start, start + n) % self.window
+
+    def _receive(self):
+        try:
+            while not self._stopped.is_set():
+                try:
+                    packet = self.source.read(self.timeout)
+                except EOFError:
+                    break
+                if packet is not None:
+                    self._push(*packet)
+        except BaseException as error:
+            self._error = error
+        finally:
+            with self._condition:
+                self._receiving = False
+                self._condition.notify_all()
+
+    def _push(self, data, timestamps, acquired):
+        """Copies a packet of samples into the ring buffer"""
+        data = np.asarray(data)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+        if data.ndim != 2 or data.shape[1] != self.n_channels:
+            msg = (
+                f"data must have shape (n_samples, {self.n_channels}), not {data.shape}"
+            )
+            raise ValueError(msg)
+        if timestamps is None:
+            if self.writer.has_timestamps:
+                msg = "timestamps are required for a series with a timestamps dataset"
+                raise ValueError(msg)
+            timestamps = np.full((len(data),), np.nan)
+        timestamps = np.atleast_1d(np.asarray(timestamps, dtype=np.float64))
+        if timestamps.shape != (len(data),):
+            msg = f"expected {len(data)} timestamps, not {timestamps.shape[0]}"
+            raise ValueError(msg)
+
+        # only the last window samples of a packet longer than the window are kept, the
+        # others are counted as overwritten
+        skipped = max(len(data) - self.window, 0)
+        data, timestamps = data[skipped:], timestamps[skipped:]
+        n = len(data)
+        latency = time.time() - acquired
+        with self._condition:
+            self._received += skipped
+            rows = self._rows(self._received, n)
+            self._data[rows] = data
+            self._timestamps[rows] = timestamps
+            self._acquired[rows] = acquired
+            self._received += n
+            self._receive_latency[0] += latency * (n + skipped)
+            self._receive_latency[1] = max(self._receive_latency[1], latency)
+            overwritten = self._received - self._flushed - self.window
+            if overwritten > 0:
+                self._overwritten += overwritten
+                self._flushed += overwritten
+            self._condition.notify_all()
+
+    def _flush(self):
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(
+                        lambda: not self._receiving
+                        or self._received - self._flushed >= self.block_size
+                    )
+                    n = min(self._received - self._flushed, self.block_size)
+                    if n == 0:
+                        break
+                    rows = self._rows(self._flushed, n)
+                    data = self._data[rows]
+                    timestamps = self._timestamps[rows]
+                    acquired = self._acquired[rows]
+                    self._flushed += n
+
+                self.writer.append(
+                    data, timestamps=timestamps if self.writer.has_timestamps else None
+                )
+                self.writer.flush()
+                latency = time.time() - acquired
+                with self._condition:
+                    self._written += n
+                    self._flush_latency[0] += float(latency.sum())
+                    self._flush_latency[1] = max(
+                        self._flush_latency[1], float(latency.max())
+                    )
+        except BaseException as error:
+            self._error = error
+            self._stopped.set()
@@ -0,0 +1,166 @@
+from contextlib import contextmanager
+from uuid import uuid4
+
+import numpy as np
+from hdmf.build import DatasetBuilder, ObjectMapper, ReferenceBuilder
+from hdmf.common.io.table import DynamicTableMap
+from hdmf.utils import docval, get_docval
+from pynwb.io.base import TimeSeriesMap
+
+from ndx_nirs.encoding import (
+    ELEMENTS_SUFFIX,
+    ENCODED_COLUMNS,
+    compact_index_dtype,
+    encode_labels,
+    encode_values,
+)
+
+
+class NIRSTableMap(DynamicTableMap):
+    """Writes the columns of a compact NIRS table in their compact representation
+
+    The label column of a table whose compact attribute is True is written as
+    fixed-length UTF-8 strings, and its wavelength columns as an EnumData of codes into
+    a column of the distinct wavelengths. The wavelengths of other tables are written as
+    floats. Only the builders of the columns are rewritten, so the containers of the
+    table keep their values.
+    """
+
+    @docval(*get_docval(ObjectMapper.build))
+    def build(self, **kwargs):
+        builder = super().build(**kwargs)
+        compact = getattr(kwargs["container"], "compact", False)
+        _encode_columns(builder, compact, self.spec.type_key())
+        return builder
+
+
+class NIRSChannelsTableMap(NIRSTableMap):
+    """Writes the source and detector columns of a NIRSChannelsTable with the smallest
+    of the INDEX_DTYPES which holds their row indices, besides its compact columns
+    """
+
+    @docval(*get_docval(ObjectMapper.__init__))
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # the distinct wavelengths of compact tables are only built from their columns
+        for name in ENCODED_COLUMNS:
+            self.unmap(self.spec.get_dataset(f"{name}{ELEMENTS_SUFFIX}"))
+
+    @docval(*get_docval(ObjectMapper.build))
+    def build(self, **kwargs):
+        table = kwargs["container"]
+        regions = [table[name] for name in ("source", "detector") if name in table]
+        with _compact_region_data(regions):
+            return super().build(**kwargs)
+
+
+class NIRSSeriesMap(TimeSeriesMap):
+    """Writes the channels region of a NIRSSeries with the smallest of the INDEX_DTYPES
+    which holds its row indices
+    """
+
+    @docval(*get_docval(ObjectMapper.build))
+    def build(self, **kwargs):
+        with _compact_region_data([kwargs["container"].channels]):
+            return super().build(**kwargs)
+
+
+def _encode_columns(builder, compact, type_key):
+    """Replaces the dataset builders of the in-memory label and wavelength columns of a
+    table builder by builders of their compact representation, if compact, or else of
+    the wavelengths as floats
+
+    The type_key is the name of the attribute holding the type of each dataset.
+    """
+    datasets = builder.datasets
+    label = datasets.get("label")
+    if compact and label is not None and _in_memory(label.data):
+        labels = encode_labels(label.data)
+        _set_dataset(builder, _replace_data(label, labels))
+    for name in ENCODED_COLUMNS:
+        column = datasets.get(name)
+        if column is None or not _in_memory(column.data):
+            continue
+        values = np.asarray(column.data)
+        if not compact:
+            if values.dtype.kind != "f":
+                _set_dataset(builder, _replace_data(column, values.astype(np.float64)))
+            continue
+        codes, values = encode_values(values)
+        elements = DatasetBuilder(
+            name=f"{name}{ELEMENTS_SUFFIX}",
+            data=values,
+            dtype=values.dtype,
+            attributes={
+                type_key: "VectorData",
+                "namespace": "hdmf-common",
+                "object_id": str(uuid4()),
+                "description": f"The distinct values of the {name} column.",
+            },
+        )
+        _set_dataset(builder, elements)
+        encoded = _replace_data(column, codes)
+        encoded.attributes.update(
+            {
+                type_key: "EnumData",
+                "namespace": "hdmf-experimental",
+                "elements": ReferenceBuilder(elements),
+            }
+        )
+        _set_dataset(builder, encoded)
+
+
+def _set_dataset(builder, dataset):
+    """Adds a dataset builder to a group builder, replacing the one with the same name"""
+    # GroupBuilder.set_dataset compares the dataset with the one it replaces, which is
+    # ambiguous for array data
+    builder.datasets.pop(dataset.name, None)
+    builder.set_dataset(dataset)
+
+
+def _replace_data(column, data):
+    """Returns a copy of a dataset builder with other data, written with its dtype"""
+    return DatasetBuilder(
+        name=column.name,
+        data=data,
+        dtype=data.dtype,
+        attributes=dict(column.attributes),
+    )
+
+
+def _in_memory(data):
+    return isinstance(data, (list, tuple, np.ndarray))
+
+
+@contextmanager
+def _compact_region_data(regions):
+    """Replaces the in-memory row indices of DynamicTableRegions by arrays of their
+    compact_index_dtype while the regions are built, and restores them afterwards
+
+    The containers keep their original data, so rows can still be appended to them and
+    the dtype is picked again, possibly wider, each time they are written. Data which is
+    not in memory, e.g. a dataset read from a file or wrapped in a DataIO, is left as is.
+    """
+    originals = []
+    try:
+        for region in regions:
+            compact = _compact_indices(region.data)
+            if compact is not None:
+                originals.append((region, region.data))
+                region.transform(lambda data, compact=compact: compact)
+        yield
+    finally:
+        for region, original in originals:
+            region.transform(lambda data, original=original: original)
+
+
+def _compact_indices(data):
+    """Returns in-memory row indices as an array of their compact_index_dtype, or None"""
+    if not isinstance(data, (list, tuple, np.ndarray)):
+        return None
+    indices = np.asarray(data)
+    if indices.size and not np.issubdtype(indices.dtype, np.integer):
+        return None
+    if indices.size and indices.min() < 0:
+        return None
+    return indices.astype(compact_index_dtype(indices))
@@ -0,0 +1,54 @@
+import h5py
+import numpy as np
+from hdmf.data_utils import DataIO
+
+# file drivers which store a dataset at its offset in a single file on disk
+_MAPPABLE_DRIVERS = ("sec2", "stdio")
+
+
+def can_memmap(dataset):
+    """Returns whether an h5py dataset is stored in a layout which can be memory-mapped
+
+    A dataset can be mapped when it is stored contiguously in a single local file, is not
+    compressed or otherwise filtered, has a fixed-size numeric dtype and has been
+    allocated in the file.
+    """
+    if not isinstance(dataset, h5py.Dataset):
+        return False
+    if dataset.chunks is not None or dataset.compression is not None:
+        return False
+    if dataset.external is not None or dataset.is_virtual:
+        return False
+    if dataset.file.driver not in _MAPPABLE_DRIVERS:
+        return False
+    if dataset.dtype.kind not in "biuf" or dataset.size == 0:
+        return False
+    return dataset.id.get_offset() is not None
+
+
+def memmap_dataset(dataset):
+    """Returns a read-only memory map of an h5py dataset, or None if it cannot be mapped
+
+    The memory map reads the dataset bytes directly from the file, so repeated access is
+    served by the operating system page cache instead of copying the data into a new
+    array on each read. The map stays valid after the h5py file is closed.
+
+    Args:
+        dataset (h5py.Dataset or DataIO): the dataset to map
+
+    Returns:
+        numpy.memmap: a read-only view of the dataset, or None if the dataset is chunked,
+            compressed, not stored in a local file or not an h5py dataset
+    """
+    if isinstance(dataset, DataIO):
+        dataset = dataset.data
+    if not can_memmap(dataset):
+        return None
+    return np.memmap(
+        dataset.file.filename,
+        mode="r",
+        dtype=dataset.dtype,
+        offset=dataset.id.get_offset(),
+        shape=dataset.shape,
+        order="C",
+    )
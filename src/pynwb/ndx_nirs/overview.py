@@ -0,0 +1,330 @@
+from dataclasses import dataclass
+
+import h5py
+import numpy as np
+from hdmf.backends.hdf5 import H5DataIO
+from hdmf.data_utils import DataIO
+
+from ndx_nirs.selection import find_sample_range, read_columns, sample_times
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE, _find_group_by_object_id
+
+# the number of samples summarized by each bin of the finest level of an overview
+DEFAULT_MIN_FACTOR = 16
+
+# the prefix of the name of the TimeSeries of each level, followed by its decimation factor
+LEVEL_PREFIX = "decimation_"
+
+
+@dataclass
+class Overview:
+    """The per-channel envelope of a NIRSSeries over a time span
+
+    Attributes:
+        factor (int): the number of samples summarized by each bin, or 1 for raw samples
+        times (numpy.ndarray): the time in seconds of the first sample of each bin
+        min (numpy.ndarray): the (bins, channels) minimum of each channel in each bin
+        max (numpy.ndarray): the (bins, channels) maximum of each channel in each bin
+        mean (numpy.ndarray): the (bins, channels) mean of each channel in each bin
+    """
+
+    factor: int
+    times: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    mean: np.ndarray
+
+
+def overview_module_name(series):
+    """Returns the name of the processing module holding the overview of a series"""
+    return f"{series.name}_overview"
+
+
+def add_overview(
+    path, series, min_factor=DEFAULT_MIN_FACTOR, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """Computes a multi-resolution min/max/mean overview of a NIRSSeries in an NWB file
+    and stores it in the same file
+
+    The overview is a pyramid of levels, each summarizing the data in bins of a
+    power-of-two number of samples, from min_factor samples up to the whole series. Each
+    level is stored as a TimeSeries named "decimation_<factor>" in a processing module
+    named "<series name>_overview", with (bins, channels, 3) data holding the minimum,
+    maximum and mean of each channel in each bin, and the rate or the bin start times
+    of the series. With the default min_factor of 16, the overview takes 3/8 of the
+    size of the data.
+
+    All levels are computed in a single pass over the data, reading chunk_size samples
+    at a time: each level is built from pairs of bins of the previous one, so only one
+    block of samples and one pending bin per level are held in memory.
+
+    Args:
+        path (str): the path of the NWB file containing the series
+        series (NIRSSeries): the series, which must have been written to the file. This
+            may also be the object_id of the series.
+        min_factor (int): the number of samples in each bin of the finest level, a power
+            of two
+        chunk_size (int): the number of samples read at a time, which is rounded up to a
+            multiple of min_factor
+
+    Returns:
+        list: the decimation factor of each level
+
+    Example:
+    ```python
+    add_overview(path, nwbfile.acquisition["nirs_data"])
+
+    with NWBHDF5IO(path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        overview = series.get_overview(start_time=0.0, stop_time=3600.0, width=2000)
+    ```
+    """
+    from pynwb import NWBHDF5IO, ProcessingModule, TimeSeries
+
+    if min_factor < 1 or min_factor & (min_factor - 1):
+        msg = f"min_factor must be a power of two, not {min_factor}"
+        raise ValueError(msg)
+    object_id = series if isinstance(series, str) else series.object_id
+
+    with NWBHDF5IO(path, "a") as io:
+        nwbfile = io.read()
+        series = nwbfile.objects[object_id]
+        n_samples, n_channels = series.data.shape
+        # the means of integer data are not integers
+        dtype = np.result_type(series.data.dtype, np.float32)
+        factors = [min_factor]
+        while factors[-1] < n_samples:
+            factors.append(factors[-1] * 2)
+        module = ProcessingModule(
+            name=overview_module_name(series),
+            description=(
+                f"The minimum, maximum and mean of each channel of {series.name} over bins"
+                f" of {', '.join(map(str, factors))} samples."
+            ),
+        )
+        level_ids = []
+        for factor in factors:
+            n_bins = -(-n_samples // factor)
+            chunks = (max(min(chunk_size // factor, n_bins), 1), n_channels, 3)
+            timing = dict(
+                timestamps=H5DataIO(
+                    data=np.empty((0,)), maxshape=(None,), chunks=chunks[:1]
+                )
+            )
+            if series.timestamps is None:
+                timing = dict(
+                    rate=series.rate / factor, starting_time=series.starting_time
+                )
+            level = TimeSeries(
+                name=f"{LEVEL_PREFIX}{factor}",
+                description=(
+                    f"The minimum, maximum and mean (along the last axis) of each channel"
+                    f" of {series.name} over bins of {factor} samples."
+                ),
+                data=H5DataIO(
+                    data=np.empty((0, n_channels, 3), dtype=dtype),
+                    maxshape=(None, n_channels, 3),
+                    chunks=chunks,
+                ),
+                unit=series.unit,
+                conversion=series.conversion,
+                **timing,
+            )
+            module.add(level)
+            level_ids.append(level.object_id)
+        nwbfile.add_processing_module(module)
+        io.write(nwbfile)
+
+    with h5py.File(path, "a") as f:
+        group = _find_group_by_object_id(f, object_id)
+        levels = [_find_group_by_object_id(f, level_id) for level_id in level_ids]
+        block_size = max(-(-chunk_size // min_factor), 1) * min_factor
+        builder = _PyramidBuilder(len(factors))
+        timestamps = group["timestamps"] if "timestamps" in group else None
+        for start in range(0, n_samples, block_size):
+            stop = start + block_size
+            block = group["data"][start:stop]
+            builder.add(_bin(block, min_factor))
+            if timestamps is not None:
+                _append_times(levels, factors, timestamps, start, len(block))
+            _append_bins(levels, builder.pop())
+        builder.finish()
+        _append_bins(levels, builder.pop())
+    return factors
+
+
+def read_overview(series, start_time=None, stop_time=None, width=2000, columns=None):
+    """Returns the envelope of a NIRSSeries over a time span at the coarsest resolution
+    which still gives at least width bins
+
+    The level of the overview of the series is chosen so that the time span covers at
+    least width bins, so that e.g. a trace drawn width pixels wide gets at least one bin
+    per pixel. If even the finest level has fewer bins in the span, or the series has no
+    overview, the raw samples are returned, with a factor of 1 and equal min, max and
+    mean.
+
+    Args:
+        series (NIRSSeries): the series, read from an NWB file
+        start_time (float): the start of the time span in seconds, or None for the start
+            of the series
+        stop_time (float): the (exclusive) end of the time span in seconds, or None for
+            the end of the series
+        width (int): the minimum number of bins to return
+        columns (array_like): sorted indices of the data columns to return, or None for
+            all columns
+
+    Returns:
+        Overview: the bins of the chosen level which overlap the time span
+    """
+    samples = find_sample_range(series, start_time=start_time, stop_time=stop_time)
+    n_samples = samples.stop - samples.start
+    level, factor = None, 1
+    for candidate, candidate_factor in _overview_levels(series):
+        if candidate_factor > factor and n_samples // candidate_factor >= width:
+            level, factor = candidate, candidate_factor
+
+    if level is None:
+        data = series.data
+        if columns is None:
+            values = np.asarray(data[samples])
+        else:
+            values = read_columns(data, columns, samples)
+        times = sample_times(series, samples)
+        return Overview(factor=1, times=times, min=values, max=values, mean=values)
+
+    bins = slice(samples.start // factor, -(-samples.stop // factor))
+    data = level.data.data if isinstance(level.data, DataIO) else level.data
+    values = np.asarray(data[bins])
+    if columns is not None:
+        values = values[:, np.asarray(columns, dtype=np.int64)]
+    return Overview(
+        factor=factor,
+        times=sample_times(level, bins),
+        min=values[..., 0],
+        max=values[..., 1],
+        mean=values[..., 2],
+    )
+
+
+def _overview_levels(series):
+    """Yields the TimeSeries and decimation factor of each level of a series' overview"""
+    nwbfile = series.get_ancestor("NWBFile")
+    if nwbfile is None:
+        return
+    module = nwbfile.processing.get(overview_module_name(series))
+    if module is None:
+        return
+    for name, level in module.data_interfaces.items():
+        if name.startswith(LEVEL_PREFIX):
+            yield level, int(name.replace(LEVEL_PREFIX, "", 1))
+
+
+def _bin(block, factor):
+    """Returns the min, max, sum and count of consecutive bins of factor samples"""
+    n_full = len(block) // factor
+    n_binned = n_full * factor
+    full = block[:n_binned].reshape(n_full, factor, *block.shape[1:])
+    bins = [
+        (
+            full.min(axis=1),
+            full.max(axis=1),
+            full.sum(axis=1, dtype=np.float64),
+            np.full(n_full, factor),
+        )
+    ]
+    if len(block) > n_binned:
+        rest = block[n_binned:]
+        bins.append(
+            (
+                rest.min(axis=0, keepdims=True),
+                rest.max(axis=0, keepdims=True),
+                rest.sum(axis=0, keepdims=True, dtype=np.float64),
+                np.array([len(rest)]),
+            )
+        )
+    return tuple(np.concatenate(parts) for parts in zip(*bins))
+
+
+class _PyramidBuilder:
+    """Builds the levels of an overview from the bins of its finest level
+
+    Bins are added in time order. Each level is built from pairs of consecutive bins of
+    the previous level, so each level holds at most one bin waiting for its pair.
+    """
+
+    def __init__(self, n_levels):
+        self.pending = [None] * n_levels
+        self.output = [[] for _ in range(n_levels)]
+
+    def add(self, bins, level=0):
+        self.output[level].append(bins)
+        if level + 1 == len(self.pending):
+            return
+        if self.pending[level] is not None:
+            bins = tuple(
+                np.concatenate([pending, new])
+                for pending, new in zip(self.pending[level], bins)
+            )
+            self.pending[level] = None
+        n_pairs = len(bins[0]) // 2
+        if len(bins[0]) % 2:
+            self.pending[level] = tuple(values[-1:] for values in bins)
+        if n_pairs:
+            self.add(_merge_pairs(bins, n_pairs), level + 1)
+
+    def finish(self):
+        """Turns the bins still waiting for a pair into the last bin of the next level"""
+        for level in range(len(self.pending) - 1):
+            pending, self.pending[level] = self.pending[level], None
+            if pending is not None:
+                self.add(pending, level + 1)
+
+    def pop(self):
+        """Returns and forgets the (min, max, mean) bins of each level built so far, as
+        (bins, channels, 3) arrays
+        """
+        levels = []
+        for index, output in enumerate(self.output):
+            if output:
+                minimum, maximum, total, count = (
+                    np.concatenate(parts) for parts in zip(*output)
+                )
+                mean = total / count.reshape(-1, *[1] * (total.ndim - 1))
+                levels.append(np.stack([minimum, maximum, mean], axis=-1))
+            else:
+                levels.append(None)
+            self.output[index] = []
+        return levels
+
+
+def _merge_pairs(bins, n_pairs):
+    """Merges pairs of consecutive bins, ignoring a last unpaired bin"""
+    minimum, maximum, total, count = (values[: 2 * n_pairs] for values in bins)
+    return (
+        np.minimum(minimum[0::2], minimum[1::2]),
+        np.maximum(maximum[0::2], maximum[1::2]),
+        total[0::2] + total[1::2],
+        count[0::2] + count[1::2],
+    )
+
+
+def _append_bins(levels, bins):
+    for group, values in zip(levels, bins):
+        if values is None:
+            continue
+        data = group["data"]
+        offset = data.shape[0]
+        data.resize(offset + len(values), axis=0)
+        data[offset:] = values
+
+
+def _append_times(levels, factors, timestamps, start, n_samples):
+    """Appends the start times of the bins which start in a block of samples"""
+    for group, factor in zip(levels, factors):
+        first, stop = -(-start // factor) * factor, start + n_samples
+        if first >= stop:
+            continue
+        times = timestamps[first:stop:factor]
+        dataset = group["timestamps"]
+        offset = dataset.shape[0]
+        dataset.resize(offset + len(times), axis=0)
+        dataset[offset:] = times
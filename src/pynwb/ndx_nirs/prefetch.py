@@ -0,0 +1,159 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from hdmf.data_utils import DataIO
+
+from ndx_nirs.selection import find_sample_range, sample_times
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE
+
+# the number of blocks read ahead of the consumer by default
+DEFAULT_PREFETCH = 2
+
+
+class PrefetchingBlockIterator:
+    """Iterates over the samples of a NIRSSeries in (timestamps, data) blocks, reading
+    the next blocks in background threads while the current one is processed
+
+    Up to prefetch blocks are read ahead of the consumer by a pool of worker threads, so
+    reading and decompressing the data overlaps with the processing of each block. The
+    reads are bounded: a new block is only requested when the consumer takes one, so at
+    most prefetch blocks are held in memory besides those kept by the consumer. With
+    prefetch=0, each block is read when it is requested, without threads.
+
+    The iterator should be closed when it is not consumed to the end, e.g. by using it as
+    a context manager, which cancels the reads which have not started and waits for the
+    running ones. It is closed automatically after the last block or when a read fails.
+
+    The time the consumer spent waiting for blocks and the total time spent reading them
+    are accumulated in wait_seconds and read_seconds, so that 1 - wait_seconds /
+    read_seconds is the fraction of the reads which overlapped with the processing.
+
+    Example:
+    ```python
+    with series.iter_blocks(block_size=10000, prefetch=4) as blocks:
+        for timestamps, data in blocks:
+            process(timestamps, data)
+    ```
+    """
+
+    def __init__(
+        self,
+        series,
+        block_size=DEFAULT_CHUNK_SIZE,
+        prefetch=DEFAULT_PREFETCH,
+        workers=1,
+        start_time=None,
+        stop_time=None,
+    ):
+        """
+        Args:
+            series (NIRSSeries): the series to read, typically from a file
+            block_size (int): the number of samples of each block
+            prefetch (int): the number of blocks read ahead of the consumer
+            workers (int): the number of threads reading blocks. Reads of an HDF5 file
+                are serialized by h5py, so more than one worker mainly helps backends
+                which read concurrently, such as Zarr.
+            start_time (float): the start of the time window in seconds, or None for
+                the first sample
+            stop_time (float): the (exclusive) end of the time window in seconds, or
+                None for the end of the series
+        """
+        if block_size < 1 or workers < 1 or prefetch < 0:
+            msg = (
+                "block_size and workers must be at least 1 and prefetch at least 0, not"
+                f" {block_size}, {workers} and {prefetch}"
+            )
+            raise ValueError(msg)
+        self.series = series
+        self.block_size = block_size
+        self.prefetch = prefetch
+        self.wait_seconds = 0.0
+        self.read_seconds = 0.0
+        data = series.data
+        self._data = data.data if isinstance(data, DataIO) else data
+        samples = find_sample_range(series, start_time=start_time, stop_time=stop_time)
+        self.n_blocks = -(-max(samples.stop - samples.start, 0) // block_size)
+        self._blocks = (
+            slice(start, min(start + block_size, samples.stop))
+            for start in range(samples.start, samples.stop, block_size)
+        )
+        self._pending = deque()
+        self._executor = None
+        if prefetch:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="ndx-nirs-prefetch"
+            )
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __len__(self):
+        """The number of blocks of the series"""
+        return self.n_blocks
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        if self._executor is None:
+            block = next(self._blocks, None)
+            if block is None:
+                self.close()
+                raise StopIteration
+            timestamps, data, seconds = self._read(block)
+            self.wait_seconds += seconds
+            self.read_seconds += seconds
+            return timestamps, data
+
+        self._request()
+        if not self._pending:
+            self.close()
+            raise StopIteration
+        future = self._pending.popleft()
+        start = time.perf_counter()
+        try:
+            timestamps, data, seconds = future.result()
+        except BaseException:
+            self.close()
+            raise
+        self.wait_seconds += time.perf_counter() - start
+        self.read_seconds += seconds
+        # the freed slot is used to read the next block while this one is processed
+        self._request()
+        return timestamps, data
+
+    def _request(self):
+        """Submits reads until prefetch blocks are pending or all blocks are requested"""
+        while len(self._pending) < self.prefetch:
+            block = next(self._blocks, None)
+            if block is None:
+                return
+            self._pending.append(self._executor.submit(self._read, block))
+
+    def _read(self, block):
+        """Returns the timestamps and data of a block of samples, and the read time"""
+        start = time.perf_counter()
+        data = np.asarray(self._data[block])
+        timestamps = sample_times(self.series, block)
+        return timestamps, data, time.perf_counter() - start
+
+    def close(self):
+        """Stops reading blocks: the reads which have not started are cancelled and the
+        running ones are waited for. The iterator yields no more blocks.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
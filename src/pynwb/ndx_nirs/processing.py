@@ -0,0 +1,308 @@
+import numpy as np
+from hdmf.common import DynamicTableRegion
+from hdmf.data_utils import DataIO, GenericDataChunkIterator
+
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE
+
+# the default differential pathlength factor
+DEFAULT_DPF = 6.0
+
+# molar extinction coefficients of oxy- and deoxyhemoglobin in cm^-1/M, as tabulated by
+# S. Prahl (https://omlc.org/spectra/hemoglobin/summary.html), given as rows of
+# (wavelength in nm, HbO, HbR)
+EXTINCTION_COEFFICIENTS = np.array(
+    [
+        (650.0, 368.0, 3750.12),
+        (660.0, 319.6, 3226.56),
+        (670.0, 294.0, 2795.12),
+        (680.0, 277.6, 2407.92),
+        (690.0, 276.0, 2051.96),
+        (700.0, 290.0, 1794.28),
+        (710.0, 314.0, 1540.48),
+        (720.0, 348.0, 1325.88),
+        (730.0, 390.0, 1102.2),
+        (740.0, 446.0, 1115.88),
+        (750.0, 518.0, 1405.24),
+        (760.0, 586.0, 1548.52),
+        (770.0, 650.0, 1311.88),
+        (780.0, 710.0, 1075.44),
+        (790.0, 756.0, 890.8),
+        (800.0, 816.0, 761.72),
+        (810.0, 864.0, 717.08),
+        (820.0, 916.0, 693.76),
+        (830.0, 974.0, 693.04),
+        (840.0, 1022.0, 692.36),
+        (850.0, 1058.0, 691.32),
+    ]
+)
+
+
+def extinction_coefficients(wavelengths):
+    """Returns the molar extinction coefficients of HbO and HbR at the given wavelengths
+
+    The coefficients are linearly interpolated from EXTINCTION_COEFFICIENTS.
+
+    Args:
+        wavelengths (array_like): wavelengths in nm
+
+    Returns:
+        numpy.ndarray: a (len(wavelengths), 2) array of the HbO and HbR coefficients in
+            cm^-1/M
+
+    Raises:
+        ValueError: if a wavelength is outside of the tabulated range
+    """
+    wavelengths = np.asarray(wavelengths, dtype=np.float64)
+    table_wavelengths = EXTINCTION_COEFFICIENTS[:, 0]
+    outside = (wavelengths < table_wavelengths[0]) | (
+        wavelengths > table_wavelengths[-1]
+    )
+    if outside.any():
+        msg = (
+            f"no extinction coefficients for wavelengths {np.unique(wavelengths[outside])}"
+            f", which are outside of {table_wavelengths[0]}-{table_wavelengths[-1]} nm"
+        )
+        raise ValueError(msg)
+    return np.stack(
+        [
+            np.interp(wavelengths, table_wavelengths, EXTINCTION_COEFFICIENTS[:, 1]),
+            np.interp(wavelengths, table_wavelengths, EXTINCTION_COEFFICIENTS[:, 2]),
+        ],
+        axis=-1,
+    )
+
+
+class HemoglobinConverter:
+    """Converts raw intensity NIRSSeries data to HbO and HbR concentration changes
+
+    The modified Beer-Lambert law is applied to each source-detector pair of the series,
+    whose channels must cover at least two distinct wavelengths. The intensity I of each
+    channel is converted to an optical density OD = -log10(I / I0) relative to a
+    baseline I0, and the concentration changes of all pairs are then computed from the
+    optical densities with a single matrix multiplication by the pseudo-inverse of the
+    extinction coefficient matrix of each pair, scaled by the source-detector distance
+    and the differential pathlength factor (DPF).
+
+    The data is processed chunk by chunk, so the memory used is bounded by the chunk size
+    and not by the length of the recording.
+    """
+
+    def __init__(self, series, dpf=DEFAULT_DPF, baseline=None, chunk_size=None):
+        """Prepares the conversion of the data of a NIRSSeries of raw intensities
+
+        Args:
+            series (NIRSSeries): the series of raw intensities
+            dpf (float or dict): the differential pathlength factor, or a dict mapping each
+                source wavelength to its differential pathlength factor
+            baseline (array_like): the baseline intensity of each data column. If None,
+                the mean intensity of each column over the whole series is used, which is
+                computed with one pass over the data.
+            chunk_size (int): the number of samples processed at a time. Defaults to the
+                number of samples in a chunk of the data on disk, or DEFAULT_CHUNK_SIZE.
+        """
+        self.series = series
+        self.data = series.data.data if isinstance(series.data, DataIO) else series.data
+        n_samples = len(self.data)
+        if n_samples == 0:
+            raise ValueError(f"{series.name} has no data to convert")
+        if chunk_size is None:
+            chunks = getattr(self.data, "chunks", None)
+            chunk_size = chunks[0] if chunks else DEFAULT_CHUNK_SIZE
+        self.chunk_size = min(chunk_size, n_samples)
+
+        region = series.channels
+        channels = region.table
+        channel_rows = np.asarray(region.data[:], dtype=np.int64)
+        sources = np.asarray(channels.source.data[:], dtype=np.int64)[channel_rows]
+        detectors = np.asarray(channels.detector.data[:], dtype=np.int64)[channel_rows]
+        wavelengths = np.asarray(channels.source_wavelength.data[:], dtype=np.float64)
+        wavelengths = wavelengths[channel_rows]
+        pairs, pair_of_column = np.unique(
+            np.stack([sources, detectors], axis=1), axis=0, return_inverse=True
+        )
+        pair_of_column = pair_of_column.reshape(-1)
+        self.n_pairs = len(pairs)
+
+        if isinstance(dpf, dict):
+            dpf = np.array([dpf[wavelength] for wavelength in wavelengths.tolist()])
+        distances = channels.geometry.distances[channel_rows] * 100.0  # in cm
+        # the optical density of each column per unit concentration of HbO and HbR
+        pathlengths = distances * np.broadcast_to(
+            np.asarray(dpf, dtype=np.float64), distances.shape
+        )
+        absorption = extinction_coefficients(wavelengths) * pathlengths[:, None]
+
+        # the (columns, 2 * n_pairs) matrix from the optical densities of the data
+        # columns to the HbO and then the HbR of each pair
+        self.matrix = np.zeros((len(channel_rows), 2 * self.n_pairs))
+        self.pair_rows = np.empty(self.n_pairs, dtype=np.int64)
+        for pair in range(self.n_pairs):
+            columns = np.flatnonzero(pair_of_column == pair)
+            if len(np.unique(wavelengths[columns])) < 2:
+                source, detector = pairs[pair]
+                msg = (
+                    f"the channels of source {source} and detector {detector} need at least"
+                    " two distinct wavelengths to compute HbO and HbR"
+                )
+                raise ValueError(msg)
+            inverse = np.linalg.pinv(absorption[columns])
+            self.matrix[columns, pair] = inverse[0]
+            self.matrix[columns, self.n_pairs + pair] = inverse[1]
+            self.pair_rows[pair] = channel_rows[
+                columns[np.argmin(wavelengths[columns])]
+            ]
+
+        if baseline is None:
+            baseline = self._mean_intensity()
+        self.baseline = np.asarray(baseline, dtype=np.float64)
+        if self.baseline.shape != (len(channel_rows),):
+            msg = f"baseline must have one value per data column, not shape {self.baseline.shape}"
+            raise ValueError(msg)
+
+    def __len__(self):
+        return len(self.data)
+
+    def _mean_intensity(self):
+        total = np.zeros(self.matrix.shape[0])
+        for start in range(0, len(self), self.chunk_size):
+            total += self.read(slice(start, start + self.chunk_size)).sum(axis=0)
+        return total / len(self)
+
+    def read(self, samples):
+        """Reads the raw intensities of the given slice of samples"""
+        return np.asarray(self.data[samples], dtype=np.float64)
+
+    def optical_density(self, intensity):
+        """Returns the optical density of a (samples, columns) block of raw intensities"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return -np.log10(intensity / self.baseline)
+
+    def convert(self, intensity):
+        """Converts a (samples, columns) block of raw intensities to HbO and HbR
+
+        Returns:
+            tuple: the (samples, n_pairs) arrays of the HbO and HbR concentration changes
+                in M
+        """
+        concentrations = self.optical_density(intensity) @ self.matrix
+        n_pairs = self.n_pairs
+        return concentrations[:, :n_pairs], concentrations[:, n_pairs:]
+
+    def iter_chunks(self):
+        """Yields the (HbO, HbR) concentration changes of each chunk of samples in turn"""
+        for start in range(0, len(self), self.chunk_size):
+            yield self.convert(self.read(slice(start, start + self.chunk_size)))
+
+    def create_series(self, names=("HbO", "HbR")):
+        """Creates the NIRSSeries of the HbO and HbR concentration changes
+
+        The data of the returned series is computed chunk by chunk as it is written. The
+        n-th column of each series holds the n-th source-detector pair, and its channels
+        region references the channel of the pair with the lowest wavelength. The series
+        share the timestamps or sampling rate of the raw series.
+
+        Args:
+            names (tuple): the names of the HbO and HbR series
+
+        Returns:
+            list: the HbO and HbR NIRSSeries
+        """
+        from ndx_nirs import NIRSSeries
+
+        timing = dict(timestamps=self.series)
+        if self.series.timestamps is None:
+            timing = dict(
+                rate=self.series.rate, starting_time=self.series.starting_time
+            )
+        series = []
+        for output, (name, chromophore) in enumerate(
+            zip(names, ("oxyhemoglobin", "deoxyhemoglobin"))
+        ):
+            series.append(
+                NIRSSeries(
+                    name=name,
+                    description=(
+                        f"The change in {chromophore} concentration of each source-detector"
+                        f" pair, computed from {self.series.name} with the modified"
+                        " Beer-Lambert law."
+                    ),
+                    channels=DynamicTableRegion(
+                        name="channels",
+                        description=(
+                            "the channel with the lowest wavelength of the source-detector"
+                            " pair of each column"
+                        ),
+                        table=self.series.channels.table,
+                        data=self.pair_rows.tolist(),
+                    ),
+                    data=_ConcentrationIterator(self, output),
+                    unit="M",
+                    **timing,
+                )
+            )
+        return series
+
+
+def add_hemoglobin_series(
+    nwbfile,
+    series,
+    module_name="nirs",
+    names=("HbO", "HbR"),
+    **kwargs,
+):
+    """Adds the HbO and HbR concentration changes of a raw NIRSSeries to a processing module
+
+    The concentrations are computed chunk by chunk when the file is written, so the raw
+    data needs to remain readable until then, e.g. by appending to the file it was read
+    from:
+
+    ```python
+    with NWBHDF5IO(path, "a") as io:
+        nwbfile = io.read()
+        add_hemoglobin_series(nwbfile, nwbfile.acquisition["nirs_data"])
+        io.write(nwbfile)
+    ```
+
+    Args:
+        nwbfile (NWBFile): the file to add the series to
+        series (NIRSSeries): the series of raw intensities
+        module_name (str): the name of the processing module, which is created if it does
+            not exist
+        names (tuple): the names of the HbO and HbR series
+        **kwargs: the dpf, baseline and chunk_size arguments of HemoglobinConverter
+
+    Returns:
+        list: the HbO and HbR NIRSSeries which were added
+    """
+    if module_name in nwbfile.processing:
+        module = nwbfile.processing[module_name]
+    else:
+        module = nwbfile.create_processing_module(
+            name=module_name, description="processed NIRS data"
+        )
+    hemoglobin = HemoglobinConverter(series, **kwargs).create_series(names=names)
+    for output in hemoglobin:
+        module.add(output)
+    return hemoglobin
+
+
+class _ConcentrationIterator(GenericDataChunkIterator):
+    """Computes one of the outputs of a HemoglobinConverter one chunk at a time"""
+
+    def __init__(self, converter, output):
+        self.converter = converter
+        n_pairs = converter.n_pairs
+        first, stop = output * n_pairs, (output + 1) * n_pairs
+        self.matrix = converter.matrix[:, first:stop]
+        shape = (converter.chunk_size, n_pairs)
+        super().__init__(buffer_shape=shape, chunk_shape=shape)
+
+    def _get_data(self, selection):
+        intensity = self.converter.read(selection[0])
+        return self.converter.optical_density(intensity) @ self.matrix[:, selection[1]]
+
+    def _get_maxshape(self):
+        return len(self.converter), self.converter.n_pairs
+
+    def _get_dtype(self):
+        return np.dtype("float64")
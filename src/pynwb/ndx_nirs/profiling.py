@@ -0,0 +1,310 @@
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+import warnings
+from dataclasses import dataclass, field
+
+import h5py
+
+# the environment variable which enables profiling of the whole process when ndx_nirs is
+# imported. A value of "1" prints the report to stderr at exit, any other non-empty value
+# other than "0" is the path of a JSON file to write the report to at exit.
+PROFILE_ENV_VAR = "NDX_NIRS_PROFILE"
+
+# the NIRS types whose __init__ is timed
+_NIRS_TYPES = (
+    "NIRSSourcesTable",
+    "NIRSDetectorsTable",
+    "NIRSChannelsTable",
+    "NIRSDevice",
+    "NIRSSeries",
+)
+
+# the private hdmf.utils function which docval calls to validate the arguments of each
+# call, which is replaced to time docval. It is looked up by name at each call, so it
+# needs to be checked again when upgrading hdmf.
+_DOCVAL_HOOK = "__parse_args"
+
+# the NIRS tables whose added rows are counted
+_NIRS_TABLES = ("NIRSSourcesTable", "NIRSDetectorsTable", "NIRSChannelsTable")
+
+_active = None
+
+
+@dataclass
+class PhaseStats:
+    """The number of calls and the total time spent in one phase
+
+    Attributes:
+        calls (int): the number of calls, including recursive and nested calls
+        seconds (float): the total wall-clock time of the outermost calls, so that the
+            time of a recursive call is not counted twice
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class ProfileReport:
+    """The per-phase timings and counts recorded while profiling was active
+
+    The phases are:
+      - docval: the validation of the arguments of every docval-decorated function or
+        method, including those of pynwb and hdmf,
+      - init.<type>: the __init__ of each NIRS type, including its docval validation,
+      - add_rows: NIRS table add_row and NIRSChannelsTable.add_channels calls,
+      - build: the object mapping of containers to builders when writing,
+      - construct: the object mapping of builders to containers when reading,
+      - hdf5.write: writing builders to an HDF5 file, including write_dataset,
+      - hdf5.write_dataset: writing each dataset to an HDF5 file, and
+      - hdf5.read: reading the builders of an HDF5 file.
+
+    Phases nest, e.g. the docval time is also included in the time of the phases which
+    call docval-decorated functions, so the times of all phases do not add up to the
+    total time.
+
+    Attributes:
+        phases (dict): a PhaseStats for each phase which was entered, by name
+        counters (dict): the number of rows added to the NIRS tables ("rows_added"), of
+            HDF5 datasets created ("datasets_created") and of bytes of HDF5 dataset
+            storage written ("bytes_written")
+        seconds (float): the total wall-clock time profiling was active
+    """
+
+    phases: dict = field(default_factory=dict)
+    counters: dict = field(
+        default_factory=lambda: dict(rows_added=0, datasets_created=0, bytes_written=0)
+    )
+    seconds: float = 0.0
+
+    def as_dict(self):
+        """Returns the report as a dict of plain values, e.g. to serialize it to JSON"""
+        return dict(
+            seconds=self.seconds,
+            phases={
+                name: dict(calls=stats.calls, seconds=stats.seconds)
+                for name, stats in self.phases.items()
+            },
+            counters=dict(self.counters),
+        )
+
+    def format(self):
+        """Returns the report as a table of the phases, slowest first, and the counters"""
+        lines = [f"ndx-nirs profile: {self.seconds:.3f} s"]
+        width = max([len(name) for name in self.phases] + [len("phase")])
+        lines.append(f"  {'phase':<{width}}  {'calls':>9}  {'seconds':>9}")
+        for name, stats in sorted(
+            self.phases.items(), key=lambda item: item[1].seconds, reverse=True
+        ):
+            lines.append(f"  {name:<{width}}  {stats.calls:>9}  {stats.seconds:>9.3f}")
+        for name, value in self.counters.items():
+            lines.append(f"  {name}: {value}")
+        return "\n".join(lines)
+
+    def _phase(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats()
+        return stats
+
+
+class _Profiler:
+    """Installs timing wrappers around the hot paths and restores them when stopped"""
+
+    def __init__(self):
+        self.report = ProfileReport()
+        self._depths = {}
+        self._patches = []
+        self._start = None
+
+    def start(self):
+        import hdmf
+        import hdmf.utils
+        from hdmf.backends.hdf5 import HDF5IO
+        from hdmf.build import BuildManager
+
+        import ndx_nirs
+
+        self._start = time.perf_counter()
+        # docval validates arguments with a module-level function which is looked up at
+        # each call, so every docval-decorated function is timed by replacing it
+        if _DOCVAL_HOOK in vars(hdmf.utils):
+            self._patch(hdmf.utils, _DOCVAL_HOOK, "docval")
+        else:
+            msg = (
+                f"hdmf.utils has no {_DOCVAL_HOOK} function in hdmf {hdmf.__version__}, so"
+                " docval is not timed by the profiler"
+            )
+            warnings.warn(msg, RuntimeWarning, stacklevel=3)
+        for name in _NIRS_TYPES:
+            cls = getattr(ndx_nirs, name)
+            self._patch(cls, "__init__", f"init.{name}")
+        for name in _NIRS_TABLES:
+            self._patch(
+                getattr(ndx_nirs, name), "add_row", "add_rows", count=_count_row
+            )
+        self._patch(
+            ndx_nirs.NIRSChannelsTable,
+            "add_channels",
+            "add_rows",
+            count=_count_channels,
+        )
+        self._patch(BuildManager, "build", "build")
+        self._patch(BuildManager, "construct", "construct")
+        self._patch(HDF5IO, "write_builder", "hdf5.write")
+        self._patch(HDF5IO, "write_dataset", "hdf5.write_dataset", count=_count_dataset)
+        self._patch(HDF5IO, "read_builder", "hdf5.read")
+
+    def stop(self):
+        for owner, name, original, own in reversed(self._patches):
+            if own:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self._patches = []
+        self.report.seconds += time.perf_counter() - self._start
+        return self.report
+
+    def _patch(self, owner, name, phase, count=None):
+        """Replaces an attribute of a class or module by a wrapper which times it
+
+        count is called with the arguments and result of each call and returns a dict of
+        the counters to increment.
+        """
+        own = name in vars(owner)
+        original = vars(owner)[name] if own else getattr(owner, name)
+        report, depths = self.report, self._depths
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            stats = report._phase(phase)
+            stats.calls += 1
+            depth = depths.get(phase, 0)
+            depths[phase] = depth + 1
+            start = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+            finally:
+                depths[phase] = depth
+                if depth == 0:
+                    stats.seconds += time.perf_counter() - start
+            if count is not None:
+                for counter, value in count(args, kwargs, result).items():
+                    report.counters[counter] += value
+            return result
+
+        setattr(owner, name, wrapper)
+        self._patches.append((owner, name, original, own))
+
+
+def _count_row(args, kwargs, result):
+    return dict(rows_added=1)
+
+
+def _count_channels(args, kwargs, result):
+    label = kwargs.get("label")
+    return dict(rows_added=0 if label is None else len(label))
+
+
+def _count_dataset(args, kwargs, result):
+    # write_dataset only returns the dataset it created for some kinds of data, so the
+    # dataset is looked up in its parent group, skipping soft and external links
+    parent = args[1] if len(args) > 1 else kwargs["parent"]
+    builder = args[2] if len(args) > 2 else kwargs["builder"]
+    if not isinstance(parent.get(builder.name, getlink=True), h5py.HardLink):
+        return {}
+    dataset = parent.get(builder.name)
+    if not isinstance(dataset, h5py.Dataset):
+        return {}
+    return dict(datasets_created=1, bytes_written=dataset.id.get_storage_size())
+
+
+def start_profiling():
+    """Starts recording the timings and counts of the NIRS hot paths
+
+    Returns:
+        ProfileReport: the report the timings and counts are recorded to
+
+    Raises:
+        RuntimeError: if profiling is already active
+    """
+    global _active
+    if _active is not None:
+        msg = "ndx-nirs profiling is already active"
+        raise RuntimeError(msg)
+    profiler = _Profiler()
+    profiler.start()
+    _active = profiler
+    return profiler.report
+
+
+def stop_profiling():
+    """Stops profiling and removes the timing wrappers
+
+    Returns:
+        ProfileReport: the recorded report, or None if profiling was not active
+    """
+    global _active
+    if _active is None:
+        return None
+    profiler, _active = _active, None
+    return profiler.stop()
+
+
+def get_profile_report():
+    """Returns the report of the active profiling session, or None if there is none"""
+    return None if _active is None else _active.report
+
+
+@contextlib.contextmanager
+def profile():
+    """A context manager which records the timings and counts of the NIRS hot paths
+
+    The build, write and read paths of the NIRS types are only wrapped with timers while
+    the context is active, so profiling costs nothing when it is not used. The timings
+    are not separated by thread, so the context is meant to wrap a single-threaded run.
+
+    Yields:
+        ProfileReport: the report, which is complete once the context exits
+
+    Example:
+    ```python
+    with profile() as report:
+        with NWBHDF5IO(path, "w") as io:
+            io.write(nwbfile)
+    print(report.format())
+    report.phases["hdf5.write"].seconds
+    ```
+    """
+    report = start_profiling()
+    try:
+        yield report
+    finally:
+        stop_profiling()
+
+
+def profile_from_environment():
+    """Starts profiling if the NDX_NIRS_PROFILE environment variable is set, and outputs
+    the report at exit
+    """
+    value = os.environ.get(PROFILE_ENV_VAR, "")
+    if value in ("", "0") or _active is not None:
+        return
+    start_profiling()
+    atexit.register(_write_report, value)
+
+
+def _write_report(destination):
+    report = stop_profiling()
+    if report is None:
+        return
+    if destination == "1":
+        print(report.format(), file=sys.stderr)
+    else:
+        with open(destination, "w") as f:
+            json.dump(report.as_dict(), f, indent=2)
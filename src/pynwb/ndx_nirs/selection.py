@@ -0,0 +1,237 @@
+import math
+import sys
+
+import h5py
+import numpy as np
+from hdmf.data_utils import DataIO
+
+# the number of elements searched at a time in contiguous (unchunked) datasets
+SEARCH_BLOCK_SIZE = 4096
+
+# tolerance, in samples, for rounding errors when converting times to sample indices
+_SAMPLE_TOLERANCE = 1e-9
+
+
+def find_series_columns(
+    series,
+    rows=None,
+    labels=None,
+    where=None,
+    source=None,
+    detector=None,
+    source_wavelength=None,
+):
+    """Returns the columns of a NIRSSeries' data for the channels matching all criteria
+
+    The channels are resolved through the channels DynamicTableRegion of the series: the
+    n-th column of the data holds the channel in the n-th row referenced by the region.
+
+    Args:
+        series (NIRSSeries): the series to select columns from
+        rows (array_like): row indices of channels in the NIRSChannelsTable
+        labels (str or array_like): labels of channels in the NIRSChannelsTable
+        where (callable): a predicate which is given a dict mapping each column name of
+            the NIRSChannelsTable to an array of its values for the channels of the series
+            (in data column order) and which returns a boolean mask over those channels.
+            The source and detector columns hold the row indices of the optodes.
+        source (int or str): the row index or label of the source of the channels
+        detector (int or str): the row index or label of the detector of the channels
+        source_wavelength (float): the source wavelength in nm of the channels
+
+    Returns:
+        numpy.ndarray: the sorted indices of the matching data columns. If no criteria are
+            given, all columns are returned.
+    """
+    region = series.channels
+    table = region.table
+    channel_rows = np.asarray(region.data[:], dtype=np.int64)
+    selected = np.ones(len(channel_rows), dtype=bool)
+
+    if labels is not None:
+        labels = np.atleast_1d(np.asarray(labels)).tolist()
+        label_rows = {label: row for row, label in enumerate(table.label[:])}
+        missing = [label for label in labels if label not in label_rows]
+        if missing:
+            msg = f"no channels with labels {missing} in {table.name}"
+            raise KeyError(msg)
+        selected &= _select_rows(channel_rows, [label_rows[label] for label in labels])
+    if rows is not None:
+        selected &= _select_rows(channel_rows, rows)
+    if source is not None or detector is not None or source_wavelength is not None:
+        matching_rows = table.channel_index.find(
+            source=source, detector=detector, source_wavelength=source_wavelength
+        )
+        selected &= np.isin(channel_rows, matching_rows)
+    if where is not None:
+        values = {
+            name: np.asarray(table[name].data[:])[channel_rows]
+            for name in table.colnames
+        }
+        mask = np.asarray(where(values), dtype=bool)
+        if mask.shape != selected.shape:
+            msg = f"where must return a boolean mask of shape {selected.shape}, not {mask.shape}"
+            raise ValueError(msg)
+        selected &= mask
+    return np.flatnonzero(selected)
+
+
+def _select_rows(channel_rows, rows):
+    """Returns a mask of the channel_rows which are in rows, requiring all rows be present"""
+    rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+    missing = np.setdiff1d(rows, channel_rows)
+    if len(missing):
+        msg = f"channel rows {missing.tolist()} are not referenced by the series"
+        raise KeyError(msg)
+    return np.isin(channel_rows, rows)
+
+
+def contiguous_runs(columns):
+    """Splits sorted, unique column indices into runs of adjacent columns
+
+    Returns:
+        list[tuple]: the (start, stop) bounds of each run
+    """
+    columns = np.asarray(columns, dtype=np.int64)
+    if len(columns) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(columns) != 1) + 1
+    starts = columns[np.concatenate(([0], breaks))]
+    stops = columns[np.concatenate((breaks - 1, [len(columns) - 1]))] + 1
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def read_columns(data, columns, time_slice=slice(None)):
+    """Reads the given columns of a 2D dataset using one read per run of adjacent columns
+
+    Args:
+        data (h5py.Dataset, zarr.Array or array_like): the (time, channels) data to read
+            from
+        columns (array_like): sorted, unique indices of the columns to read
+        time_slice (slice): the contiguous range of samples to read
+
+    Returns:
+        numpy.ndarray: a (n_samples, len(columns)) array of the selected data
+    """
+    if time_slice.step not in (None, 1):
+        raise ValueError("time_slice must be contiguous")
+    columns = np.asarray(columns, dtype=np.int64)
+    if isinstance(data, DataIO):
+        data = data.data
+    start, stop, _ = time_slice.indices(len(data))
+    n_samples = max(stop - start, 0)
+    samples = slice(start, start + n_samples)
+    is_hdf5 = isinstance(data, h5py.Dataset)
+    if not is_hdf5 and not is_zarr_array(data):
+        data = np.asarray(data)
+        return data[samples][:, columns]
+
+    out = np.empty((n_samples, len(columns)), dtype=data.dtype)
+    if n_samples == 0:
+        return out
+    offset = 0
+    for run_start, run_stop in contiguous_runs(columns):
+        next_offset = offset + run_stop - run_start
+        source = np.s_[samples, run_start:run_stop]
+        destination = np.s_[:, offset:next_offset]
+        if is_hdf5:
+            data.read_direct(out, source_sel=source, dest_sel=destination)
+        else:
+            out[destination] = data[source]
+        offset = next_offset
+    return out
+
+
+def is_zarr_array(data):
+    """Returns whether data is a zarr array, without importing zarr"""
+    # zarr is an optional dependency, and data can only be a zarr array if it is imported
+    zarr = sys.modules.get("zarr")
+    return zarr is not None and isinstance(data, zarr.Array)
+
+
+def find_sample_range(series, start_time=None, stop_time=None):
+    """Returns the slice of samples of a series with start_time <= time < stop_time
+
+    For a series with a sampling rate, the indices are computed from the rate and the
+    starting time. For a series with timestamps, they are found by a binary search over
+    the timestamps which only reads O(log(n)) elements plus one chunk from disk.
+
+    Args:
+        series (TimeSeries): the series to find samples in
+        start_time (float): the start of the time window in seconds. If None, the window
+            starts at the first sample.
+        stop_time (float): the (exclusive) end of the time window in seconds. If None, the
+            window ends after the last sample.
+
+    Returns:
+        slice: the contiguous range of sample indices in the window
+    """
+    n_samples = len(series.data)
+    if series.timestamps is None:
+        starting_time = series.starting_time or 0.0
+
+        def to_index(time):
+            return math.ceil((time - starting_time) * series.rate - _SAMPLE_TOLERANCE)
+
+    else:
+        timestamps = series.timestamps
+        if isinstance(timestamps, DataIO):
+            timestamps = timestamps.data
+
+        def to_index(time):
+            return search_sorted(timestamps, time)
+
+    start = 0 if start_time is None else min(max(to_index(start_time), 0), n_samples)
+    stop = (
+        n_samples if stop_time is None else min(max(to_index(stop_time), 0), n_samples)
+    )
+    return slice(start, max(start, stop))
+
+
+def sample_times(series, samples):
+    """Returns the times of a contiguous range of samples of a TimeSeries
+
+    Only the timestamps of the samples are read, or, for a series with a sampling rate,
+    the times are computed from the rate and the starting time.
+
+    Args:
+        series (TimeSeries): the series of the samples
+        samples (slice): the contiguous range of sample indices, e.g. from
+            find_sample_range
+
+    Returns:
+        numpy.ndarray: the time in seconds of each sample, as float64
+    """
+    if series.timestamps is not None:
+        return np.asarray(series.timestamps[samples], dtype=np.float64)
+    start, stop, _ = samples.indices(len(series.data))
+    return (series.starting_time or 0.0) + np.arange(start, stop) / series.rate
+
+
+def search_sorted(values, value):
+    """Returns the index of the first element of sorted values which is >= value
+
+    For an h5py dataset or a zarr array, the search first bisects over the first element
+    of each chunk (or each block of SEARCH_BLOCK_SIZE elements for contiguous datasets)
+    and then searches within a single chunk, so that only O(log(n_chunks)) single
+    elements and one chunk are read from disk.
+    """
+    if not isinstance(values, h5py.Dataset) and not is_zarr_array(values):
+        return int(np.searchsorted(np.asarray(values), value, side="left"))
+
+    n_values = len(values)
+    block_size = values.chunks[0] if values.chunks is not None else SEARCH_BLOCK_SIZE
+    # find the first block whose first element is >= value
+    low, high = 0, math.ceil(n_values / block_size)
+    while low < high:
+        middle = (low + high) // 2
+        if values[middle * block_size] < value:
+            low = middle + 1
+        else:
+            high = middle
+    if low == 0:
+        return 0
+    # the first element >= value is in the preceding block, or starts the next one
+    block_start = (low - 1) * block_size
+    block_stop = min(block_start + block_size, n_values)
+    block = values[block_start:block_stop]
+    return block_start + int(np.searchsorted(block, value, side="left"))
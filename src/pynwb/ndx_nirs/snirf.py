@@ -0,0 +1,546 @@
+import datetime
+import re
+import uuid
+
+import h5py
+import numpy as np
+from hdmf.common import DynamicTableRegion
+from hdmf.data_utils import DataIO
+
+from ndx_nirs.streaming import DEFAULT_CHUNK_SIZE, DatasetChunkIterator
+
+# the scale from each SNIRF LengthUnit to meters
+LENGTH_UNITS = {"m": 1.0, "cm": 1e-2, "mm": 1e-3, "um": 1e-6}
+
+# the scale from each SNIRF TimeUnit to seconds
+TIME_UNITS = {"s": 1.0, "ms": 1e-3, "us": 1e-6}
+
+# the nirs_mode of a NIRSDevice for each SNIRF measurement dataType
+NIRS_MODES = {
+    1: "continuous-wave",
+    51: "continuous-wave-fluorescence",
+    101: "frequency-domain",
+    102: "frequency-domain",
+    151: "frequency-domain-fluorescence",
+    152: "frequency-domain-fluorescence",
+    201: "time-domain",
+    251: "time-domain-fluorescence",
+    301: "time-domain-moments",
+    351: "time-domain-moments-fluorescence",
+    401: "diffuse-correlation-spectroscopy",
+    410: "diffuse-correlation-spectroscopy",
+}
+
+# the fields of a SNIRF measurement list which are mapped to the NIRSChannelsTable
+_MEASUREMENT_FIELDS = (
+    "sourceIndex",
+    "detectorIndex",
+    "wavelengthIndex",
+    "dataType",
+    "sourcePower",
+    "detectorGain",
+)
+
+# the optional fields of a SNIRF measurement list and their NIRSChannelsTable columns
+_OPTIONAL_MEASUREMENT_FIELDS = {
+    "sourcePower": "source_power",
+    "detectorGain": "detector_gain",
+}
+
+
+def snirf_to_nwb(snirf_path, nwb_path, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """Converts a SNIRF file to an NWB file with a NIRSDevice and NIRSSeries
+
+    The first nirs group of the SNIRF file is converted. Its probe and measurement list
+    are mapped to the tables of a NIRSDevice and each of its data blocks to a NIRSSeries
+    in the acquisition of the NWB file. The time series data is copied chunk by chunk
+    from the SNIRF file, so only one chunk is held in memory at a time.
+
+    Args:
+        snirf_path (str): the path of the SNIRF file to read
+        nwb_path (str): the path of the NWB file to write
+        chunk_size (int): the number of samples copied at a time, which is also the
+            number of samples in each chunk of the NWB data
+        **kwargs: additional arguments to NWBFile, which override those read from the
+            SNIRF metadata, e.g. session_description or identifier
+
+    Returns:
+        int: the number of bytes of time series data copied
+    """
+    from pynwb import NWBHDF5IO
+
+    with h5py.File(snirf_path, "r") as snirf:
+        nirs = snirf[_nirs_group_names(snirf)[0]]
+        nwbfile = create_nwbfile(nirs, **kwargs)
+        device, series = read_nirs_group(nirs, chunk_size=chunk_size)
+        nwbfile.add_device(device)
+        for data_series in series:
+            nwbfile.add_acquisition(data_series)
+        with NWBHDF5IO(nwb_path, "w") as io:
+            io.write(nwbfile)
+        return sum(data_series.data.nbytes for data_series in series)
+
+
+def create_nwbfile(nirs, **kwargs):
+    """Creates an NWBFile with the session and subject metadata of a SNIRF nirs group
+
+    Args:
+        nirs (h5py.Group): the nirs group of a SNIRF file
+        **kwargs: additional arguments to NWBFile, which override those read from the
+            SNIRF metadata
+
+    Returns:
+        NWBFile: the file, without any NIRS data
+    """
+    from pynwb import NWBFile
+    from pynwb.file import Subject
+
+    tags = _read_metadata_tags(nirs)
+    arguments = dict(
+        session_description=f"NIRS data converted from {nirs.file.filename}",
+        identifier=str(uuid.uuid4()),
+        session_start_time=_session_start_time(tags),
+    )
+    if "SubjectID" in tags:
+        arguments["subject"] = Subject(subject_id=tags["SubjectID"])
+    arguments.update(kwargs)
+    return NWBFile(**arguments)
+
+
+def read_nirs_group(nirs, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Maps a SNIRF nirs group to a NIRSDevice and a NIRSSeries for each data block
+
+    The data of the series are iterators over the dataTimeSeries datasets of the SNIRF
+    file, so the file needs to remain open until the series have been written.
+
+    Args:
+        nirs (h5py.Group): the nirs group of a SNIRF file
+        chunk_size (int): the number of samples read at a time from each data block
+
+    Returns:
+        tuple: the NIRSDevice and the list of NIRSSeries
+    """
+    from ndx_nirs import (
+        NIRSChannelsTable,
+        NIRSDetectorsTable,
+        NIRSDevice,
+        NIRSSeries,
+        NIRSSourcesTable,
+    )
+
+    tags = _read_metadata_tags(nirs)
+    length_scale = _unit_scale(tags.get("LengthUnit", "m"), LENGTH_UNITS, "LengthUnit")
+    time_scale = _unit_scale(tags.get("TimeUnit", "s"), TIME_UNITS, "TimeUnit")
+    probe = nirs["probe"]
+    wavelengths = probe["wavelengths"][:].astype(np.float64)
+    sources = NIRSSourcesTable.from_coordinates(
+        label=_optode_labels(probe, "source"),
+        coordinates=_optode_positions(probe, "source") * length_scale,
+    )
+    detectors = NIRSDetectorsTable.from_coordinates(
+        label=_optode_labels(probe, "detector"),
+        coordinates=_optode_positions(probe, "detector") * length_scale,
+    )
+    data_groups = _numbered_members(nirs, "data")
+    if not data_groups:
+        raise ValueError(f"{nirs.name} has no data blocks")
+    measurement_lists = [_read_measurement_list(nirs[name]) for name in data_groups]
+    optional_fields = [
+        {field for field in _OPTIONAL_MEASUREMENT_FIELDS if field in measurements}
+        for measurements in measurement_lists
+    ]
+    if any(fields != optional_fields[0] for fields in optional_fields):
+        msg = f"the measurement lists of {nirs.name} have different fields"
+        raise ValueError(msg)
+    measurements = {
+        field: np.concatenate([lists[field] for lists in measurement_lists])
+        for field in ("sourceIndex", "detectorIndex", "wavelengthIndex")
+        + tuple(optional_fields[0])
+    }
+
+    # the blocks of a file usually measure the same channels, so the channels table has
+    # a row per distinct (source, detector, wavelength) in the order they first appear,
+    # which the series of each block reference
+    keys = np.stack(
+        [
+            measurements["sourceIndex"],
+            measurements["detectorIndex"],
+            measurements["wavelengthIndex"],
+        ],
+        axis=1,
+    )
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    first = first[order]
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    channel_rows = rank[inverse.reshape(-1)]
+
+    optional = {}
+    for field, column in _OPTIONAL_MEASUREMENT_FIELDS.items():
+        if field in measurements:
+            values = measurements[field]
+            if not np.array_equal(values, values[first][channel_rows]):
+                msg = (
+                    f"the data blocks of {nirs.name} have different {field} values for"
+                    " the same channel"
+                )
+                raise ValueError(msg)
+            optional[column] = values[first]
+    source = measurements["sourceIndex"][first] - 1
+    detector = measurements["detectorIndex"][first] - 1
+    wavelength_index = measurements["wavelengthIndex"][first] - 1
+    if "wavelengthsEmission" in probe:
+        emission = probe["wavelengthsEmission"][:].astype(np.float64)
+        optional["emission_wavelength"] = emission[wavelength_index]
+    source_wavelength = wavelengths[wavelength_index]
+    labels = np.char.add(
+        np.char.add(
+            np.asarray(sources.label.data, dtype=str)[source],
+            np.asarray(detectors.label.data, dtype=str)[detector],
+        ),
+        [f" {wavelength:g}" for wavelength in source_wavelength],
+    )
+    channels = NIRSChannelsTable(sources=sources, detectors=detectors)
+    channels.add_channels(
+        label=labels.tolist(),
+        source=source,
+        detector=detector,
+        source_wavelength=source_wavelength,
+        **optional,
+    )
+    blocks = []
+    offset = 0
+    for name, lists in zip(data_groups, measurement_lists):
+        next_offset = offset + len(lists["sourceIndex"])
+        rows = channel_rows[offset:next_offset]
+        blocks.append((name, rows, lists["dataType"]))
+        offset = next_offset
+
+    data_types = {int(data_type) for _, _, types in blocks for data_type in types}
+    unknown = sorted(data_types - NIRS_MODES.keys())
+    if unknown:
+        # e.g. 99999 for processed data, which would be misread as raw measurements
+        msg = (
+            f"{nirs.name} has measurements of dataType {unknown}, which are not raw NIRS"
+            f" measurements of any of the dataTypes {sorted(NIRS_MODES)}"
+        )
+        raise ValueError(msg)
+    modes = {NIRS_MODES[data_type] for data_type in data_types}
+    if len(modes) != 1:
+        msg = f"{nirs.name} mixes measurements of several NIRS modes: {sorted(modes)}"
+        raise ValueError(msg)
+    device = NIRSDevice(
+        name="nirs_device",
+        description=f"The NIRS device of {nirs.file.filename}",
+        manufacturer=tags.get("ManufacturerName", "unknown"),
+        nirs_mode=modes.pop(),
+        channels=channels,
+        sources=sources,
+        detectors=detectors,
+    )
+
+    series = []
+    for name, rows, _ in blocks:
+        group = nirs[name]
+        name = "nirs_data" if len(blocks) == 1 else f"nirs_{name}"
+        series.append(
+            NIRSSeries(
+                name=name,
+                description=f"The NIRS data of {group.name} in {nirs.file.filename}",
+                channels=DynamicTableRegion(
+                    name="channels",
+                    description="an ordered map to the channels in this NIRS series",
+                    table=channels,
+                    data=rows.tolist(),
+                ),
+                data=DatasetChunkIterator(
+                    group["dataTimeSeries"], chunk_size=chunk_size
+                ),
+                unit="unknown",
+                **_read_timing(group["time"], len(group["dataTimeSeries"]), time_scale),
+            )
+        )
+    return device, series
+
+
+def nwb_to_snirf(
+    series, snirf_path, chunk_size=DEFAULT_CHUNK_SIZE, measurement_list_groups=False
+):
+    """Writes a NIRSSeries with the tables of its NIRSDevice to a SNIRF file
+
+    The data (and timestamps) of the series are copied to the SNIRF file chunk by chunk,
+    so only one chunk of samples is held in memory at a time. The measurement list is
+    computed from the channels of the series in a single vectorized pass over the
+    NIRSChannelsTable and written as the arrays of a SNIRF 1.1 measurementLists group.
+    Positions are written in meters and times in seconds.
+
+    Args:
+        series (NIRSSeries): the series to write, whose channels table must belong to a
+            NIRSDevice
+        snirf_path (str): the path of the SNIRF file to write
+        chunk_size (int): the number of samples copied at a time, which is also the
+            number of samples in each chunk of the SNIRF data
+        measurement_list_groups (bool): whether to also write the measurement list as
+            one measurementList group per channel, for readers of SNIRF files older
+            than 1.1. This is slow for devices with thousands of channels.
+
+    Returns:
+        int: the number of bytes of time series data copied
+    """
+    channels = series.channels.table
+    device = channels.parent
+    if getattr(device, "nirs_mode", None) is None:
+        msg = f"the channels table of {series.name} does not belong to a NIRSDevice"
+        raise ValueError(msg)
+    data_types = [code for code, mode in NIRS_MODES.items() if mode == device.nirs_mode]
+    if not data_types:
+        msg = f"the nirs_mode {device.nirs_mode!r} has no SNIRF dataType"
+        raise ValueError(msg)
+    measurements, wavelengths = _measurement_list(series)
+    measurements["dataType"] = np.full(len(measurements["sourceIndex"]), data_types[0])
+    measurements["dataTypeIndex"] = np.ones(
+        len(measurements["sourceIndex"]), dtype=np.int32
+    )
+
+    with h5py.File(snirf_path, "w") as snirf:
+        _write_string(snirf, "formatVersion", "1.1")
+        nirs = snirf.create_group("nirs")
+        tags = nirs.create_group("metaDataTags")
+        for name, value in _metadata_tags(series).items():
+            _write_string(tags, name, value)
+
+        probe = nirs.create_group("probe")
+        probe.create_dataset("wavelengths", data=wavelengths[:, 0])
+        if "emission_wavelength" in channels.colnames:
+            probe.create_dataset("wavelengthsEmission", data=wavelengths[:, 1])
+        for optode, table in (
+            ("source", channels.source.table),
+            ("detector", channels.detector.table),
+        ):
+            axes = ["x", "y", "z"] if "z" in table.colnames else ["x", "y"]
+            probe.create_dataset(
+                f"{optode}Pos{len(axes)}D",
+                data=np.stack(
+                    [
+                        np.asarray(table[axis].data[:], dtype=np.float64)
+                        for axis in axes
+                    ],
+                    axis=1,
+                ).reshape(len(table), len(axes)),
+            )
+            probe.create_dataset(
+                f"{optode}Labels", data=list(table.label[:]), dtype=h5py.string_dtype()
+            )
+
+        block = nirs.create_group("data1")
+        n_bytes = _copy_in_chunks(series.data, block, "dataTimeSeries", chunk_size)
+        if series.timestamps is None:
+            starting_time = series.starting_time or 0.0
+            block.create_dataset("time", data=[starting_time, 1.0 / series.rate])
+        else:
+            _copy_in_chunks(series.timestamps, block, "time", chunk_size)
+        lists = block.create_group("measurementLists")
+        for field, values in measurements.items():
+            lists.create_dataset(field, data=values)
+        if measurement_list_groups:
+            for index in range(len(measurements["sourceIndex"])):
+                measurement = block.create_group(f"measurementList{index + 1}")
+                for field, values in measurements.items():
+                    measurement.create_dataset(field, data=values[index])
+    return n_bytes
+
+
+def _nirs_group_names(snirf):
+    names = _numbered_members(snirf, "nirs")
+    if not names:
+        raise ValueError(f"{snirf.filename} has no nirs group")
+    return names
+
+
+def _numbered_members(group, prefix):
+    """Returns the names of the members of a group named prefix or prefix followed by a
+    number, in numerical order
+    """
+    pattern = re.compile(rf"{prefix}(\d*)")
+    numbered = []
+    for name in group:
+        match = pattern.fullmatch(name)
+        if match:
+            numbered.append((int(match.group(1) or 0), name))
+    return [name for _, name in sorted(numbered)]
+
+
+def _read_string(dataset):
+    value = dataset[()]
+    if isinstance(value, np.ndarray):
+        value = value.reshape(-1)[0]
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _read_metadata_tags(nirs):
+    if "metaDataTags" not in nirs:
+        return {}
+    tags = nirs["metaDataTags"]
+    return {
+        name: _read_string(tags[name])
+        for name in tags
+        if isinstance(tags[name], h5py.Dataset) and tags[name].dtype.kind in "SOU"
+    }
+
+
+def _session_start_time(tags):
+    """Returns the session start time from the MeasurementDate and MeasurementTime tags"""
+    date = tags.get("MeasurementDate", "unknown")
+    time = tags.get("MeasurementTime", "unknown")
+    try:
+        start = datetime.date.fromisoformat(date)
+    except ValueError:
+        # the SNIRF default for a missing date
+        start = datetime.date(1970, 1, 1)
+    try:
+        start_time = datetime.time.fromisoformat(time.replace("Z", "+00:00"))
+    except ValueError:
+        start_time = datetime.time(0, 0)
+    start = datetime.datetime.combine(start, start_time)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=datetime.timezone.utc)
+    return start
+
+
+def _unit_scale(unit, scales, tag):
+    try:
+        return scales[unit]
+    except KeyError:
+        msg = f"unsupported {tag} {unit!r}, expected one of {list(scales)}"
+        raise ValueError(msg) from None
+
+
+def _optode_labels(probe, optode):
+    name = f"{optode}Labels"
+    n_optodes = len(_optode_positions(probe, optode))
+    if name not in probe:
+        prefix = optode[0].upper()
+        return [f"{prefix}{index + 1}" for index in range(n_optodes)]
+    labels = probe[name][:].reshape(-1)[:n_optodes]
+    return [
+        label.decode() if isinstance(label, bytes) else str(label) for label in labels
+    ]
+
+
+def _optode_positions(probe, optode):
+    for name in (f"{optode}Pos3D", f"{optode}Pos2D"):
+        if name in probe:
+            return np.atleast_2d(probe[name][:].astype(np.float64))
+    raise ValueError(f"{probe.name} has no {optode} positions")
+
+
+def _read_measurement_list(data):
+    """Reads the measurement list of a SNIRF data block as arrays of each field
+
+    Both the indexed measurementList groups and the measurementLists group of arrays
+    (SNIRF 1.1) are supported.
+    """
+    if "measurementLists" in data:
+        group = data["measurementLists"]
+        return {
+            field: group[field][:].reshape(-1)
+            for field in _MEASUREMENT_FIELDS
+            if field in group
+        }
+    groups = [data[name] for name in _numbered_members(data, "measurementList")]
+    if not groups:
+        raise ValueError(f"{data.name} has no measurement list")
+    fields = [field for field in _MEASUREMENT_FIELDS if field in groups[0]]
+    return {
+        field: np.array(
+            [np.asarray(group[field][()]).reshape(-1)[0] for group in groups]
+        )
+        for field in fields
+    }
+
+
+def _read_timing(time, n_samples, scale):
+    """Returns the timestamps, or the rate and starting time, of a SNIRF time dataset"""
+    if len(time) == 2 and n_samples != 2:
+        start, spacing = time[:].astype(np.float64) * scale
+        return dict(starting_time=float(start), rate=1.0 / float(spacing))
+    return dict(timestamps=time[:].astype(np.float64) * scale)
+
+
+def _write_string(group, name, value):
+    group.create_dataset(name, data=value, dtype=h5py.string_dtype())
+
+
+def _metadata_tags(series):
+    """Returns the SNIRF metadata tags of the NWBFile of a series"""
+    tags = dict(
+        SubjectID="unknown",
+        MeasurementDate="unknown",
+        MeasurementTime="unknown",
+        LengthUnit="m",
+        TimeUnit="s",
+        FrequencyUnit="Hz",
+    )
+    nwbfile = series.get_ancestor("NWBFile")
+    if nwbfile is not None:
+        start = nwbfile.session_start_time
+        tags["MeasurementDate"] = start.date().isoformat()
+        tags["MeasurementTime"] = start.timetz().isoformat()
+        if nwbfile.subject is not None and nwbfile.subject.subject_id is not None:
+            tags["SubjectID"] = nwbfile.subject.subject_id
+    return tags
+
+
+def _measurement_list(series):
+    """Computes the SNIRF measurement list of the channels of a series
+
+    Returns:
+        tuple: a dict of the 1-based sourceIndex, detectorIndex and wavelengthIndex (and
+            sourcePower and detectorGain, if the channels have them) of each data column,
+            and the (wavelengths, 2) array of the distinct (source, emission) wavelength
+            pairs indexed by wavelengthIndex
+    """
+    channels = series.channels.table
+    rows = np.asarray(series.channels.data[:], dtype=np.int64)
+    source_wavelength = np.asarray(channels.source_wavelength.data[:], dtype=np.float64)
+    emission_wavelength = np.zeros_like(source_wavelength)
+    if "emission_wavelength" in channels.colnames:
+        emission_wavelength = np.asarray(
+            channels.emission_wavelength.data[:], dtype=np.float64
+        )
+    wavelengths, wavelength_index = np.unique(
+        np.stack([source_wavelength[rows], emission_wavelength[rows]], axis=1),
+        axis=0,
+        return_inverse=True,
+    )
+    measurements = dict(
+        sourceIndex=np.asarray(channels.source.data[:], dtype=np.int32)[rows] + 1,
+        detectorIndex=np.asarray(channels.detector.data[:], dtype=np.int32)[rows] + 1,
+        wavelengthIndex=wavelength_index.reshape(-1).astype(np.int32) + 1,
+    )
+    for field, column in _OPTIONAL_MEASUREMENT_FIELDS.items():
+        if column in channels.colnames:
+            measurements[field] = np.asarray(
+                channels[column].data[:], dtype=np.float64
+            )[rows]
+    return measurements, wavelengths
+
+
+def _copy_in_chunks(source, group, name, chunk_size):
+    """Copies a dataset or array to a new dataset of group, one chunk of samples at a time
+
+    Returns:
+        int: the number of bytes copied
+    """
+    if isinstance(source, DataIO):
+        source = source.data
+    if not hasattr(source, "dtype"):
+        source = np.asarray(source)
+    shape = tuple(source.shape)
+    chunks = (max(min(chunk_size, shape[0]), 1), *shape[1:])
+    target = group.create_dataset(name, shape=shape, dtype=source.dtype, chunks=chunks)
+    for start in range(0, shape[0], chunk_size):
+        chunk = slice(start, start + chunk_size)
+        target[chunk] = source[chunk]
+    return int(np.prod(shape)) * source.dtype.itemsize
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+from hdmf.spec.namespace import SpecReader, YAMLSpecReader
+
+SPEC_CACHE_FILENAME = "ndx-nirs.spec.json"
+
+
+class CachedSpecReader(SpecReader):
+    """A SpecReader which returns the namespace and specs from a pre-parsed spec cache
+
+    The spec cache is a JSON file written by src/spec/create_extension_spec.py next to
+    the YAML spec files. It contains the parsed contents of the namespace file and of
+    each spec file, along with the sha256 digest of each YAML file it was created from.
+    Reading it avoids parsing the YAML files, which is the bulk of the time needed to
+    load the ndx-nirs namespace.
+    """
+
+    def __init__(self, spec_dir, cache):
+        super().__init__(source=spec_dir)
+        self.__cache = cache
+
+    def read_namespace(self, namespace_path):
+        return self.__cache["namespaces"]
+
+    def read_spec(self, spec_path):
+        return self.__cache["specs"][os.path.basename(spec_path)]
+
+
+def load_spec_cache(namespace_path):
+    """Returns a CachedSpecReader for the namespace file if an up-to-date cache exists
+
+    Args:
+        namespace_path (str): the path to the ndx-nirs.namespace.yaml file. The cache is
+            expected to be in the same directory.
+
+    Returns:
+        CachedSpecReader: a reader for the cached spec, or None if the cache does not
+            exist or does not match the YAML files next to it.
+    """
+    spec_dir = os.path.dirname(namespace_path)
+    cache_path = os.path.join(spec_dir, SPEC_CACHE_FILENAME)
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+        for filename, digest in cache["sources"].items():
+            if file_digest(os.path.join(spec_dir, filename)) != digest:
+                return None
+    except (OSError, ValueError, KeyError):
+        return None
+    return CachedSpecReader(spec_dir, cache)
+
+
+def write_spec_cache(namespace_path):
+    """Parses the namespace file and its spec files and writes them to the spec cache
+
+    Args:
+        namespace_path (str): the path to the ndx-nirs.namespace.yaml file. The cache is
+            written to the same directory.
+    """
+    spec_dir = os.path.dirname(namespace_path)
+    reader = YAMLSpecReader(indir=spec_dir)
+    namespaces = reader.read_namespace(namespace_path)
+    spec_files = [
+        schema["source"]
+        for namespace in namespaces
+        for schema in namespace["schema"]
+        if "source" in schema
+    ]
+    cache = {
+        "sources": {
+            filename: file_digest(os.path.join(spec_dir, filename))
+            for filename in [os.path.basename(namespace_path), *spec_files]
+        },
+        "namespaces": namespaces,
+        "specs": {filename: reader.read_spec(filename) for filename in spec_files},
+    }
+    with open(os.path.join(spec_dir, SPEC_CACHE_FILENAME), "w") as f:
+        json.dump(cache, f, indent=1)
+        f.write("\n")
+
+
+def file_digest(path):
+    """Returns the hex sha256 digest of the contents of the file at path"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
@@ -0,0 +1,261 @@
+import h5py
+import numpy as np
+from hdmf.backends.hdf5 import H5DataIO
+from hdmf.data_utils import GenericDataChunkIterator
+
+DEFAULT_CHUNK_SIZE = 1024
+
+
+def create_streaming_series(
+    *, name, channels, chunk_size=DEFAULT_CHUNK_SIZE, dtype="float64", **kwargs
+):
+    """Create an empty NIRSSeries whose data can be appended to after it is written
+
+    The data (and timestamps, unless a sampling rate is given) are created as empty,
+    resizable and chunked datasets. After the NWB file containing the series has been
+    written with NWBHDF5IO, samples can be appended to it with a NIRSSeriesWriter.
+
+    Args:
+        name (str): the name of the NIRSSeries
+        channels (DynamicTableRegion): the channels represented by the columns of data
+        chunk_size (int): the number of samples in each chunk of the datasets. This is also
+            the number of samples buffered in memory by the NIRSSeriesWriter.
+        dtype: the dtype of the data
+        **kwargs: any additional arguments to NIRSSeries, such as description, unit or
+            rate. If rate is not given, a timestamps dataset is created.
+
+    Returns:
+        NIRSSeries: the series with empty data and timestamps
+
+    Example:
+    ```python
+    series = create_streaming_series(name="nirs_data", channels=channels, unit="V")
+    nwbfile.add_acquisition(series)
+    with NWBHDF5IO(path, "w") as io:
+        io.write(nwbfile)
+
+    with NIRSSeriesWriter(path, series) as writer:
+        for timestamps, data in acquisition_loop():
+            writer.append(data, timestamps=timestamps)
+    ```
+    """
+    from ndx_nirs import NIRSSeries
+
+    if "data" in kwargs or "timestamps" in kwargs:
+        msg = "data and timestamps are created by create_streaming_series and cannot be given"
+        raise ValueError(msg)
+    n_channels = len(channels)
+    kwargs["data"] = H5DataIO(
+        data=np.empty((0, n_channels), dtype=dtype),
+        maxshape=(None, n_channels),
+        chunks=(chunk_size, n_channels),
+    )
+    if kwargs.get("rate") is None:
+        kwargs["timestamps"] = H5DataIO(
+            data=np.empty((0,), dtype="float64"),
+            maxshape=(None,),
+            chunks=(chunk_size,),
+        )
+    return NIRSSeries(name=name, channels=channels, **kwargs)
+
+
+class NIRSSeriesWriter:
+    """Appends blocks of samples to a NIRSSeries which has already been written to disk
+
+    Appended samples are buffered until a full chunk is available, which is then written
+    to the resizable data and timestamps datasets of the series and flushed to disk. At
+    most one chunk of samples is held in memory, and the data and timestamps datasets
+    always have the same length on disk, so the file remains a valid NWB file whenever
+    the writer is flushed or closed.
+
+    The series needs to have been created with resizable datasets, e.g. with
+    create_streaming_series.
+    """
+
+    def __init__(self, path, series):
+        """Opens the NWB file at path for appending to the given NIRSSeries
+
+        Args:
+            path (str): the path of the NWB file containing the series
+            series (NIRSSeries): the series to append to. This may also be the object_id
+                of the series.
+        """
+        self._file = h5py.File(path, "a")
+        try:
+            object_id = series if isinstance(series, str) else series.object_id
+            group = _find_group_by_object_id(self._file, object_id)
+            self._data = group["data"]
+            self._timestamps = group["timestamps"] if "timestamps" in group else None
+            self._check_resizable(self._data)
+            if self._timestamps is not None:
+                self._check_resizable(self._timestamps)
+        except Exception:
+            self._file.close()
+            raise
+
+        self.n_channels = self._data.shape[1]
+        self.chunk_size = self._data.chunks[0]
+        self.dtype = self._data.dtype
+        self.has_timestamps = self._timestamps is not None
+        self._data_buffer = np.empty(
+            (self.chunk_size, self.n_channels), self._data.dtype
+        )
+        self._timestamps_buffer = np.empty((self.chunk_size,), np.float64)
+        self._n_buffered = 0
+
+    @staticmethod
+    def _check_resizable(dataset):
+        if dataset.maxshape[0] is not None or dataset.chunks is None:
+            msg = f"dataset {dataset.name} was not created as a chunked, resizable dataset"
+            raise ValueError(msg)
+
+    def __len__(self):
+        """The number of samples in the series, including samples not yet written"""
+        return self._data.shape[0] + self._n_buffered
+
+    def append(self, data, timestamps=None):
+        """Appends a block of samples to the series
+
+        Args:
+            data (array_like): a (n_samples, n_channels) array, or a single sample of shape
+                (n_channels,)
+            timestamps (array_like): the timestamp in seconds of each sample. Required if
+                the series has a timestamps dataset, otherwise it must be None.
+        """
+        data = np.asarray(data)
+        if data.ndim == 1:
+            data = data[np.newaxis, :]
+        if data.ndim != 2 or data.shape[1] != self.n_channels:
+            msg = (
+                f"data must have shape (n_samples, {self.n_channels}), not {data.shape}"
+            )
+            raise ValueError(msg)
+        if self._timestamps is None:
+            if timestamps is not None:
+                msg = "the series uses a sampling rate so timestamps cannot be appended"
+                raise ValueError(msg)
+        else:
+            if timestamps is None:
+                msg = "timestamps are required for a series with a timestamps dataset"
+                raise ValueError(msg)
+            timestamps = np.atleast_1d(np.asarray(timestamps, dtype=np.float64))
+            if timestamps.shape != (len(data),):
+                msg = f"expected {len(data)} timestamps, not {timestamps.shape[0]}"
+                raise ValueError(msg)
+
+        start = 0
+        while start < len(data):
+            n = min(self.chunk_size - self._n_buffered, len(data) - start)
+            source = slice(start, start + n)
+            target = slice(self._n_buffered, self._n_buffered + n)
+            self._data_buffer[target] = data[source]
+            if timestamps is not None:
+                self._timestamps_buffer[target] = timestamps[source]
+            self._n_buffered += n
+            start += n
+            if self._n_buffered == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Writes any buffered samples to the file and flushes it to disk"""
+        if self._n_buffered:
+            n = self._n_buffered
+            offset = self._data.shape[0]
+            self._data.resize(offset + n, axis=0)
+            self._data[offset:] = self._data_buffer[:n]
+            if self._timestamps is not None:
+                self._timestamps.resize(offset + n, axis=0)
+                self._timestamps[offset:] = self._timestamps_buffer[:n]
+            self._n_buffered = 0
+        self._file.flush()
+
+    def close(self):
+        """Writes any buffered samples and closes the file"""
+        if self._file.id.valid:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _find_group_by_object_id(file, object_id):
+    """Returns the HDF5 group in file with the given object_id attribute"""
+
+    def visit(name, obj):
+        if isinstance(obj, h5py.Group) and obj.attrs.get("object_id") == object_id:
+            return name
+
+    name = file.visititems(visit)
+    if name is None:
+        msg = f"no group with object_id {object_id} found in {file.filename}"
+        raise ValueError(msg)
+    return file[name]
+
+
+class DatasetChunkIterator(GenericDataChunkIterator):
+    """Iterates over an h5py dataset in blocks of whole samples
+
+    Used as the data of a container, the dataset is copied to the NWB file one block at a
+    time, with chunks of the same shape as the blocks. An iterator over an h5py dataset
+    can be pickled, so its blocks can be written by several processes at once by
+    backends which support it, such as Zarr (see ndx_nirs.zarr_io.write_zarr). An
+    unpickled iterator opens the file only while it reads a block, so the iterators sent
+    to the processes do not keep file handles open.
+    """
+
+    def __init__(self, dataset, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+        """
+        Args:
+            dataset (h5py.Dataset): the dataset to iterate over
+            chunk_size (int): the number of samples in each block
+            **kwargs: additional arguments to GenericDataChunkIterator, e.g.
+                display_progress
+        """
+        self.dataset = dataset
+        # the filename and name of the dataset of an unpickled iterator, or None
+        self._source = None
+        shape = (min(chunk_size, max(len(dataset), 1)), *dataset.shape[1:])
+        super().__init__(buffer_shape=shape, chunk_shape=shape, **kwargs)
+
+    @property
+    def nbytes(self):
+        """The number of bytes of the dataset"""
+        return int(np.prod(self.maxshape)) * self.dtype.itemsize
+
+    def _get_data(self, selection):
+        if self._source is None:
+            return self.dataset[selection]
+        filename, name = self._source
+        with h5py.File(filename, "r") as f:
+            return f[name][selection]
+
+    def _to_dict(self):
+        # an iterator over an h5py dataset is pickled as the path of its file, so that it
+        # can be sent to the processes of a parallel write, which reopen the file
+        if self._source is not None:
+            filename, name = self._source
+        elif isinstance(self.dataset, h5py.Dataset):
+            filename, name = self.dataset.file.filename, self.dataset.name
+        else:
+            msg = f"only a {type(self).__name__} over an h5py dataset can be pickled"
+            raise TypeError(msg)
+        return dict(filename=filename, name=name, chunk_size=self.buffer_shape[0])
+
+    @classmethod
+    def _from_dict(cls, dictionary):
+        filename, name = dictionary["filename"], dictionary["name"]
+        with h5py.File(filename, "r") as f:
+            iterator = cls(f[name], chunk_size=dictionary["chunk_size"])
+        iterator.dataset = None
+        iterator._source = (filename, name)
+        return iterator
+
+    def _get_maxshape(self):
+        return self.dataset.shape
+
+    def _get_dtype(self):
+        return self.dataset.dtype
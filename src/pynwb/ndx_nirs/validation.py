@@ -0,0 +1,303 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from hdmf.data_utils import DataIO
+
+# the optional columns of a NIRSChannelsTable, besides wavelengths, which must be finite
+_CHANNEL_FLOAT_COLUMNS = ("source_power", "detector_gain")
+
+
+@dataclass(frozen=True)
+class ValidationProblem:
+    """A problem found in a NIRS table or series
+
+    Attributes:
+        code (str): the kind of problem, e.g. "index_out_of_range" or
+            "duplicate_channel"
+        container (str): the name of the table or series with the problem, prefixed by the
+            name of its device for device tables, e.g. "device/channels"
+        message (str): a description of the problem
+        column (str): the column or dataset with the problem, or None
+        rows (tuple): the rows (or data columns) with the problem, if any
+    """
+
+    code: str
+    container: str
+    message: str
+    column: str = None
+    rows: tuple = field(default=())
+
+    def as_dict(self):
+        """Returns the problem as a dict of plain values, e.g. to serialize it to JSON"""
+        return dict(
+            code=self.code,
+            container=self.container,
+            message=self.message,
+            column=self.column,
+            rows=list(self.rows),
+        )
+
+
+def validate_nwbfile(nwbfile):
+    """Checks every NIRSDevice and NIRSSeries of an NWB file
+
+    Returns:
+        list: the ValidationProblems found, which is empty if the file has no problems
+    """
+    from ndx_nirs import NIRSDevice, NIRSSeries
+
+    problems = []
+    for container in nwbfile.objects.values():
+        if isinstance(container, NIRSDevice):
+            problems.extend(validate_device(container))
+        elif isinstance(container, NIRSSeries):
+            problems.extend(validate_series(container))
+    return problems
+
+
+def validate_device(device):
+    """Checks the sources, detectors and channels tables of a NIRSDevice
+
+    Each check runs over whole columns at once, so a device with tens of thousands of
+    channels is checked in milliseconds. The checks are:
+      - non_finite_coordinate: optodes with a NaN or infinite x, y or z coordinate,
+      - duplicate_label: optodes or channels with the same label as another one,
+      - table_mismatch: a source or detector column of the channels table which does
+        not reference the sources or detectors table of the device,
+      - index_out_of_range: channels whose source or detector index is not a row of the
+        referenced table,
+      - duplicate_channel: channels with the same source, detector, source wavelength
+        (and emission wavelength, if present) as another channel,
+      - invalid_wavelength: channels with a NaN, infinite or non-positive source or
+        emission wavelength, and
+      - non_finite_value: channels with a NaN or infinite source power or detector gain.
+
+    Returns:
+        list: the ValidationProblems found, which is empty if the device has no problems
+    """
+    problems = []
+    for table in (device.sources, device.detectors):
+        name = f"{device.name}/{table.name}"
+        for axis in ("x", "y", "z"):
+            if axis in table.colnames:
+                values = np.asarray(table[axis].data[:], dtype=np.float64)
+                problems.extend(
+                    _rows_problem(
+                        "non_finite_coordinate",
+                        name,
+                        axis,
+                        ~np.isfinite(values),
+                        "coordinates are not finite",
+                    )
+                )
+        problems.extend(_duplicate_labels(table, name))
+
+    channels = device.channels
+    name = f"{device.name}/{channels.name}"
+    problems.extend(_duplicate_labels(channels, name))
+    optode_indices = []
+    for column, optodes in (("source", device.sources), ("detector", device.detectors)):
+        region = channels[column]
+        indices = np.asarray(region.data[:], dtype=np.int64)
+        optode_indices.append(indices)
+        if region.table is not optodes:
+            referenced = None if region.table is None else region.table.name
+            problems.append(
+                ValidationProblem(
+                    code="table_mismatch",
+                    container=name,
+                    column=column,
+                    message=(
+                        f"the {column} column references {referenced} instead of"
+                        f" {optodes.name} of {device.name}"
+                    ),
+                )
+            )
+        n_optodes = 0 if region.table is None else len(region.table)
+        problems.extend(
+            _rows_problem(
+                "index_out_of_range",
+                name,
+                column,
+                (indices < 0) | (indices >= n_optodes),
+                f"{column} indices are not rows of the {n_optodes} {column}s",
+            )
+        )
+
+    key = [*optode_indices, np.asarray(channels.source_wavelength.data[:], np.float64)]
+    for column in ("source_wavelength", "emission_wavelength"):
+        if column in channels.colnames:
+            values = np.asarray(channels[column].data[:], dtype=np.float64)
+            if column != "source_wavelength":
+                key.append(values)
+            problems.extend(
+                _rows_problem(
+                    "invalid_wavelength",
+                    name,
+                    column,
+                    ~(np.isfinite(values) & (values > 0)),
+                    f"{column} values are not finite positive wavelengths",
+                )
+            )
+    for column in _CHANNEL_FLOAT_COLUMNS:
+        if column in channels.colnames:
+            values = np.asarray(channels[column].data[:], dtype=np.float64)
+            problems.extend(
+                _rows_problem(
+                    "non_finite_value",
+                    name,
+                    column,
+                    ~np.isfinite(values),
+                    f"{column} values are not finite",
+                )
+            )
+    if len(channels):
+        problems.extend(
+            _rows_problem(
+                "duplicate_channel",
+                name,
+                None,
+                _duplicated(np.stack(key, axis=1)),
+                "channels have the same source, detector and wavelengths as another"
+                " channel",
+            )
+        )
+    return problems
+
+
+def validate_series(series):
+    """Checks that the data, timestamps and channels of a NIRSSeries are consistent
+
+    Only the shapes of the data and the timestamps are read from disk, along with the
+    channels region and the timestamps. The checks are:
+      - invalid_data_shape: data which is not 2D (time, channels),
+      - data_width_mismatch: a number of data columns which differs from the number
+        of channels referenced by the channels region,
+      - wrong_table_type: a channels region which does not reference a
+        NIRSChannelsTable,
+      - index_out_of_range: channels region rows which are not rows of the table,
+      - timestamps_length_mismatch: a number of timestamps which differs from the
+        number of samples, and
+      - timestamps_not_increasing: timestamps which are not strictly increasing, by
+        the sample after which time does not increase.
+
+    Returns:
+        list: the ValidationProblems found, which is empty if the series has no problems
+    """
+    from ndx_nirs import NIRSChannelsTable
+
+    problems = []
+    shape = _shape(series.data)
+    region = series.channels
+    rows = np.asarray(region.data[:], dtype=np.int64)
+    if len(shape) != 2:
+        problems.append(
+            ValidationProblem(
+                code="invalid_data_shape",
+                container=series.name,
+                column="data",
+                message=f"data has shape {shape} instead of (time, channels)",
+            )
+        )
+    elif shape[1] != len(rows):
+        problems.append(
+            ValidationProblem(
+                code="data_width_mismatch",
+                container=series.name,
+                column="data",
+                message=(
+                    f"data has {shape[1]} columns but the channels region references"
+                    f" {len(rows)} channels"
+                ),
+            )
+        )
+
+    if not isinstance(region.table, NIRSChannelsTable):
+        problems.append(
+            ValidationProblem(
+                code="wrong_table_type",
+                container=series.name,
+                column="channels",
+                message=(
+                    f"the channels region references a {type(region.table).__name__}"
+                    " instead of a NIRSChannelsTable"
+                ),
+            )
+        )
+    n_channels = 0 if region.table is None else len(region.table)
+    problems.extend(
+        _rows_problem(
+            "index_out_of_range",
+            series.name,
+            "channels",
+            (rows < 0) | (rows >= n_channels),
+            f"channels region rows are not rows of the {n_channels} channels",
+        )
+    )
+
+    if series.timestamps is not None and len(shape) > 0:
+        n_timestamps = _shape(series.timestamps)[0]
+        if n_timestamps != shape[0]:
+            problems.append(
+                ValidationProblem(
+                    code="timestamps_length_mismatch",
+                    container=series.name,
+                    column="timestamps",
+                    message=f"{n_timestamps} timestamps for {shape[0]} samples",
+                )
+            )
+        timestamps = np.asarray(series.timestamps[:], dtype=np.float64)
+        problems.extend(
+            _rows_problem(
+                "timestamps_not_increasing",
+                series.name,
+                "timestamps",
+                np.concatenate([np.diff(timestamps) <= 0, [False]]),
+                "timestamps do not increase after these samples",
+            )
+        )
+    return problems
+
+
+def _rows_problem(code, name, column, mask, message):
+    """Returns a problem listing the rows where mask is True, if there are any"""
+    rows = np.flatnonzero(mask)
+    if len(rows) == 0:
+        return []
+    return [
+        ValidationProblem(
+            code=code,
+            container=name,
+            column=column,
+            message=f"{len(rows)} {message}",
+            rows=tuple(rows.tolist()),
+        )
+    ]
+
+
+def _duplicated(keys):
+    """Returns a mask of the rows of keys which are equal to another row"""
+    _, inverse, counts = np.unique(
+        keys, axis=0 if keys.ndim > 1 else None, return_inverse=True, return_counts=True
+    )
+    return counts[inverse.reshape(-1)] > 1
+
+
+def _duplicate_labels(table, name):
+    if "label" not in table.colnames or len(table) == 0:
+        return []
+    labels = np.asarray(table.label.data[:])
+    return _rows_problem(
+        "duplicate_label",
+        name,
+        "label",
+        _duplicated(labels),
+        "labels are not unique",
+    )
+
+
+def _shape(data):
+    if isinstance(data, DataIO):
+        data = data.data
+    shape = getattr(data, "shape", None)
+    return tuple(shape) if shape is not None else np.shape(data)
@@ -0,0 +1,96 @@
+import numpy as np
+from hdmf.data_utils import GenericDataChunkIterator
+
+from ndx_nirs.layout import get_layout_preset, series_data_shape
+
+
+def _import_hdmf_zarr():
+    try:
+        import hdmf_zarr
+    except ImportError:
+        msg = (
+            "writing NWB files with Zarr requires hdmf-zarr: pip install ndx-nirs[zarr]"
+        )
+        raise ImportError(msg) from None
+    return hdmf_zarr
+
+
+def zarr_data_io(data, layout="balanced"):
+    """Wraps NIRSSeries data in a ZarrDataIO with the chunking and compression of a preset
+
+    This is the Zarr counterpart of layout_data_io. The gzip compression and shuffle
+    filter of the preset are applied with the equivalent numcodecs codecs. The chunks
+    have the shape of the preset, except for data given as a GenericDataChunkIterator,
+    whose chunks have the shape of the iterator's chunks so that the buffers written by
+    parallel jobs always cover whole Zarr chunks.
+
+    Args:
+        data (array_like or AbstractDataChunkIterator): the (time, channels) data
+        layout (str or LayoutPreset): the name of one of the LAYOUT_PRESETS
+            ("channel-major", "time-major" or "balanced") or a custom LayoutPreset
+
+    Returns:
+        ZarrDataIO: the wrapped data, to be passed as the data of a NIRSSeries
+    """
+    hdmf_zarr = _import_hdmf_zarr()
+    import numcodecs
+
+    layout = get_layout_preset(layout)
+    shape, dtype = series_data_shape(data)
+    itemsize = np.dtype(dtype).itemsize
+    if isinstance(data, GenericDataChunkIterator):
+        chunks = data.chunk_shape
+    else:
+        chunks = layout.chunk_shape(shape[0], shape[1], itemsize)
+    if layout.compression is None:
+        compressor = False
+    elif layout.compression == "gzip":
+        compressor = numcodecs.GZip(level=layout.compression_opts)
+    else:
+        msg = f"compression {layout.compression!r} is not supported with Zarr"
+        raise ValueError(msg)
+    filters = [numcodecs.Shuffle(elementsize=itemsize)] if layout.shuffle else None
+    return hdmf_zarr.ZarrDataIO(
+        data=data, chunks=tuple(chunks), compressor=compressor, filters=filters
+    )
+
+
+def write_zarr(nwbfile, path, jobs=1, multiprocessing_context=None):
+    """Writes an NWB file with NIRS data to a Zarr store with NWBZarrIO
+
+    The NIRS types are written and read by NWBZarrIO as with NWBHDF5IO. Unlike HDF5, a
+    Zarr store can be written by several processes at once, since each chunk is a
+    separate object. With jobs > 1, the data of each NIRSSeries (or any other dataset)
+    given as a picklable GenericDataChunkIterator, such as a DatasetChunkIterator over an
+    h5py dataset, is split into its buffers, which are written in parallel by a pool of
+    processes. Other data is written by the calling process.
+
+    Args:
+        nwbfile (NWBFile): the file to write
+        path (str): the path of the Zarr store to create
+        jobs (int): the number of processes writing chunks in parallel
+        multiprocessing_context (str): the start method of the processes, "fork" or
+            "spawn". Defaults to the platform's default.
+
+    Example:
+    ```python
+    with h5py.File("raw.h5", "r") as f:
+        series = NIRSSeries(
+            name="nirs_data",
+            data=DatasetChunkIterator(f["data"], chunk_size=4096),
+            ...
+        )
+        nwbfile.add_acquisition(series)
+        write_zarr(nwbfile, "session.nwb.zarr", jobs=4)
+
+    with NWBZarrIO("session.nwb.zarr", "r") as io:
+        series = io.read().acquisition["nirs_data"]
+    ```
+    """
+    hdmf_zarr = _import_hdmf_zarr()
+    with hdmf_zarr.NWBZarrIO(path, "w") as io:
+        io.write(
+            nwbfile,
+            number_of_jobs=jobs,
+            multiprocessing_context=multiprocessing_context,
+        )
@@ -0,0 +1,18 @@
+import pytest
+from pynwb import NWBHDF5IO
+
+from .test_ndx_nirs import setup_nwbfile
+
+
+@pytest.fixture
+def nwb_path(tmp_path):
+    """Returns the path of an NWB file in a temporary directory, which does not exist"""
+    return str(tmp_path / "test.nwb")
+
+
+@pytest.fixture
+def written_nwb_path(nwb_path):
+    """Returns the path of an NWB file with the device and series of setup_nwbfile"""
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(setup_nwbfile())
+    return nwb_path
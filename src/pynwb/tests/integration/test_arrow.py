@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+
+from ndx_nirs import channels_to_arrow
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_series_ipc_stream_from_file(written_nwb_path, tmp_path):
+    """Verify that a series read from a file is streamed to an Arrow IPC stream in
+    batches, and read back with the same times and data
+    """
+    stream_path = str(tmp_path / "nirs_data.arrows")
+    with NWBHDF5IO(written_nwb_path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        data, timestamps = series.data[:], series.timestamps[:]
+        batches = series.to_record_batches(chunk_size=300)
+        first = next(batches)
+        with pa.OSFile(stream_path, "wb") as sink:
+            with pa.ipc.new_stream(sink, first.schema) as writer:
+                writer.write_batch(first)
+                for batch in batches:
+                    writer.write_batch(batch)
+
+    with pa.memory_map(stream_path) as source:
+        table = pa.ipc.open_stream(source).read_all()
+    assert table.num_rows == len(data)
+    assert table.column_names[1:3] == ["CH0", "CH1"]
+    np.testing.assert_array_equal(table.column("timestamp").to_numpy(), timestamps)
+    np.testing.assert_array_equal(
+        np.column_stack([column.to_numpy() for column in table.columns[1:]]), data
+    )
+
+
+def test_series_list_layout_from_file(written_nwb_path):
+    """Verify that the list layout of contiguous data on disk, which is read from a memory
+    map of the file, holds the values of each sample
+    """
+    with NWBHDF5IO(written_nwb_path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        assert isinstance(series.memmap_data(), np.memmap)
+        batches = list(series.to_record_batches(chunk_size=700, layout="list"))
+        assert [batch.num_rows for batch in batches] == [700, 700, 600]
+        values = batches[1].column("data").flatten().to_numpy()
+        np.testing.assert_array_equal(values.reshape(700, -1), series.data[700:1400])
+
+
+def test_channels_to_arrow_from_file(written_nwb_path):
+    """Verify that the channels read from a file are flattened with their optodes"""
+    with NWBHDF5IO(written_nwb_path, "r") as io:
+        channels = io.read().devices["device"].channels
+        table = channels_to_arrow(channels)
+    assert table.column("label").to_pylist()[:2] == ["CH0", "CH1"]
+    assert table.column("detector_label").to_pylist() == [
+        "D1",
+        "D1",
+        "D2",
+        "D2",
+        "D2",
+        "D2",
+        "D3",
+        "D3",
+    ]
+    assert table.column("source_y").to_pylist()[-1] == 1.0
@@ -0,0 +1,139 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+
+from ndx_nirs import cli
+from ndx_nirs.cli import convert, convert_file, main, output_path
+
+from .test_snirf import create_snirf_file
+
+
+def create_recordings(directory, n_recordings):
+    """Writes SNIRF files with random data and returns the data of each"""
+    directory.mkdir(exist_ok=True)
+    recordings = {}
+    for index in range(n_recordings):
+        path = str(directory / f"session{index}.snirf")
+        recordings[path] = np.random.rand(40 + index, 8)
+        create_snirf_file(path, recordings[path])
+    return recordings
+
+
+def test_convert_in_parallel(tmp_path):
+    """Verify that all recordings are converted and that existing outputs are skipped
+    when the batch is run again
+    """
+    recordings = create_recordings(tmp_path / "raw", 3)
+    output_dir = str(tmp_path / "nwb")
+    out = io.StringIO()
+    results = convert([str(tmp_path / "raw" / "*.snirf")], output_dir, jobs=2, out=out)
+
+    assert sorted(result["path"] for result in results) == sorted(recordings)
+    assert all(result["status"] == "converted" for result in results)
+    assert sum(result["bytes"] for result in results) == sum(
+        data.nbytes for data in recordings.values()
+    )
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    assert lines[-1].startswith("3 converted, 0 skipped, 0 failed")
+    for path, data in recordings.items():
+        with NWBHDF5IO(output_path(path, output_dir), "r") as nwb_io:
+            np.testing.assert_array_equal(
+                nwb_io.read().acquisition["nirs_data"].data[:], data
+            )
+
+    results = convert(
+        [str(tmp_path / "raw" / "*.snirf")], output_dir, out=io.StringIO()
+    )
+    assert all(result["status"] == "skipped" for result in results)
+
+
+def test_failures_are_isolated(tmp_path, capsys):
+    """Verify that a recording which fails to convert does not stop the others and does
+    not leave a partial output
+    """
+    recordings = create_recordings(tmp_path, 2)
+    broken = tmp_path / "broken.snirf"
+    broken.write_bytes(b"not an HDF5 file")
+
+    assert main([str(tmp_path / "*.snirf"), "--jobs", "2"]) == 1
+    summary = capsys.readouterr().out.splitlines()[-1]
+    assert summary.startswith("2 converted, 0 skipped, 1 failed")
+    assert sorted(os.listdir(tmp_path)) == [
+        "broken.snirf",
+        "session0.nwb",
+        "session0.snirf",
+        "session1.nwb",
+        "session1.snirf",
+    ]
+    for path in recordings:
+        assert os.path.exists(output_path(path))
+
+
+def test_convert_keeps_subdirectories(tmp_path):
+    """Verify that inputs with the same name in different directories are converted to
+    the same subdirectories of the output directory
+    """
+    (tmp_path / "data").mkdir()
+    first = create_recordings(tmp_path / "data" / "a", 1)
+    second = create_recordings(tmp_path / "data" / "b", 1)
+    output_dir = tmp_path / "nwb"
+    pattern = str(tmp_path / "data" / "**" / "*.snirf")
+    results = convert([pattern], str(output_dir), jobs=2, out=io.StringIO())
+
+    assert [result["status"] for result in results] == ["converted"] * 2
+    for directory, recordings in [("a", first), ("b", second)]:
+        data = next(iter(recordings.values()))
+        with NWBHDF5IO(str(output_dir / directory / "session0.nwb"), "r") as nwb_io:
+            np.testing.assert_array_equal(
+                nwb_io.read().acquisition["nirs_data"].data[:], data
+            )
+
+
+def test_duplicate_outputs_are_rejected(tmp_path, capsys):
+    """Verify that inputs which would be converted to the same NWB file are rejected
+    before any file is converted
+    """
+    paths = [
+        *create_recordings(tmp_path / "a", 1),
+        *create_recordings(tmp_path / "b", 1),
+    ]
+    output_dir = tmp_path / "nwb"
+    with pytest.raises(SystemExit) as raised:
+        main([*paths, "-o", str(output_dir)])
+    assert raised.value.code == 2
+    assert "session0.nwb from" in capsys.readouterr().err
+    assert not output_dir.exists()
+
+
+def crash_on_broken(snirf_path, nwb_path, chunk_size):
+    """Converts a file like convert_file, but kills its process for "broken" files"""
+    if "broken" in os.path.basename(snirf_path):
+        os._exit(1)
+    return convert_file(snirf_path, nwb_path, chunk_size)
+
+
+def test_crashed_process_is_reported(tmp_path, monkeypatch):
+    """Verify that the crash of a conversion process is reported as a failed conversion
+    of its file only, and that the other files are still converted
+    """
+    recordings = create_recordings(tmp_path, 3)
+    (tmp_path / "broken.snirf").write_bytes(b"")
+    monkeypatch.setattr(cli, "convert_file", crash_on_broken)
+    results = convert([str(tmp_path / "*.snirf")], jobs=1, out=io.StringIO())
+
+    assert len(results) == 4
+    statuses = {result["path"]: result["status"] for result in results}
+    assert statuses.pop(str(tmp_path / "broken.snirf")) == "failed"
+    assert statuses == dict.fromkeys(recordings, "converted")
+    failed = next(result for result in results if result["status"] == "failed")
+    assert failed["error"].startswith("BrokenProcessPool")
+    assert not (tmp_path / "broken.nwb.part").exists()
+    for path, data in recordings.items():
+        with NWBHDF5IO(output_path(path), "r") as nwb_io:
+            np.testing.assert_array_equal(
+                nwb_io.read().acquisition["nirs_data"].data[:], data
+            )
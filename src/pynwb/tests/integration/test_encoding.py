@@ -0,0 +1,130 @@
+import h5py
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+
+from ndx_nirs import add_overview, write_zarr
+
+from .test_mappers import validate_file
+from .test_ndx_nirs import setup_nwbfile
+
+# the path of the channels table of the device
+CHANNELS = "general/devices/device/channels"
+
+
+def setup_compact_nwbfile():
+    nwbfile = setup_nwbfile()
+    device = nwbfile.devices["device"]
+    for table in (device.sources, device.detectors, device.channels):
+        table.compact = True
+    return nwbfile
+
+
+def read_values(table):
+    return {name: list(table[name].data[:]) for name in table.colnames}
+
+
+def test_compact_tables_roundtrip(nwb_path):
+    """Verify that compact tables are written with fixed-length labels and
+    dictionary-encoded wavelengths, and read back with the same values
+    """
+    nwbfile = setup_compact_nwbfile()
+    device = nwbfile.devices["device"]
+    expected = [read_values(table) for table in (device.sources, device.channels)]
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(nwbfile)
+    assert read_values(device.channels) == expected[1]
+
+    with h5py.File(nwb_path, "r") as f:
+        channels = f[CHANNELS]
+        assert channels["label"].dtype == h5py.string_dtype("utf-8", 3)
+        assert f["general/devices/device/sources/label"].dtype.kind == "S"
+        wavelengths = channels["source_wavelength"]
+        assert wavelengths.dtype == np.uint8
+        assert wavelengths.attrs["neurodata_type"] == "EnumData"
+        elements = f[wavelengths.attrs["elements"]]
+        assert elements.name == f"/{CHANNELS}/source_wavelength_elements"
+        np.testing.assert_array_equal(elements, [690.0, 830.0])
+
+    with NWBHDF5IO(nwb_path, "r") as io:
+        device = io.read().devices["device"]
+        assert device.channels.compact and device.sources.compact
+        assert device.channels.colnames == (
+            "label",
+            "source",
+            "detector",
+            "source_wavelength",
+        )
+        assert [read_values(device.sources), read_values(device.channels)] == expected
+        assert device.channels.label.data[2] == "CH2"
+        assert device.channels.find_channels(source_wavelength=830.0).tolist() == [
+            1,
+            3,
+            5,
+            7,
+        ]
+
+
+def test_compact_file_is_valid(nwb_path):
+    """Verify that a file with compact tables passes the pynwb validator"""
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(setup_compact_nwbfile())
+    returncode, output = validate_file(nwb_path)
+    assert returncode == 0, output
+    assert "no errors found" in output
+
+
+def test_wavelengths_are_written_as_floats(nwb_path):
+    """Verify that the wavelengths of tables which are not compact are written as floats,
+    even if they were given as integers
+    """
+    nwbfile = setup_nwbfile()
+    channels = nwbfile.devices["device"].channels
+    channels.source_wavelength.transform(lambda data: [int(value) for value in data])
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(nwbfile)
+
+    with h5py.File(nwb_path, "r") as f:
+        assert f[f"{CHANNELS}/source_wavelength"].dtype == np.float64
+        assert f[f"{CHANNELS}/label"].dtype.kind == "O"
+    with NWBHDF5IO(nwb_path, "r") as io:
+        assert not io.read().devices["device"].channels.compact
+
+
+def test_compact_tables_in_append_mode_and_export(nwb_path, tmp_path):
+    """Verify that a file with compact tables can be appended to and exported"""
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(setup_compact_nwbfile())
+    with NWBHDF5IO(nwb_path, "r") as io:
+        object_id = io.read().acquisition["nirs_data"].object_id
+    add_overview(nwb_path, object_id)
+
+    export_path = str(tmp_path / "export.nwb")
+    with NWBHDF5IO(nwb_path, "r") as io:
+        nwbfile = io.read()
+        assert "nirs_data_overview" in nwbfile.processing
+        with NWBHDF5IO(export_path, "w") as export_io:
+            export_io.export(src_io=io, nwbfile=nwbfile)
+
+    with h5py.File(export_path, "r") as f:
+        assert f[f"{CHANNELS}/source_wavelength"].attrs["neurodata_type"] == "EnumData"
+    with NWBHDF5IO(export_path, "r") as io:
+        channels = io.read().devices["device"].channels
+        np.testing.assert_array_equal(
+            channels.source_wavelength.data, [690.0, 830.0] * 4
+        )
+        assert list(channels.label.data[:2]) == ["CH0", "CH1"]
+
+
+def test_compact_tables_zarr_roundtrip(tmp_path):
+    """Verify that compact tables are read back from a Zarr store with the same values"""
+    hdmf_zarr = pytest.importorskip("hdmf_zarr")
+    nwbfile = setup_compact_nwbfile()
+    expected = read_values(nwbfile.devices["device"].channels)
+    path = str(tmp_path / "test.nwb.zarr")
+    write_zarr(nwbfile, path)
+
+    with hdmf_zarr.NWBZarrIO(path, "r") as io:
+        channels = io.read().devices["device"].channels
+        assert channels.compact
+        assert read_values(channels) == expected
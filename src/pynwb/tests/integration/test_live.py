@@ -0,0 +1,72 @@
+import socket
+import threading
+
+import numpy as np
+from pynwb import NWBHDF5IO
+
+from ndx_nirs import LiveIngest, NIRSSeriesWriter, QueueSource, SocketSource, pack_frame
+
+from .test_ndx_nirs import setup_nwbfile
+from .test_streaming import create_streaming_nirs_series
+
+
+def write_streaming_file(path, **kwargs):
+    nwbfile = setup_nwbfile()
+    series = create_streaming_nirs_series(nwbfile.devices["device"], **kwargs)
+    nwbfile.add_acquisition(series)
+    with NWBHDF5IO(path, "w") as io:
+        io.write(nwbfile)
+    return series
+
+
+def test_ingest_from_queue_to_file(tmp_path):
+    """Verify that samples put on a queue by an acquisition thread are written to the
+    series, and that the file holds every flushed block while the ingest runs
+    """
+    path = str(tmp_path / "live.nwb")
+    series = write_streaming_file(path, chunk_size=16)
+    n_channels = len(series.channels)
+    data = np.random.rand(200, n_channels)
+    timestamps = np.arange(200) * 0.1
+
+    source = QueueSource()
+
+    def acquire():
+        for block in np.split(np.arange(200), 40):
+            source.put(data[block], timestamps[block])
+        source.close()
+
+    with NIRSSeriesWriter(path, series) as writer:
+        with LiveIngest(writer, source, window=256) as ingest:
+            threading.Thread(target=acquire).start()
+            assert ingest.wait(10)
+            np.testing.assert_array_equal(ingest.latest(10)[1], data[-10:])
+        stats = ingest.stats()
+
+    assert stats.flushed_samples == 200 and stats.dropped_samples == 0
+    with NWBHDF5IO(path, "r") as io:
+        read_series = io.read().acquisition["streamed_nirs_data"]
+        np.testing.assert_array_equal(read_series.data[:], data)
+        np.testing.assert_array_equal(read_series.timestamps[:], timestamps)
+
+
+def test_ingest_from_socket_to_file(tmp_path):
+    """Verify that frames sent over a socket are written to a series with a rate"""
+    path = str(tmp_path / "live.nwb")
+    series = write_streaming_file(path, chunk_size=8, rate=10.0)
+    n_channels = len(series.channels)
+    data = np.random.rand(50, n_channels)
+
+    receiver, sender = socket.socketpair()
+    with receiver, NIRSSeriesWriter(path, series) as writer:
+        with LiveIngest(writer, SocketSource(receiver, n_channels)) as ingest:
+            for start in range(0, 50, 10):
+                block = slice(start, start + 10)
+                sender.sendall(pack_frame(data[block], np.arange(50)[block] / 10.0))
+            sender.close()
+            assert ingest.wait(10)
+
+    with NWBHDF5IO(path, "r") as io:
+        read_series = io.read().acquisition["streamed_nirs_data"]
+        np.testing.assert_array_equal(read_series.data[:], data)
+        assert read_series.timestamps is None
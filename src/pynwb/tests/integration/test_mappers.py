@@ -0,0 +1,74 @@
+import subprocess
+import sys
+
+import h5py
+import numpy as np
+from pynwb import NWBHDF5IO
+
+from .test_ndx_nirs import setup_nwbfile
+
+# the paths of the datasets of the DynamicTableRegions with compact dtypes
+SOURCE = "general/devices/device/channels/source"
+DETECTOR = "general/devices/device/channels/detector"
+CHANNELS = "acquisition/nirs_data/channels"
+
+
+def test_region_indices_are_written_with_compact_dtypes(nwb_path):
+    """Verify that the source, detector and channels regions are written as int32, read
+    back with the same values, and that the written containers keep their data
+    """
+    nwbfile = setup_nwbfile()
+    channels = nwbfile.devices["device"].channels
+    sources = list(channels.source.data)
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(nwbfile)
+    assert channels.source.data == sources
+
+    with h5py.File(nwb_path, "r") as f:
+        for path in (SOURCE, DETECTOR, CHANNELS):
+            assert f[path].dtype == np.int32
+    with NWBHDF5IO(nwb_path, "r") as io:
+        read = io.read()
+        np.testing.assert_array_equal(
+            read.devices["device"].channels.source.data[:], sources
+        )
+        series = read.acquisition["nirs_data"]
+        np.testing.assert_array_equal(series.channels.data[:], range(8))
+        assert series.find_columns(source=1).tolist() == [4, 5, 6, 7]
+
+
+def validate_file(path):
+    """Runs the pynwb validator on an NWB file with the namespaces cached in it and
+    returns its exit code and output
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "pynwb.validate", path], capture_output=True, text=True
+    )
+    return result.returncode, result.stdout + result.stderr
+
+
+def test_written_file_is_valid(nwb_path):
+    """Verify that a file with compact region indices passes the pynwb validator"""
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(setup_nwbfile())
+    returncode, output = validate_file(nwb_path)
+    assert returncode == 0, output
+    assert "no errors found" in output
+
+
+def test_read_files_with_int64_region_indices(nwb_path):
+    """Verify that files written with 64-bit signed region indices are still read"""
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(setup_nwbfile())
+    with h5py.File(nwb_path, "a") as f:
+        for path in (SOURCE, DETECTOR, CHANNELS):
+            values, attrs = f[path][:], dict(f[path].attrs)
+            del f[path]
+            f.create_dataset(path, data=values.astype(np.int64))
+            f[path].attrs.update(attrs)
+
+    with NWBHDF5IO(nwb_path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        assert series.channels.data.dtype == np.int64
+        assert series.channels.table.source.data.dtype == np.int64
+        assert series.find_columns(source=1, detector=2).tolist() == [6, 7]
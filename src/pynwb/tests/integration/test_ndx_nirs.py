@@ -2,11 +2,13 @@ import datetime
 import tempfile
 from os import path
 
+import h5py
 import numpy as np
 
 from pynwb import NWBHDF5IO
 from pynwb.file import NWBFile, Subject
 from pynwb.testing import TestCase, remove_test_file
+from hdmf.backends.hdf5 import H5DataIO
 from hdmf.common import DynamicTableRegion
 
 from ndx_nirs import (
@@ -15,6 +17,12 @@ from ndx_nirs import (
     NIRSSourcesTable,
     NIRSDetectorsTable,
     NIRSChannelsTable,
+    HemoglobinConverter,
+    add_hemoglobin_series,
+    concatenate_series,
+    layout_data_io,
+    profile,
+    validate_nwbfile,
 )
 
 
@@ -128,3 +136,227 @@ class NIRSIntegrationTests(TestCase):
             device = read_nwb.devices["device"]
             self.assertIs(device.channels.source.table, device.sources)
             self.assertIs(device.channels.detector.table, device.detectors)
+
+    def test_get_channel_data_after_read(self):
+        """Verify that channel data is read lazily from disk for the selected channels"""
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            read_series = io.read().acquisition["nirs_data"]
+            self.assertIsInstance(read_series, NIRSSeries)
+            expected = self.nwb.acquisition["nirs_data"].data
+            np.testing.assert_array_equal(
+                read_series.get_channel_data(source_wavelength=830.0),
+                expected[:, 1::2],
+            )
+            np.testing.assert_array_equal(
+                read_series.get_channel_data(source="S2"), expected[:, 4:]
+            )
+            np.testing.assert_array_equal(
+                read_series.get_channel_data(labels=["CH7", "CH2", "CH3"]),
+                expected[:, [2, 3, 7]],
+            )
+
+    def test_get_time_window_after_read(self):
+        """Verify that a time window is read from disk by searching the timestamps"""
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            read_series = io.read().acquisition["nirs_data"]
+            expected = self.nwb.acquisition["nirs_data"].data
+            self.assertEqual(
+                read_series.find_samples(start_time=10.0, stop_time=20.0),
+                slice(200, 400),
+            )
+            np.testing.assert_array_equal(
+                read_series.get_time_window(start_time=10.0, stop_time=20.0),
+                expected[200:400],
+            )
+            np.testing.assert_array_equal(
+                read_series.get_time_window(start_time=99.0, source="S2"),
+                expected[1980:, 4:],
+            )
+
+    def test_memmap_after_read(self):
+        """Verify that contiguous data and timestamps are memory-mapped and compressed
+        data falls back to the dataset
+        """
+        series = self.nwb.acquisition["nirs_data"]
+        self.nwb.add_acquisition(
+            NIRSSeries(
+                name="compressed_nirs_data",
+                description="The compressed NIRS channel data",
+                timestamps=series,
+                channels=DynamicTableRegion(
+                    name="channels",
+                    description="an ordered map to the channels in this NIRS series",
+                    table=series.channels.table,
+                    data=series.channels.data,
+                ),
+                data=H5DataIO(series.data, compression="gzip"),
+                unit="V",
+            )
+        )
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            acquisition = io.read().acquisition
+            data = acquisition["nirs_data"].memmap_data()
+            timestamps = acquisition["nirs_data"].memmap_timestamps()
+            self.assertIsInstance(data, np.memmap)
+            self.assertIsInstance(timestamps, np.memmap)
+            compressed = acquisition["compressed_nirs_data"]
+            self.assertIs(compressed.memmap_data(), compressed.data)
+        # the memory maps remain valid after the file is closed
+        np.testing.assert_array_equal(data, series.data)
+        np.testing.assert_array_equal(timestamps, series.timestamps)
+
+    def test_layout_preset_roundtrip(self):
+        """Verify that data written with a layout preset keeps its chunks and compression"""
+        series = self.nwb.acquisition["nirs_data"]
+        self.nwb.add_acquisition(
+            NIRSSeries(
+                name="channel_major_nirs_data",
+                description="The NIRS channel data, chunked by channel",
+                timestamps=series,
+                channels=DynamicTableRegion(
+                    name="channels",
+                    description="an ordered map to the channels in this NIRS series",
+                    table=series.channels.table,
+                    data=series.channels.data,
+                ),
+                data=layout_data_io(series.data, "channel-major"),
+                unit="V",
+            )
+        )
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            data = io.read().acquisition["channel_major_nirs_data"].data
+            self.assertEqual(data.chunks, (len(series.data), 1))
+            self.assertEqual(data.compression, "gzip")
+            np.testing.assert_array_equal(data[:], series.data)
+
+    def test_add_hemoglobin_series_to_file(self):
+        """Verify that the HbO and HbR series are computed from the raw data on disk and
+        written to a processing module of the same file
+        """
+        series = self.nwb.acquisition["nirs_data"]
+        expected = HemoglobinConverter(series)
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+        with NWBHDF5IO(self.path, "a") as io:
+            nwbfile = io.read()
+            add_hemoglobin_series(
+                nwbfile, nwbfile.acquisition["nirs_data"], chunk_size=300
+            )
+            io.write(nwbfile)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            nwbfile = io.read()
+            module = nwbfile.processing["nirs"]
+            hbo, hbr = expected.convert(series.data)
+            np.testing.assert_allclose(module["HbO"].data[:], hbo)
+            np.testing.assert_allclose(module["HbR"].data[:], hbr)
+            self.assertEqual(module["HbO"].data.chunks, (300, 4))
+            np.testing.assert_array_equal(
+                module["HbR"].timestamps[:], series.timestamps
+            )
+            np.testing.assert_array_equal(module["HbR"].channels.data[:], [0, 2, 4, 6])
+
+    def test_concatenate_series_in_file(self):
+        """Verify that runs read from a file are concatenated into a series written to
+        the same file, chunk by chunk
+        """
+        first = self.nwb.acquisition["nirs_data"]
+        self.nwb.add_acquisition(
+            NIRSSeries(
+                name="second_run",
+                description="A second run of NIRS data",
+                starting_time=0.0,
+                rate=20.0,
+                channels=DynamicTableRegion(
+                    name="channels",
+                    description="the channels of the run",
+                    table=first.channels.table,
+                    data=first.channels.data,
+                ),
+                data=H5DataIO(np.random.rand(500, 8), chunks=(64, 8)),
+                unit="V",
+            )
+        )
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+        with NWBHDF5IO(self.path, "a") as io:
+            nwbfile = io.read()
+            runs = [nwbfile.acquisition["nirs_data"], nwbfile.acquisition["second_run"]]
+            nwbfile.add_acquisition(
+                concatenate_series(
+                    runs, name="all_runs", time_offsets=[0.0, 200.0], chunk_size=300
+                )
+            )
+            io.write(nwbfile)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            nwbfile = io.read()
+            series = nwbfile.acquisition["all_runs"]
+            second = self.nwb.acquisition["second_run"].data.data
+            np.testing.assert_array_equal(
+                series.data[:], np.concatenate([first.data, second])
+            )
+            np.testing.assert_allclose(
+                series.timestamps[:],
+                np.concatenate([first.timestamps, 200.0 + np.arange(500) / 20.0]),
+            )
+            self.assertEqual(series.data.chunks, (300, 8))
+            self.assertIs(series.channels.table, nwbfile.devices["device"].channels)
+
+    def test_profile_write_and_read(self):
+        """Verify that the object mapping and HDF5 I/O of a write and a read are
+        recorded, with the datasets created and their size
+        """
+        with profile() as report:
+            with NWBHDF5IO(self.path, "w") as io:
+                io.write(self.nwb)
+            with NWBHDF5IO(self.path, "r") as io:
+                io.read()
+
+        for phase in ("build", "construct", "hdf5.write", "hdf5.read"):
+            self.assertGreater(report.phases[phase].seconds, 0)
+        self.assertEqual(report.phases["hdf5.write"].calls, 1)
+        self.assertGreater(report.phases["construct"].calls, 4)
+        self.assertEqual(report.phases["init.NIRSSeries"].calls, 1)
+        self.assertEqual(report.phases["init.NIRSDevice"].calls, 1)
+        self.assertGreater(report.counters["datasets_created"], 10)
+        self.assertGreater(
+            report.counters["bytes_written"],
+            self.nwb.acquisition["nirs_data"].data.nbytes,
+        )
+
+    def test_validate_nwbfile_read_from_disk(self):
+        """Verify that the device and series of a file are validated from the datasets
+        read from disk
+        """
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+        with NWBHDF5IO(self.path, "r") as io:
+            self.assertEqual(validate_nwbfile(io.read()), [])
+
+        with h5py.File(self.path, "a") as f:
+            f["general/devices/device/channels/detector"][5] = 3
+            f["general/devices/device/sources/x"][1] = np.nan
+        with NWBHDF5IO(self.path, "r") as io:
+            problems = validate_nwbfile(io.read())
+        self.assertEqual(
+            [(problem.code, problem.column, problem.rows) for problem in problems],
+            [
+                ("non_finite_coordinate", "x", (1,)),
+                ("index_out_of_range", "detector", (5,)),
+            ],
+        )
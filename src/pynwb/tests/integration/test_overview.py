@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+from hdmf.common import DynamicTableRegion
+from pynwb import NWBHDF5IO
+
+from ndx_nirs import NIRSSeries, add_overview
+
+from ..unit.test_overview import expected_level
+from .test_ndx_nirs import setup_nwbfile
+
+
+@pytest.fixture
+def series_path(nwb_path):
+    """Returns the path of an NWB file with a NIRSSeries with timestamps ("nirs_data")
+    and a regularly sampled NIRSSeries of integers ("regular_nirs_data")
+    """
+    nwbfile = setup_nwbfile()
+    raw = nwbfile.acquisition["nirs_data"]
+    nwbfile.add_acquisition(
+        NIRSSeries(
+            name="regular_nirs_data",
+            description="A regularly sampled NIRS series",
+            starting_time=5.0,
+            rate=10.0,
+            channels=DynamicTableRegion(
+                name="channels",
+                description="the channels of the series",
+                table=raw.channels.table,
+                data=raw.channels.data,
+            ),
+            data=np.random.default_rng(0).integers(0, 1000, size=(3000, 8)),
+            unit="V",
+        )
+    )
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(nwbfile)
+    return nwb_path
+
+
+def test_add_overview_with_timestamps(series_path):
+    """Verify that each level of the overview holds the min, max and mean of the bins of
+    the data, with the timestamps of the first sample of each bin
+    """
+    with NWBHDF5IO(series_path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        data, timestamps = series.data[:], series.timestamps[:]
+        object_id = series.object_id
+
+    factors = add_overview(series_path, object_id, min_factor=8, chunk_size=100)
+    assert factors == [8, 16, 32, 64, 128, 256, 512, 1024, 2048]
+
+    with NWBHDF5IO(series_path, "r") as io:
+        nwbfile = io.read()
+        module = nwbfile.processing["nirs_data_overview"]
+        assert sorted(module.data_interfaces) == sorted(
+            f"decimation_{factor}" for factor in factors
+        )
+        for factor in factors:
+            level = module[f"decimation_{factor}"]
+            np.testing.assert_allclose(level.data[:], expected_level(data, factor))
+            np.testing.assert_array_equal(level.timestamps[:], timestamps[::factor])
+            assert level.unit == "V"
+        assert module["decimation_8"].data.chunks == (12, 8, 3)
+
+
+def test_add_overview_with_rate(series_path):
+    """Verify that the levels of a regularly sampled series have a decimated rate, and
+    that the means of integer data are stored as floats
+    """
+    with NWBHDF5IO(series_path, "r") as io:
+        series = io.read().acquisition["regular_nirs_data"]
+        data = series.data[:]
+    add_overview(series_path, series, min_factor=16)
+
+    with NWBHDF5IO(series_path, "r") as io:
+        module = io.read().processing["regular_nirs_data_overview"]
+        level = module["decimation_64"]
+        assert (level.rate, level.starting_time) == (10.0 / 64, 5.0)
+        assert level.timestamps is None
+        assert level.data.dtype == np.float64
+        np.testing.assert_allclose(level.data[:], expected_level(data, 64))
+
+
+def test_get_overview(series_path):
+    """Verify that the coarsest level with enough bins for the time span is read, and
+    that raw samples are read when no level is fine enough
+    """
+    with NWBHDF5IO(series_path, "r") as io:
+        series = io.read().acquisition["regular_nirs_data"]
+    add_overview(series_path, series)
+
+    with NWBHDF5IO(series_path, "r") as io:
+        series = io.read().acquisition["regular_nirs_data"]
+        data = series.data[:]
+
+        overview = series.get_overview(width=20)
+        assert overview.factor == 128
+        assert overview.min.shape == (24, 8)
+        np.testing.assert_allclose(overview.times, 5.0 + np.arange(24) * 12.8)
+        level = expected_level(data, 128)
+        np.testing.assert_allclose(overview.max, level[..., 1])
+        np.testing.assert_allclose(overview.mean, level[..., 2])
+
+        # 1000 samples in the span: the bins of 32 samples overlapping it
+        overview = series.get_overview(
+            start_time=105.0, stop_time=205.0, width=30, source_wavelength=830.0
+        )
+        assert overview.factor == 32
+        np.testing.assert_allclose(overview.times[[0, -1]], [104.2, 203.4])
+        level = expected_level(data[:, 1::2], 32)[31:63]
+        np.testing.assert_allclose(overview.min, level[..., 0])
+
+        overview = series.get_overview(start_time=105.0, stop_time=106.0, width=30)
+        assert overview.factor == 1
+        np.testing.assert_array_equal(overview.min, data[1000:1010])
+        np.testing.assert_array_equal(overview.max, data[1000:1010])
+
+        without_overview = io.read().acquisition["nirs_data"]
+        overview = without_overview.get_overview(width=1)
+        assert overview.factor == 1
+        np.testing.assert_array_equal(overview.mean, without_overview.data[:])
+
+
+def test_add_overview_requires_power_of_two(series_path):
+    """Verify that the bins of the finest level must have a power of two samples"""
+    with NWBHDF5IO(series_path, "r") as io:
+        object_id = io.read().acquisition["nirs_data"].object_id
+    with pytest.raises(ValueError):
+        add_overview(series_path, object_id, min_factor=12)
@@ -0,0 +1,24 @@
+import numpy as np
+from pynwb import NWBHDF5IO
+
+from .test_ndx_nirs import setup_nwbfile
+
+
+def test_iter_blocks_from_file(tmp_path):
+    """Verify that the blocks of a series read from a file, by several workers, hold
+    all of its samples in order
+    """
+    path = str(tmp_path / "test.nwb")
+    with NWBHDF5IO(path, "w") as io:
+        io.write(setup_nwbfile())
+
+    with NWBHDF5IO(path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        with series.iter_blocks(block_size=128, prefetch=3, workers=2) as blocks:
+            read = list(blocks)
+        np.testing.assert_array_equal(
+            np.concatenate([data for _, data in read]), series.data[:]
+        )
+        np.testing.assert_array_equal(
+            np.concatenate([times for times, _ in read]), series.timestamps[:]
+        )
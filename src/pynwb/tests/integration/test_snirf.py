@@ -0,0 +1,318 @@
+import datetime
+import pickle
+
+import h5py
+import numpy as np
+import pytest
+from pynwb import NWBHDF5IO
+
+from ndx_nirs import (
+    DatasetChunkIterator,
+    NIRSDevice,
+    NIRSSeries,
+    nwb_to_snirf,
+    snirf_to_nwb,
+    validate_nwbfile,
+)
+
+from .test_ndx_nirs import setup_nwbfile
+
+SOURCE_POSITIONS = np.array([[0.0, 0.0, 0.0], [30.0, 0.0, 0.0]])  # in mm
+DETECTOR_POSITIONS = np.array([[15.0, 0.0, 0.0], [15.0, 8.0, 0.0], [45.0, 0.0, 10.0]])
+SOURCE_DETECTOR_PAIRS = [(1, 1), (1, 2), (2, 1), (2, 3)]
+WAVELENGTHS = [760.0, 850.0]
+
+
+def write_string(group, name, value):
+    group.create_dataset(name, data=value, dtype=h5py.string_dtype())
+
+
+def create_snirf_file(
+    path, data, measurement_lists=False, regular_time=False, data_type=1, n_blocks=1
+):
+    """Writes a SNIRF file with data blocks of (time, channels) data
+
+    Each data block measures the same channels, and the data of block i is data + i. The
+    measurement list is written as measurementList groups, or also as a measurementLists
+    group of arrays. The time is written either as timestamps or as the start time and
+    spacing of regularly sampled data.
+    """
+    source_index = np.repeat([pair[0] for pair in SOURCE_DETECTOR_PAIRS], 2)
+    detector_index = np.repeat([pair[1] for pair in SOURCE_DETECTOR_PAIRS], 2)
+    wavelength_index = np.tile([1, 2], len(SOURCE_DETECTOR_PAIRS))
+    with h5py.File(path, "w") as f:
+        write_string(f, "formatVersion", "1.1")
+        nirs = f.create_group("nirs")
+        tags = nirs.create_group("metaDataTags")
+        for name, value in [
+            ("SubjectID", "subject01"),
+            ("MeasurementDate", "2022-03-04"),
+            ("MeasurementTime", "10:20:30Z"),
+            ("LengthUnit", "mm"),
+            ("TimeUnit", "s"),
+            ("FrequencyUnit", "Hz"),
+        ]:
+            write_string(tags, name, value)
+        probe = nirs.create_group("probe")
+        probe.create_dataset("wavelengths", data=WAVELENGTHS)
+        probe.create_dataset("sourcePos3D", data=SOURCE_POSITIONS)
+        probe.create_dataset("detectorPos3D", data=DETECTOR_POSITIONS)
+        probe.create_dataset(
+            "sourceLabels", data=["Tx1", "Tx2"], dtype=h5py.string_dtype()
+        )
+        for block_index in range(n_blocks):
+            block = nirs.create_group(f"data{block_index + 1}")
+            block.create_dataset(
+                "dataTimeSeries", data=data + block_index, chunks=(7, data.shape[1])
+            )
+            if regular_time:
+                block.create_dataset("time", data=[2.0, 0.1])
+            else:
+                block.create_dataset("time", data=np.arange(len(data)) * 0.1)
+            for index in range(data.shape[1]):
+                measurement = block.create_group(f"measurementList{index + 1}")
+                measurement.create_dataset("sourceIndex", data=source_index[index])
+                measurement.create_dataset("detectorIndex", data=detector_index[index])
+                measurement.create_dataset(
+                    "wavelengthIndex", data=wavelength_index[index]
+                )
+                measurement.create_dataset("dataType", data=data_type)
+                measurement.create_dataset("dataTypeIndex", data=1)
+            if measurement_lists:
+                lists = block.create_group("measurementLists")
+                lists.create_dataset("sourceIndex", data=source_index)
+                lists.create_dataset("detectorIndex", data=detector_index)
+                lists.create_dataset("wavelengthIndex", data=wavelength_index)
+                lists.create_dataset(
+                    "dataType", data=np.full(len(source_index), data_type, dtype=int)
+                )
+                lists.create_dataset(
+                    "dataTypeIndex", data=np.ones(len(source_index), dtype=int)
+                )
+
+
+@pytest.mark.parametrize("measurement_lists", [False, True])
+@pytest.mark.parametrize("regular_time", [False, True])
+def test_snirf_to_nwb(tmp_path, measurement_lists, regular_time):
+    """Verify that the probe, measurement list, data and metadata of a SNIRF file are
+    converted to an NWB file
+    """
+    data = np.random.rand(50, 8)
+    snirf_path, nwb_path = tmp_path / "test.snirf", tmp_path / "test.nwb"
+    create_snirf_file(snirf_path, data, measurement_lists, regular_time)
+
+    copied = snirf_to_nwb(
+        str(snirf_path), str(nwb_path), chunk_size=16, session_description="test"
+    )
+    assert copied == data.nbytes
+
+    with NWBHDF5IO(str(nwb_path), "r") as io:
+        nwbfile = io.read()
+        assert nwbfile.session_description == "test"
+        assert nwbfile.subject.subject_id == "subject01"
+        assert nwbfile.session_start_time == datetime.datetime(
+            2022, 3, 4, 10, 20, 30, tzinfo=datetime.timezone.utc
+        )
+
+        device = nwbfile.devices["nirs_device"]
+        assert isinstance(device, NIRSDevice)
+        assert device.nirs_mode == "continuous-wave"
+        assert list(device.sources.label[:]) == ["Tx1", "Tx2"]
+        assert list(device.detectors.label[:]) == ["D1", "D2", "D3"]
+        np.testing.assert_allclose(device.sources.x[:], [0.0, 0.03])
+        np.testing.assert_allclose(device.detectors.z[:], [0.0, 0.0, 0.01])
+
+        channels = device.channels
+        assert list(channels.label[:3]) == ["Tx1D1 760", "Tx1D1 850", "Tx1D2 760"]
+        np.testing.assert_array_equal(
+            channels.source.data[:], np.repeat([0, 0, 1, 1], 2)
+        )
+        np.testing.assert_array_equal(
+            channels.detector.data[:], np.repeat([0, 1, 0, 2], 2)
+        )
+        np.testing.assert_array_equal(
+            channels.source_wavelength.data[:], np.tile(WAVELENGTHS, 4)
+        )
+
+        series = nwbfile.acquisition["nirs_data"]
+        assert isinstance(series, NIRSSeries)
+        assert series.channels.table is channels
+        np.testing.assert_array_equal(series.data[:], data)
+        assert series.data.chunks == (16, 8)
+        if regular_time:
+            assert (series.starting_time, series.rate) == (2.0, 10.0)
+        else:
+            np.testing.assert_allclose(series.timestamps[:], np.arange(50) * 0.1)
+
+
+def test_snirf_to_nwb_with_several_blocks(tmp_path):
+    """Verify that data blocks which measure the same channels are converted to series
+    which share one row per channel, and that the converted file has no problems
+    """
+    data = np.random.rand(20, 8)
+    snirf_path, nwb_path = tmp_path / "test.snirf", tmp_path / "test.nwb"
+    create_snirf_file(snirf_path, data, n_blocks=2)
+    snirf_to_nwb(str(snirf_path), str(nwb_path))
+
+    with NWBHDF5IO(str(nwb_path), "r") as io:
+        nwbfile = io.read()
+        assert validate_nwbfile(nwbfile) == []
+        channels = nwbfile.devices["nirs_device"].channels
+        assert len(channels) == 8
+        assert list(channels.label[:2]) == ["Tx1D1 760", "Tx1D1 850"]
+        for index in range(2):
+            series = nwbfile.acquisition[f"nirs_data{index + 1}"]
+            assert series.channels.table is channels
+            np.testing.assert_array_equal(series.channels.data[:], np.arange(8))
+            np.testing.assert_array_equal(series.data[:], data + index)
+
+
+def test_snirf_to_nwb_rejects_processed_data(tmp_path):
+    """Verify that a SNIRF file of processed data (dataType 99999) is not converted as
+    raw measurements
+    """
+    snirf_path, nwb_path = tmp_path / "test.snirf", tmp_path / "test.nwb"
+    create_snirf_file(snirf_path, np.random.rand(10, 8), data_type=99999)
+    with pytest.raises(ValueError, match=r"dataType \[99999\]"):
+        snirf_to_nwb(str(snirf_path), str(nwb_path))
+
+
+def test_dataset_chunk_iterator(tmp_path):
+    """Verify that a dataset is iterated over in blocks of whole samples"""
+    data = np.random.rand(10, 3)
+    with h5py.File(tmp_path / "data.h5", "w") as f:
+        iterator = DatasetChunkIterator(
+            f.create_dataset("data", data=data), chunk_size=4
+        )
+        chunks = list(iterator)
+        assert iterator.nbytes == data.nbytes
+    assert [chunk.selection[0] for chunk in chunks] == [
+        slice(0, 4),
+        slice(4, 8),
+        slice(8, 10),
+    ]
+    np.testing.assert_array_equal(
+        np.concatenate([chunk.data for chunk in chunks]), data
+    )
+
+
+def test_dataset_chunk_iterator_pickle(tmp_path):
+    """Verify that an iterator over an h5py dataset is pickled as the path of its file,
+    which the unpickled iterator does not keep open, and that an iterator over in-memory
+    data cannot be pickled
+    """
+    data = np.random.rand(10, 3)
+    with h5py.File(tmp_path / "data.h5", "w") as f:
+        f.create_dataset("group/data", data=data)
+    with h5py.File(tmp_path / "data.h5", "r") as f:
+        iterator = pickle.loads(
+            pickle.dumps(DatasetChunkIterator(f["group/data"], chunk_size=4))
+        )
+    assert iterator.buffer_shape == (4, 3)
+    assert pickle.loads(pickle.dumps(iterator)).maxshape == (10, 3)
+    assert iterator._get_data(np.s_[2:3]).shape == (1, 3)
+    np.testing.assert_array_equal(
+        np.concatenate([chunk.data for chunk in iterator]), data
+    )
+    # a file which is still open read-only cannot be reopened for writing
+    with h5py.File(tmp_path / "data.h5", "a"):
+        pass
+    with pytest.raises(TypeError):
+        pickle.dumps(DatasetChunkIterator(data))
+
+
+def test_nwb_to_snirf(tmp_path):
+    """Verify that a NIRSSeries read from an NWB file is written to a SNIRF file which
+    converts back to the same NWB data
+    """
+    nwbfile = setup_nwbfile()
+    nwb_path, snirf_path = str(tmp_path / "test.nwb"), str(tmp_path / "test.snirf")
+    with NWBHDF5IO(nwb_path, "w") as io:
+        io.write(nwbfile)
+    expected = nwbfile.acquisition["nirs_data"]
+
+    with NWBHDF5IO(nwb_path, "r") as io:
+        series = io.read().acquisition["nirs_data"]
+        assert nwb_to_snirf(series, snirf_path, chunk_size=300) == expected.data.nbytes
+
+    with h5py.File(snirf_path, "r") as f:
+        nirs = f["nirs"]
+        assert nirs["metaDataTags/SubjectID"][()] == b"X"
+        assert nirs["metaDataTags/MeasurementDate"][()] == b"2021-04-01"
+        assert nirs["metaDataTags/MeasurementTime"][()] == b"15:00:00+00:00"
+        np.testing.assert_array_equal(nirs["probe/wavelengths"], [690.0, 830.0])
+        np.testing.assert_array_equal(
+            nirs["probe/sourcePos2D"], [[0.0, -1.0], [0.0, 1.0]]
+        )
+        data = nirs["data1/dataTimeSeries"]
+        assert data.chunks == (300, 8)
+        np.testing.assert_array_equal(data, expected.data)
+        np.testing.assert_array_equal(nirs["data1/time"], expected.timestamps)
+        lists = nirs["data1/measurementLists"]
+        np.testing.assert_array_equal(lists["sourceIndex"], np.repeat([1, 1, 2, 2], 2))
+        np.testing.assert_array_equal(
+            lists["detectorIndex"], np.repeat([1, 2, 2, 3], 2)
+        )
+        np.testing.assert_array_equal(lists["wavelengthIndex"], np.tile([1, 2], 4))
+        np.testing.assert_array_equal(lists["dataType"], np.full(8, 201))
+        assert lists["dataTypeIndex"].dtype == np.int32
+        assert "data1/measurementList1" not in nirs
+
+    snirf_to_nwb(snirf_path, nwb_path)
+    with NWBHDF5IO(nwb_path, "r") as io:
+        converted = io.read()
+        series = converted.acquisition["nirs_data"]
+        np.testing.assert_array_equal(series.data[:], expected.data)
+        np.testing.assert_array_equal(series.timestamps[:], expected.timestamps)
+        device = converted.devices["nirs_device"]
+        assert device.nirs_mode == "time-domain"
+        np.testing.assert_array_equal(
+            device.channels.source_wavelength[:],
+            expected.channels.table.source_wavelength[:],
+        )
+        np.testing.assert_array_equal(
+            device.channels.detector.data[:], expected.channels.table.detector.data[:]
+        )
+        assert converted.session_start_time == nwbfile.session_start_time
+
+
+def test_nwb_to_snirf_with_measurement_list_groups(tmp_path):
+    """Verify that the measurement list is also written as one group per channel when
+    requested, with the same values as the measurementLists arrays
+    """
+    snirf_path = str(tmp_path / "test.snirf")
+    nwb_to_snirf(
+        setup_nwbfile().acquisition["nirs_data"],
+        snirf_path,
+        measurement_list_groups=True,
+    )
+    with h5py.File(snirf_path, "r") as f:
+        block = f["nirs/data1"]
+        lists = block["measurementLists"]
+        for index in range(8):
+            measurement = block[f"measurementList{index + 1}"]
+            for field in lists:
+                assert measurement[field][()] == lists[field][index]
+        assert measurement["sourceIndex"][()] == 2
+        assert measurement["detectorIndex"][()] == 3
+        assert measurement["wavelengthIndex"][()] == 2
+
+
+def test_nwb_to_snirf_with_rate(tmp_path):
+    """Verify that the rate of a series is written as the start time and spacing"""
+    nwbfile = setup_nwbfile()
+    raw = nwbfile.acquisition["nirs_data"]
+    series = NIRSSeries(
+        name="regular_nirs_data",
+        description="The raw NIRS channel data",
+        starting_time=3.0,
+        rate=20.0,
+        channels=raw.channels,
+        data=raw.data,
+        unit="V",
+    )
+    nwb_to_snirf(series, str(tmp_path / "test.snirf"))
+    with h5py.File(tmp_path / "test.snirf", "r") as f:
+        np.testing.assert_array_equal(f["nirs/data1/time"], [3.0, 0.05])
+        np.testing.assert_array_equal(f["nirs/data1/dataTimeSeries"], raw.data)
+        assert f["nirs/metaDataTags/SubjectID"][()] == b"unknown"
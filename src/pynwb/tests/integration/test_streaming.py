@@ -0,0 +1,131 @@
+import tempfile
+from os import path
+
+import numpy as np
+
+from pynwb import NWBHDF5IO
+from pynwb.testing import TestCase, remove_test_file
+from hdmf.common import DynamicTableRegion
+
+from ndx_nirs import NIRSSeriesWriter, create_streaming_series
+
+from .test_ndx_nirs import setup_nwbfile
+
+
+def create_streaming_nirs_series(device, **kwargs):
+    channels = device.channels
+    return create_streaming_series(
+        name="streamed_nirs_data",
+        description="The raw NIRS channel data, written as it is acquired",
+        channels=DynamicTableRegion(
+            name="channels",
+            description="an ordered map to the channels in this NIRS series",
+            table=channels,
+            data=channels.id[:],
+        ),
+        unit="V",
+        **kwargs,
+    )
+
+
+class NIRSSeriesWriterTests(TestCase):
+    """Integration tests for streaming NIRSSeries data to disk"""
+
+    def setUp(self):
+        self.nwb = setup_nwbfile()
+        self.path = path.join(tempfile.gettempdir(), "test_streaming.nwb")
+
+    def tearDown(self):
+        remove_test_file(self.path)
+
+    def write_with_series(self, series):
+        self.nwb.add_acquisition(series)
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+    def test_append_blocks_with_timestamps(self):
+        """Verify that blocks of arbitrary size are appended across chunk boundaries"""
+        series = create_streaming_nirs_series(self.nwb.devices["device"], chunk_size=16)
+        self.write_with_series(series)
+
+        n_channels = len(series.channels)
+        fake_data = np.random.rand(100, n_channels)
+        fake_timestamps = np.arange(100) * 0.05
+        with NIRSSeriesWriter(self.path, series) as writer:
+            self.assertEqual(writer.chunk_size, 16)
+            for start, stop in [(0, 5), (5, 40), (40, 41), (41, 100)]:
+                writer.append(
+                    fake_data[start:stop], timestamps=fake_timestamps[start:stop]
+                )
+            self.assertEqual(len(writer), 100)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            read_series = io.read().acquisition["streamed_nirs_data"]
+            np.testing.assert_array_equal(read_series.data[:], fake_data)
+            np.testing.assert_array_equal(read_series.timestamps[:], fake_timestamps)
+            self.assertIs(
+                read_series.channels.table, io.read().devices["device"].channels
+            )
+
+    def test_flushed_file_is_readable_while_writing(self):
+        """Verify that full chunks are on disk and readable before the writer is closed"""
+        series = create_streaming_nirs_series(self.nwb.devices["device"], chunk_size=10)
+        self.write_with_series(series)
+
+        n_channels = len(series.channels)
+        fake_data = np.random.rand(25, n_channels)
+        writer = NIRSSeriesWriter(self.path, series)
+        try:
+            writer.append(fake_data, timestamps=np.arange(25.0))
+            with NWBHDF5IO(self.path, "r") as io:
+                read_series = io.read().acquisition["streamed_nirs_data"]
+                np.testing.assert_array_equal(read_series.data[:], fake_data[:20])
+                self.assertEqual(len(read_series.timestamps), 20)
+        finally:
+            writer.close()
+
+        with NWBHDF5IO(self.path, "r") as io:
+            read_series = io.read().acquisition["streamed_nirs_data"]
+            np.testing.assert_array_equal(read_series.data[:], fake_data)
+
+    def test_append_with_rate(self):
+        """Verify that a series with a sampling rate is appended without timestamps"""
+        series = create_streaming_nirs_series(self.nwb.devices["device"], rate=10.0)
+        self.write_with_series(series)
+
+        n_channels = len(series.channels)
+        fake_data = np.random.rand(30, n_channels)
+        with NIRSSeriesWriter(self.path, series) as writer:
+            with self.assertRaises(ValueError):
+                writer.append(fake_data, timestamps=np.arange(30.0))
+            for sample in fake_data:
+                writer.append(sample)
+
+        with NWBHDF5IO(self.path, "r") as io:
+            read_series = io.read().acquisition["streamed_nirs_data"]
+            np.testing.assert_array_equal(read_series.data[:], fake_data)
+            self.assertIsNone(read_series.timestamps)
+            self.assertEqual(read_series.rate, 10.0)
+
+    def test_append_rejects_wrong_shapes(self):
+        """Verify that blocks with the wrong number of channels or timestamps are rejected"""
+        series = create_streaming_nirs_series(self.nwb.devices["device"])
+        self.write_with_series(series)
+
+        n_channels = len(series.channels)
+        with NIRSSeriesWriter(self.path, series) as writer:
+            with self.assertRaises(ValueError):
+                writer.append(np.zeros((3, n_channels + 1)), timestamps=np.arange(3.0))
+            with self.assertRaises(ValueError):
+                writer.append(np.zeros((3, n_channels)), timestamps=np.arange(2.0))
+            with self.assertRaises(ValueError):
+                writer.append(np.zeros((3, n_channels)))
+
+    def test_writer_rejects_fixed_size_series(self):
+        """Verify that a series which was not created for streaming is rejected"""
+        series = self.nwb.acquisition["nirs_data"]
+        with NWBHDF5IO(self.path, "w") as io:
+            io.write(self.nwb)
+
+        with self.assertRaises(ValueError):
+            NIRSSeriesWriter(self.path, series)
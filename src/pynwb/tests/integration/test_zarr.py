@@ -0,0 +1,126 @@
+import h5py
+import numpy as np
+import pytest
+
+from ndx_nirs import (
+    LAYOUT_PRESETS,
+    DatasetChunkIterator,
+    LayoutPreset,
+    NIRSDevice,
+    NIRSSeries,
+    write_zarr,
+    zarr_data_io,
+)
+
+from .test_ndx_nirs import setup_nwbfile
+
+hdmf_zarr = pytest.importorskip("hdmf_zarr")
+numcodecs = pytest.importorskip("numcodecs")
+
+
+def test_zarr_roundtrip(tmp_path):
+    """Verify that the NIRS tables, device and series are written to and read from a
+    Zarr store, and that channels and time windows are selected from the Zarr data
+    """
+    nwbfile = setup_nwbfile()
+    expected = nwbfile.acquisition["nirs_data"]
+    path = str(tmp_path / "test.nwb.zarr")
+    write_zarr(nwbfile, path)
+
+    with hdmf_zarr.NWBZarrIO(path, "r") as io:
+        read_nwbfile = io.read()
+        device = read_nwbfile.devices["device"]
+        assert isinstance(device, NIRSDevice)
+        assert device.nirs_mode == "time-domain"
+        assert device.channels.source.table is device.sources
+        assert device.channels.detector.table is device.detectors
+        assert list(device.sources.label[:]) == ["S1", "S2"]
+        np.testing.assert_array_equal(device.detectors.y[:], [-2.0, 0.0, 2.0])
+        np.testing.assert_array_equal(
+            device.channels.source_wavelength[:],
+            expected.channels.table.source_wavelength[:],
+        )
+
+        series = read_nwbfile.acquisition["nirs_data"]
+        assert isinstance(series, NIRSSeries)
+        assert series.channels.table is device.channels
+        np.testing.assert_array_equal(series.data[:], expected.data)
+        np.testing.assert_array_equal(series.timestamps[:], expected.timestamps)
+        np.testing.assert_array_equal(
+            series.get_channel_data(source_wavelength=830.0), expected.data[:, 1::2]
+        )
+        samples = expected.find_samples(start_time=0.5, stop_time=1.5)
+        np.testing.assert_array_equal(
+            series.get_time_window(start_time=0.5, stop_time=1.5, source="S2"),
+            expected.data[samples, 4:],
+        )
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_write_large_series_in_parallel(tmp_path, jobs):
+    """Verify that a large series read from an HDF5 file is written to a Zarr store by
+    several processes, chunk by chunk
+    """
+    data = np.random.default_rng(0).random((100_000, 16))
+    with h5py.File(tmp_path / "raw.h5", "w") as f:
+        f.create_dataset("data", data=data)
+
+    nwbfile = setup_nwbfile()
+    raw = nwbfile.acquisition["nirs_data"]
+    path = str(tmp_path / "test.nwb.zarr")
+    with h5py.File(tmp_path / "raw.h5", "r") as f:
+        nwbfile.add_acquisition(
+            NIRSSeries(
+                name="long_nirs_data",
+                description="A long NIRS recording",
+                rate=10.0,
+                channels=raw.channels,
+                data=zarr_data_io(DatasetChunkIterator(f["data"], chunk_size=8192)),
+                unit="V",
+            )
+        )
+        write_zarr(nwbfile, path, jobs=jobs)
+
+    with hdmf_zarr.NWBZarrIO(path, "r") as io:
+        series = io.read().acquisition["long_nirs_data"]
+        assert series.data.chunks == (8192, 16)
+        assert series.data.compressor == numcodecs.GZip(level=2)
+        np.testing.assert_array_equal(series.data[:], data)
+        np.testing.assert_array_equal(
+            series.get_time_window(start_time=100.0, stop_time=200.0),
+            data[1000:2000],
+        )
+
+
+@pytest.mark.parametrize("layout", list(LAYOUT_PRESETS))
+def test_zarr_data_io_presets(layout):
+    """Verify that the chunks and codecs of a layout preset are used for array data"""
+    data = np.zeros((10_000, 40))
+    preset = LAYOUT_PRESETS[layout]
+    data_io = zarr_data_io(data, layout)
+    assert data_io.io_settings["chunks"] == preset.chunk_shape(10_000, 40, 8)
+    assert data_io.io_settings["compressor"] == numcodecs.GZip(
+        level=preset.compression_opts
+    )
+    assert data_io.io_settings["filters"] == [numcodecs.Shuffle(elementsize=8)]
+
+
+def test_zarr_data_io_errors():
+    """Verify that unknown layouts, unsupported compression and non-2D data are
+    rejected
+    """
+    data = np.zeros((100, 4))
+    with pytest.raises(ValueError):
+        zarr_data_io(data, "unknown")
+    with pytest.raises(ValueError):
+        zarr_data_io(np.zeros(100))
+    lzf = LayoutPreset(
+        name="lzf",
+        chunk_bytes=1024,
+        chunk_channels=None,
+        compression="lzf",
+        compression_opts=None,
+        shuffle=False,
+    )
+    with pytest.raises(ValueError):
+        zarr_data_io(data, lzf)
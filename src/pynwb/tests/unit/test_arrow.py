@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from ndx_nirs import (
+    channels_to_arrow,
+    channels_to_dataframe,
+    series_to_arrow,
+    series_to_record_batches,
+)
+from ndx_nirs.arrow import flatten_channels, series_schema
+
+from .test_ndx_nirs import create_indexed_channels_table
+from .test_validation import create_series
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_flatten_channels():
+    """Verify that the label and coordinates of the source and detector of each channel
+    are resolved into flat columns
+    """
+    channels = create_indexed_channels_table()
+    columns = flatten_channels(channels)
+    assert list(columns) == [
+        "label",
+        "source",
+        "source_label",
+        "source_x",
+        "source_y",
+        "detector",
+        "detector_label",
+        "detector_x",
+        "detector_y",
+        "source_wavelength",
+    ]
+    sources, detectors = channels.source.table, channels.detector.table
+    for row in range(len(channels)):
+        source, detector = channels.source.data[row], channels.detector.data[row]
+        assert columns["source_label"][row] == sources.label.data[source]
+        assert columns["source_y"][row] == sources.y.data[source]
+        assert columns["detector_x"][row] == detectors.x.data[detector]
+    np.testing.assert_array_equal(columns["source_wavelength"], [690.0, 830.0] * 5)
+
+    frame = channels_to_dataframe(channels)
+    assert list(frame.columns) == list(columns)
+    assert frame.index.name == "id"
+    assert frame.loc[4, "detector_label"] == detectors.label.data[1]
+
+
+def test_channels_to_arrow():
+    """Verify that the flat columns are exported as a pyarrow.Table with numeric types"""
+    channels = create_indexed_channels_table()
+    table = channels_to_arrow(channels)
+    assert table.equals(channels.to_arrow())
+    assert table.num_rows == len(channels)
+    assert table.schema.field("source_x").type == pa.float64()
+    assert table.column("label").to_pylist() == list(channels.label.data)
+    assert table.column("source_label").to_pylist()[4:6] == ["S3", "S3"]
+
+
+def test_series_to_record_batches_wide():
+    """Verify that a series is exported in batches of chunk_size samples, with a column
+    per channel named by its label
+    """
+    channels = create_indexed_channels_table()
+    series = create_series(channels, rows=[1, 4, 5])
+    batches = list(series_to_record_batches(series, chunk_size=8))
+    assert [batch.num_rows for batch in batches] == [8, 8, 4]
+    assert batches[0].schema.names == ["timestamp", "S1D1 830", "S3D2 690", "S3D2 830"]
+    assert batches[0].schema.metadata[b"unit"] == b"V"
+
+    table = series_to_arrow(series, chunk_size=8)
+    np.testing.assert_allclose(table.column("timestamp").to_numpy(), np.arange(20) / 10)
+    np.testing.assert_array_equal(
+        table.column("S3D2 690").to_numpy(), series.data[:, 1]
+    )
+
+    window = list(series.to_record_batches(start_time=0.5, stop_time=1.0))
+    assert len(window) == 1
+    np.testing.assert_array_equal(window[0].column(3).to_numpy(), series.data[5:10, 2])
+
+
+def test_series_to_record_batches_list_is_zero_copy():
+    """Verify that the batches of the list layout are backed by the data of the series"""
+    channels = create_indexed_channels_table()
+    series = create_series(channels, rows=[0, 1])
+    batches = list(series_to_record_batches(series, chunk_size=10, layout="list"))
+    values = batches[1].column("data").flatten()
+    assert values.buffers()[1].address == series.data[10:].ctypes.data
+    np.testing.assert_array_equal(values.to_numpy().reshape(-1, 2), series.data[10:20])
+    schema = series_schema(series, layout="list")
+    assert schema.metadata[b"channels"] == b"S1D1 690\nS1D1 830"
+
+
+def test_series_export_errors():
+    """Verify that duplicate channel labels and unknown layouts are rejected"""
+    channels = create_indexed_channels_table()
+    series = create_series(channels, rows=[0, 0])
+    with pytest.raises(ValueError, match="unique labels"):
+        series_schema(series)
+    with pytest.raises(ValueError, match="layout"):
+        series_schema(create_series(channels), layout="long")
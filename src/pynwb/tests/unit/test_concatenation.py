@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+from hdmf.common import DynamicTableRegion
+
+from ndx_nirs import NIRSSeries, concatenate_series
+
+from .test_ndx_nirs import create_indexed_channels_table
+
+
+def create_run(name, channels, n_samples, rows=None, unit="V", **kwargs):
+    """Returns a NIRSSeries with random data over the given rows of channels"""
+    rows = list(range(len(channels))) if rows is None else rows
+    if "rate" not in kwargs and "timestamps" not in kwargs:
+        kwargs["timestamps"] = np.arange(n_samples) * 0.1
+    return NIRSSeries(
+        name=name,
+        description="A run of NIRS data",
+        channels=DynamicTableRegion(
+            name="channels",
+            description="the channels of the run",
+            table=channels,
+            data=rows,
+        ),
+        data=np.random.rand(n_samples, len(rows)),
+        unit=unit,
+        **kwargs,
+    )
+
+
+def exhaust(iterator):
+    """Returns all the data of a DataChunkIterator, assembled from its chunks"""
+    out = np.empty(iterator.maxshape, dtype=iterator.dtype)
+    for chunk in iterator:
+        out[chunk.selection] = chunk.data
+    return out
+
+
+def test_concatenate_series_with_timestamps():
+    """Verify that the data and the offset timestamps of the runs are concatenated chunk
+    by chunk, and that the new series references the channels of the first run
+    """
+    channels = create_indexed_channels_table()
+    runs = [create_run(f"run{index}", channels, n) for index, n in enumerate([7, 5, 9])]
+    series = concatenate_series(
+        runs, name="nirs_data", time_offsets=[0.0, 10.0, 20.0], chunk_size=4
+    )
+
+    assert series.name == "nirs_data"
+    assert series.description == "The concatenation of run0, run1, run2."
+    assert series.channels.table is channels
+    assert series.channels.data == list(range(len(channels)))
+    assert series.unit == "V"
+    assert series.data.buffer_shape == (4, len(channels))
+    np.testing.assert_array_equal(
+        exhaust(series.data), np.concatenate([run.data for run in runs])
+    )
+    np.testing.assert_allclose(
+        exhaust(series.timestamps),
+        np.concatenate(
+            [np.arange(7) * 0.1, np.arange(5) * 0.1 + 10, np.arange(9) * 0.1 + 20]
+        ),
+    )
+
+
+def test_concatenate_adjacent_series_with_rate():
+    """Verify that regularly sampled runs which follow each other keep a rate, and that
+    runs with gaps get timestamps
+    """
+    channels = create_indexed_channels_table()
+    runs = [
+        create_run("run0", channels, 20, rate=10.0, starting_time=1.0),
+        create_run("run1", channels, 30, rate=10.0, starting_time=3.0),
+    ]
+    series = concatenate_series(runs, name="nirs_data")
+    assert series.timestamps is None
+    assert (series.rate, series.starting_time) == (10.0, 1.0)
+    np.testing.assert_array_equal(
+        exhaust(series.data), np.concatenate([runs[0].data, runs[1].data])
+    )
+
+    series = concatenate_series(runs, name="nirs_data", time_offsets=[0.0, 5.0])
+    assert series.rate is None
+    np.testing.assert_allclose(
+        exhaust(series.timestamps),
+        np.concatenate([1.0 + np.arange(20) * 0.1, 8.0 + np.arange(30) * 0.1]),
+    )
+
+
+def test_concatenate_series_from_copied_tables():
+    """Verify that runs referencing equal rows of different channels tables can be
+    concatenated
+    """
+    runs = [
+        create_run("run0", create_indexed_channels_table(), 5, rows=[3, 1]),
+        create_run("run1", create_indexed_channels_table(), 5, rows=[3, 1]),
+    ]
+    series = concatenate_series(runs, name="nirs_data", time_offsets=[0.0, 1.0])
+    assert series.channels.table is runs[0].channels.table
+    assert series.channels.data == [3, 1]
+
+
+def test_concatenate_series_errors():
+    """Verify that runs with different channels, units, shapes or overlapping times are
+    rejected
+    """
+    channels = create_indexed_channels_table()
+    run = create_run("run0", channels, 5, rows=[0, 1])
+    with pytest.raises(ValueError, match="at least one"):
+        concatenate_series([], name="nirs_data")
+    with pytest.raises(ValueError, match="time offsets"):
+        concatenate_series([run, run], name="nirs_data", time_offsets=[1.0])
+    with pytest.raises(ValueError, match="before the end"):
+        concatenate_series(
+            [run, create_run("run1", channels, 5, rows=[0, 1])], name="nirs_data"
+        )
+    with pytest.raises(ValueError, match="same channels"):
+        concatenate_series(
+            [run, create_run("run1", channels, 5, rows=[1, 0])],
+            name="nirs_data",
+            time_offsets=[0.0, 1.0],
+        )
+    other_channels = create_indexed_channels_table()
+    other_channels.source.table.x.data[0] += 0.01
+    with pytest.raises(ValueError, match="same channels"):
+        concatenate_series(
+            [run, create_run("run1", other_channels, 5, rows=[0, 1])],
+            name="nirs_data",
+            time_offsets=[0.0, 1.0],
+        )
+    with pytest.raises(ValueError, match="unit"):
+        concatenate_series(
+            [run, create_run("run1", channels, 5, rows=[0, 1], unit="mV")],
+            name="nirs_data",
+            time_offsets=[0.0, 1.0],
+        )
+    with pytest.raises(ValueError, match="shape"):
+        concatenate_series(
+            [run, create_run("run1", channels, 5, rows=[0, 1, 2])],
+            name="nirs_data",
+            time_offsets=[0.0, 1.0],
+        )
@@ -0,0 +1,64 @@
+import h5py
+import numpy as np
+from hdmf.common import EnumData, VectorData
+
+from ndx_nirs import NIRSChannelsTable, NIRSSourcesTable
+from ndx_nirs.encoding import decode_columns, encode_labels, encode_values
+
+
+def test_encode_labels():
+    """Verify that labels are encoded as UTF-8 strings as long as the longest one"""
+    labels = encode_labels(["S1D1 690", "S10D12 830", "Sµ"])
+    assert labels.dtype.itemsize == 10
+    assert h5py.check_string_dtype(labels.dtype).encoding == "utf-8"
+    assert labels[2].decode("utf-8") == "Sµ"
+    assert encode_labels([]).dtype.itemsize == 1
+
+
+def test_encode_values():
+    """Verify that values are encoded as the smallest unsigned codes into their
+    distinct values
+    """
+    codes, elements = encode_values([830.0, 690.0, 830.0, 760.0])
+    assert codes.dtype == np.uint8
+    np.testing.assert_array_equal(elements, [690.0, 760.0, 830.0])
+    np.testing.assert_array_equal(elements[codes], [830.0, 690.0, 830.0, 760.0])
+    codes, elements = encode_values(np.arange(300.0))
+    assert codes.dtype == np.uint16
+    np.testing.assert_array_equal(elements[codes], np.arange(300.0))
+
+
+def test_decode_columns():
+    """Verify that an EnumData column and its elements column are replaced by a column
+    of the values, and that other columns are left as is
+    """
+    elements = VectorData(
+        name="source_wavelength_elements", description="values", data=[690.0, 830.0]
+    )
+    columns = [
+        VectorData(name="label", description="labels", data=["CH1", "CH2", "CH3"]),
+        EnumData(
+            name="source_wavelength",
+            description="wavelengths",
+            data=np.array([1, 0, 1], dtype=np.uint8),
+            elements=elements,
+        ),
+        elements,
+    ]
+    decoded, changed = decode_columns(columns)
+    assert changed
+    assert [column.name for column in decoded] == ["label", "source_wavelength"]
+    assert decoded[0] is columns[0]
+    assert type(decoded[1]) is VectorData
+    np.testing.assert_array_equal(decoded[1].data, [830.0, 690.0, 830.0])
+    assert decode_columns(columns[:1]) == (columns[:1], False)
+
+
+def test_compact_argument():
+    """Verify that tables are not compact unless requested"""
+    assert not NIRSChannelsTable().compact
+    assert NIRSChannelsTable(compact=True).compact
+    sources = NIRSSourcesTable.from_coordinates(
+        label=["S1"], coordinates=[[0.0, 0.0]], compact=True
+    )
+    assert sources.compact
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import ndx_nirs
+
+# the submodules which are only imported when one of their names is first accessed
+LAZY_MODULES = (
+    "arrow",
+    "concatenation",
+    "live",
+    "overview",
+    "processing",
+    "profiling",
+    "snirf",
+    "validation",
+    "zarr_io",
+)
+
+
+def test_submodules_are_imported_lazily():
+    """Verify that importing ndx_nirs does not import the I/O, conversion and analysis
+    submodules, or start profiling
+    """
+    code = (
+        "import sys, ndx_nirs;"
+        f" print([name for name in {LAZY_MODULES!r}"
+        " if 'ndx_nirs.' + name in sys.modules])"
+    )
+    # the subprocess imports ndx_nirs from where pytest does, without profiling
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    env.pop("NDX_NIRS_PROFILE", None)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_lazy_names_are_exported():
+    """Verify that every public name is found in the module it is imported from"""
+    for name in ndx_nirs.__all__:
+        assert getattr(ndx_nirs, name) is not None
+    assert ndx_nirs.snirf_to_nwb is ndx_nirs.snirf.snirf_to_nwb
+    assert set(ndx_nirs.__all__) <= set(dir(ndx_nirs))
+    with pytest.raises(AttributeError, match="not_a_name"):
+        ndx_nirs.not_a_name
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from hdmf.backends.hdf5 import H5DataIO
+from hdmf.data_utils import DataChunkIterator
+
+from ndx_nirs import LAYOUT_PRESETS, LayoutPreset, layout_data_io
+
+
+@pytest.mark.parametrize(
+    "layout, expected_chunks",
+    [
+        ("channel-major", (36000, 1)),
+        ("time-major", (256, 128)),
+        ("balanced", (4096, 16)),
+    ],
+)
+def test_layout_data_io(layout, expected_chunks):
+    """Verify that the data is wrapped with the chunking and compression of the preset"""
+    data = np.zeros((36000, 128))
+    data_io = layout_data_io(data, layout)
+    assert isinstance(data_io, H5DataIO)
+    assert data_io.data is data
+    assert data_io.io_settings["chunks"] == expected_chunks
+    assert data_io.io_settings["compression"] == LAYOUT_PRESETS[layout].compression
+    assert data_io.io_settings["shuffle"]
+
+
+def test_chunks_are_limited_to_the_data():
+    """Verify that chunks are no larger than the data"""
+    data_io = layout_data_io(np.zeros((100, 8), dtype="float32"), "channel-major")
+    assert data_io.io_settings["chunks"] == (100, 1)
+    data_io = layout_data_io([[1.0, 2.0], [3.0, 4.0]], "time-major")
+    assert data_io.io_settings["chunks"] == (2, 2)
+
+
+def test_resizable_data():
+    """Verify that chunks of data extended along time are sized by the preset only"""
+    data_io = layout_data_io(np.zeros((0, 4)), "channel-major", maxshape=(None, 4))
+    assert data_io.io_settings["chunks"] == (131072, 1)
+    assert data_io.io_settings["maxshape"] == (None, 4)
+
+    iterator = DataChunkIterator(
+        data=iter(np.zeros((5, 4))), maxshape=(None, 4), dtype=np.dtype("float32")
+    )
+    data_io = layout_data_io(iterator, "time-major")
+    assert data_io.io_settings["chunks"] == (16384, 4)
+
+
+def test_custom_layout():
+    """Verify that a custom LayoutPreset can be used"""
+    layout = LayoutPreset(
+        name="uncompressed",
+        chunk_bytes=800,
+        chunk_channels=2,
+        compression=None,
+        compression_opts=None,
+        shuffle=False,
+    )
+    data_io = layout_data_io(np.zeros((1000, 10)), layout)
+    assert data_io.io_settings["chunks"] == (50, 2)
+    assert "compression" not in data_io.io_settings
+
+
+@pytest.mark.parametrize(
+    "data, layout", [(np.zeros((10, 2)), "row-major"), (np.zeros(10), "balanced")]
+)
+def test_invalid_arguments(data, layout):
+    """Verify that unknown presets and data which is not 2D are rejected"""
+    with pytest.raises(ValueError):
+        layout_data_io(data, layout)
@@ -0,0 +1,195 @@
+import socket
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ndx_nirs import LiveIngest, QueueSource, SocketSource, pack_frame
+
+N_CHANNELS = 3
+
+
+class MemoryWriter:
+    """Appends to in-memory lists instead of a file, like a NIRSSeriesWriter"""
+
+    def __init__(self, chunk_size=4, has_timestamps=True):
+        self.chunk_size = chunk_size
+        self.n_channels = N_CHANNELS
+        self.dtype = np.dtype("float64")
+        self.has_timestamps = has_timestamps
+        self.data, self.timestamps = [], []
+        self.flushes = 0
+
+    def append(self, data, timestamps=None):
+        self.data.append(np.array(data))
+        self.timestamps.append(timestamps)
+
+    def flush(self):
+        self.flushes += 1
+
+
+class BlockingWriter(MemoryWriter):
+    """A writer whose appends wait until released, like a stalled disk"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def append(self, data, timestamps=None):
+        self.entered.set()
+        self.release.wait(5)
+        super().append(data, timestamps)
+
+
+def samples(start, stop):
+    data = np.arange(start * N_CHANNELS, stop * N_CHANNELS, dtype=float)
+    return data.reshape(-1, N_CHANNELS), np.arange(start, stop) * 0.1
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_ingest_from_queue():
+    """Verify that the samples are flushed in blocks, in order, and that latest returns
+    the most recent samples received
+    """
+    writer = MemoryWriter()
+    source = QueueSource()
+    with LiveIngest(writer, source, window=16, timeout=0.01) as ingest:
+        for start in range(0, 10, 2):
+            source.put(*samples(start, start + 2))
+        source.put(*samples(10, 11))
+        source.close()
+        assert ingest.wait(5)
+        timestamps, data = ingest.latest(3)
+        np.testing.assert_array_equal(data, samples(8, 11)[0])
+        np.testing.assert_allclose(timestamps, samples(8, 11)[1])
+        assert len(ingest.latest()[0]) == 11
+        assert len(ingest.latest(20)[0]) == 11
+
+    assert [len(block) for block in writer.data] == [4, 4, 3]
+    np.testing.assert_array_equal(np.concatenate(writer.data), samples(0, 11)[0])
+    np.testing.assert_allclose(np.concatenate(writer.timestamps), samples(0, 11)[1])
+    assert writer.flushes == 3
+    stats = ingest.stats()
+    assert stats.received_samples == stats.flushed_samples == 11
+    assert stats.dropped_samples == stats.buffered_samples == 0
+    assert 0 <= stats.receive_latency_mean <= stats.receive_latency_max
+    assert stats.receive_latency_max <= stats.flush_latency_max
+    assert stats.as_dict()["flushed_samples"] == 11
+
+
+def test_ingest_without_timestamps():
+    """Verify that samples are received without timestamps for a series with a rate"""
+    writer = MemoryWriter(has_timestamps=False)
+    source = QueueSource()
+    with LiveIngest(writer, source, timeout=0.01) as ingest:
+        source.put(samples(0, 6)[0])
+        source.close()
+        ingest.wait(5)
+        assert np.isnan(ingest.latest(2)[0]).all()
+    np.testing.assert_array_equal(np.concatenate(writer.data), samples(0, 6)[0])
+    assert writer.timestamps == [None, None]
+
+
+def test_ingest_overwrites_unflushed_samples():
+    """Verify that the oldest unflushed samples are overwritten and counted as dropped
+    when the writer falls behind by more than the window
+    """
+    writer = BlockingWriter()
+    source = QueueSource()
+    with LiveIngest(writer, source, window=8, timeout=0.01) as ingest:
+        source.put(*samples(0, 4))
+        assert writer.entered.wait(5)
+        for start in range(4, 20):
+            source.put(*samples(start, start + 1))
+        wait_until(lambda: ingest.stats().received_samples == 20)
+        assert ingest.stats().buffered_samples == 8
+        writer.release.set()
+        source.close()
+        ingest.wait(5)
+
+    expected = np.concatenate([samples(0, 4)[0], samples(12, 20)[0]])
+    np.testing.assert_array_equal(np.concatenate(writer.data), expected)
+    stats = ingest.stats()
+    assert (stats.flushed_samples, stats.dropped_samples) == (12, 8)
+
+
+def test_ingest_packet_longer_than_window():
+    """Verify that only the last window samples of a long packet are kept"""
+    writer = MemoryWriter()
+    source = QueueSource()
+    with LiveIngest(writer, source, window=4, timeout=0.01) as ingest:
+        source.put(*samples(0, 10))
+        source.close()
+        ingest.wait(5)
+    np.testing.assert_array_equal(np.concatenate(writer.data), samples(6, 10)[0])
+    assert ingest.stats().dropped_samples == 6
+
+
+def test_queue_source_drops_when_full():
+    """Verify that packets put on a full queue are dropped and counted"""
+    source = QueueSource(maxsize=1)
+    source.put(*samples(0, 2))
+    source.put(*samples(2, 5))
+    assert source.dropped_samples == 3
+    assert source.read(0.01)[0].shape == (2, N_CHANNELS)
+    assert source.read(0.01) is None
+    source.close()
+    with pytest.raises(EOFError):
+        source.read(0.01)
+
+
+def test_socket_source():
+    """Verify that frames split across sends are received whole, in order"""
+    receiver, sender = socket.socketpair()
+    with receiver, sender:
+        source = SocketSource(receiver, N_CHANNELS)
+        assert source.read(0.01) is None
+        frames = pack_frame(*samples(0, 2), acquired=1.5) + pack_frame(*samples(2, 3))
+        sender.sendall(frames[:5])
+        assert source.read(0.01) is None
+        sender.sendall(frames[5:])
+        data, timestamps, acquired = source.read(0.01)
+        np.testing.assert_array_equal(data, samples(0, 2)[0])
+        np.testing.assert_allclose(timestamps, samples(0, 2)[1])
+        assert acquired == 1.5
+        np.testing.assert_array_equal(source.read(0.01)[0], samples(2, 3)[0])
+        sender.close()
+        with pytest.raises(EOFError):
+            source.read(0.01)
+
+
+def test_ingest_invalid_packet():
+    """Verify that a packet with the wrong number of channels, or without timestamps for
+    a series with timestamps, stops the ingest and is raised when it is stopped
+    """
+    for packet in [samples(0, 2)[0][:, :2], None]:
+        source = QueueSource()
+        ingest = LiveIngest(MemoryWriter(), source, timeout=0.01).start()
+        if packet is None:
+            source.put(samples(0, 2)[0])
+        else:
+            source.put(packet, samples(0, 2)[1])
+        with pytest.raises(ValueError):
+            ingest.wait(5)
+        ingest.stop()
+
+
+def test_ingest_invalid_arguments():
+    """Verify that a block size below 1 or a window smaller than a block is rejected, and
+    that an ingest cannot be started twice
+    """
+    with pytest.raises(ValueError, match="must be at least"):
+        LiveIngest(MemoryWriter(), QueueSource(), block_size=0)
+    with pytest.raises(ValueError, match="must be at least"):
+        LiveIngest(MemoryWriter(), QueueSource(), block_size=4, window=3)
+    with LiveIngest(MemoryWriter(), QueueSource(), timeout=0.01) as ingest:
+        with pytest.raises(RuntimeError):
+            ingest.start()
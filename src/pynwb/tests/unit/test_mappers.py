@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from ndx_nirs.encoding import compact_index_dtype
+from ndx_nirs.mappers import _compact_indices
+
+
+@pytest.mark.parametrize(
+    "largest, dtype",
+    [(0, np.int32), (2**31 - 1, np.int32), (2**31, np.int64)],
+)
+def test_compact_index_dtype(largest, dtype):
+    """Verify that the smallest index dtype holding the largest index is picked"""
+    assert compact_index_dtype([0, largest, 3]) == np.dtype(dtype)
+
+
+def test_compact_indices_only_converts_in_memory_indices():
+    """Verify that lists and arrays of non-negative integers are converted, and that
+    other data is left as is
+    """
+    compact = _compact_indices([3, 1, 300])
+    assert compact.dtype == np.int32
+    np.testing.assert_array_equal(compact, [3, 1, 300])
+    assert _compact_indices([2**40]).dtype == np.int64
+    assert _compact_indices([]).dtype == np.int32
+    assert _compact_indices([0, -1]) is None
+    assert _compact_indices(np.array([0.0, 1.0])) is None
+    assert _compact_indices(iter([0, 1])) is None
@@ -0,0 +1,58 @@
+import h5py
+import numpy as np
+import pytest
+from hdmf.backends.hdf5 import H5DataIO
+
+from ndx_nirs.memmap import can_memmap, memmap_dataset
+
+
+@pytest.fixture
+def h5file(tmp_path):
+    """Returns an h5py file with datasets in different storage layouts"""
+    data = np.random.rand(40, 6)
+    with h5py.File(tmp_path / "data.h5", "w") as f:
+        f.create_dataset("contiguous", data=data)
+        f.create_dataset("big_endian", data=data.astype(">f4"))
+        f.create_dataset("chunked", data=data, chunks=(10, 6))
+        f.create_dataset("compressed", data=data, compression="gzip")
+        f.create_dataset("empty", shape=(0, 6), dtype="f8")
+        f.create_dataset("unallocated", shape=(10, 6), dtype="f8")
+        f.create_dataset("text", data=["a", "b"])
+    with h5py.File(tmp_path / "data.h5", "r") as f:
+        yield f, data
+
+
+@pytest.mark.parametrize("name", ["contiguous", "big_endian"])
+def test_memmap_contiguous_dataset(h5file, name):
+    """Verify that a contiguous dataset is mapped read-only with the stored values"""
+    f, data = h5file
+    mapped = memmap_dataset(f[name])
+    assert isinstance(mapped, np.memmap)
+    assert mapped.dtype == f[name].dtype
+    np.testing.assert_array_equal(mapped, f[name][:])
+    np.testing.assert_allclose(mapped, data, rtol=1e-6)
+    with pytest.raises(ValueError):
+        mapped[0, 0] = 1.0
+
+
+def test_memmap_unwraps_dataio(h5file):
+    """Verify that a dataset wrapped in a DataIO is mapped"""
+    f, data = h5file
+    np.testing.assert_array_equal(memmap_dataset(H5DataIO(f["contiguous"])), data)
+
+
+@pytest.mark.parametrize(
+    "name", ["chunked", "compressed", "empty", "unallocated", "text"]
+)
+def test_memmap_unsupported_layout(h5file, name):
+    """Verify that datasets which cannot be mapped are not"""
+    f, _ = h5file
+    assert not can_memmap(f[name])
+    assert memmap_dataset(f[name]) is None
+
+
+def test_memmap_in_memory_data():
+    """Verify that in-memory data is not mapped"""
+    assert memmap_dataset(np.zeros((3, 2))) is None
+    assert memmap_dataset([1.0, 2.0]) is None
+    assert memmap_dataset(None) is None
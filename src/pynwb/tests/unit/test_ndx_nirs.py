@@ -82,6 +82,50 @@ class TestNIRSDetectorsTable(TestCase):
         self.assertEqual(table.z[0], 3.0)
 
 
+@pytest.mark.parametrize("table_type", [NIRSSourcesTable, NIRSDetectorsTable])
+@pytest.mark.parametrize("n_dims", [2, 3])
+def test_from_coordinates_matches_add_row(table_type, n_dims):
+    """For each optode table, verify that from_coordinates matches repeated calls to add_row"""
+    labels = [f"O{n}" for n in range(5)]
+    coordinates = np.random.rand(5, n_dims)
+    expected = table_type()
+    for label, row in zip(labels, coordinates):
+        expected.add_row(label=label, **dict(zip("xyz", row.tolist())))
+
+    table = table_type.from_coordinates(label=labels, coordinates=coordinates)
+
+    assert table.name == expected.name
+    assert table.description == expected.description
+    pd.testing.assert_frame_equal(table.to_dataframe(), expected.to_dataframe())
+    assert table.x.data.flags["C_CONTIGUOUS"]
+    if n_dims == 2:
+        assert table.z is None
+
+
+@pytest.mark.parametrize("table_type", [NIRSSourcesTable, NIRSDetectorsTable])
+def test_from_coordinates_allows_add_row(table_type):
+    """For each optode table, verify that rows can still be added after from_coordinates"""
+    table = table_type.from_coordinates(
+        label=["A", "B"], coordinates=[[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]], name="foo"
+    )
+    table.add_row(label="C", x=6.0, y=7.0, z=8.0)
+
+    assert table.name == "foo"
+    assert len(table) == 3
+    assert table.label[:] == ["A", "B", "C"]
+    np.testing.assert_array_equal(table.z[:], [2.0, 5.0, 8.0])
+    np.testing.assert_array_equal(table.id[:], [0, 1, 2])
+
+
+@pytest.mark.parametrize("table_type", [NIRSSourcesTable, NIRSDetectorsTable])
+def test_from_coordinates_raises_error_for_bad_shapes(table_type):
+    """For each optode table, verify that from_coordinates rejects malformed inputs"""
+    with pytest.raises(ValueError):
+        table_type.from_coordinates(label=["A"], coordinates=np.zeros((1, 4)))
+    with pytest.raises(ValueError):
+        table_type.from_coordinates(label=["A", "B"], coordinates=np.zeros((3, 2)))
+
+
 @pytest.mark.parametrize(
     "table_type", [NIRSSourcesTable, NIRSDetectorsTable, NIRSChannelsTable]
 )
@@ -224,6 +268,286 @@ class TestNIRSChannelsTable(TestCase):
         self.assertEqual(table.source_power[0], 11.0)
         self.assertEqual(table.detector_gain[0], 5.1)
 
+    def test_add_channels_matches_add_row(self):
+        """Verify that add_channels produces the same table as repeated calls to add_row"""
+        labels = [f"CH{n}" for n in range(6)]
+        sources = np.array([0, 0, 3, 3, 6, 6])
+        detectors = np.array([1, 1, 2, 2, 3, 3])
+        wavelengths = np.array([690.0, 830.0] * 3)
+        expected = NIRSChannelsTable(
+            sources=create_fake_sources_table(), detectors=create_fake_detectors_table()
+        )
+        for row in zip(labels, sources, detectors, wavelengths):
+            expected.add_row(
+                label=row[0],
+                source=int(row[1]),
+                detector=int(row[2]),
+                source_wavelength=float(row[3]),
+            )
+
+        table = NIRSChannelsTable(
+            sources=create_fake_sources_table(), detectors=create_fake_detectors_table()
+        )
+        table.add_channels(
+            label=labels,
+            source=sources,
+            detector=detectors,
+            source_wavelength=wavelengths,
+        )
+
+        self.assertEqual(len(table), len(expected))
+        np.testing.assert_array_equal(table.id[:], expected.id[:])
+        pd.testing.assert_frame_equal(
+            table.to_dataframe(index=True), expected.to_dataframe(index=True)
+        )
+        self.assertIsNone(table.emission_wavelength)
+
+    def test_add_channels_with_optional_columns(self):
+        """Verify that add_channels creates optional columns on an empty table"""
+        table = NIRSChannelsTable(
+            sources=create_fake_sources_table(), detectors=create_fake_detectors_table()
+        )
+        table.add_channels(
+            label=["foo", "bar"],
+            source=[6, 0],
+            detector=[1, 3],
+            source_wavelength=[690.0, 830.0],
+            source_power=[11.0, 12.0],
+        )
+
+        self.assertEqual(table.label[:], ["foo", "bar"])
+        self.assertEqual(table.source_power[:], [11.0, 12.0])
+        self.assertIsNone(table.detector_gain)
+
+    def test_add_channels_appends_to_existing_rows(self):
+        """Verify that add_channels continues the ids of a table with existing rows"""
+        table = NIRSChannelsTable(
+            sources=create_fake_sources_table(), detectors=create_fake_detectors_table()
+        )
+        table.add_row(label="bar", source=0, detector=0, source_wavelength=690.0)
+        n_rows = len(table)
+        table.add_channels(
+            label=["foo"], source=[2], detector=[3], source_wavelength=[760.0]
+        )
+
+        self.assertEqual(len(table), n_rows + 1)
+        self.assertEqual(table.id[-1], n_rows)
+        self.assertEqual(table.label[-1], "foo")
+        self.assertEqual(table.source.data[-1], 2)
+
+    def test_add_channels_raises_error_for_out_of_bounds_indices(self):
+        """Verify that add_channels rejects indices outside of the sources and detectors tables"""
+        table = NIRSChannelsTable(
+            sources=create_fake_sources_table(), detectors=create_fake_detectors_table()
+        )
+        with self.assertRaises(IndexError):
+            table.add_channels(
+                label=["foo", "bar"],
+                source=[0, 7],
+                detector=[0, 0],
+                source_wavelength=[690.0, 830.0],
+            )
+        with self.assertRaises(IndexError):
+            table.add_channels(
+                label=["foo"], source=[0], detector=[-1], source_wavelength=[690.0]
+            )
+        self.assertEqual(len(table), 0)
+
+    def test_add_channels_raises_error_for_mismatched_lengths(self):
+        """Verify that add_channels rejects arrays of different lengths"""
+        table = NIRSChannelsTable(
+            sources=create_fake_sources_table(), detectors=create_fake_detectors_table()
+        )
+        with self.assertRaises(ValueError):
+            table.add_channels(
+                label=["foo", "bar"],
+                source=[0],
+                detector=[0, 0],
+                source_wavelength=[690.0, 830.0],
+            )
+
+    def test_add_channels_raises_error_without_sources_table(self):
+        """Verify that add_channels requires the sources table to be set"""
+        table = NIRSChannelsTable(detectors=create_fake_detectors_table())
+        with self.assertRaises(ValueError):
+            table.add_channels(
+                label=["foo"], source=[0], detector=[0], source_wavelength=[690.0]
+            )
+
+
+def create_indexed_channels_table():
+    """Returns a NIRSChannelsTable with two wavelengths for several source-detector pairs"""
+    source_detector_pairs = [(0, 0), (0, 1), (2, 1), (2, 3), (6, 3)]
+    table = NIRSChannelsTable(
+        sources=create_fake_sources_table(), detectors=create_fake_detectors_table()
+    )
+    for source_idx, detector_idx in source_detector_pairs:
+        for wavelength in [690.0, 830.0]:
+            table.add_row(
+                label=f"S{source_idx + 1}D{detector_idx + 1} {wavelength:g}",
+                source=source_idx,
+                detector=detector_idx,
+                source_wavelength=wavelength,
+            )
+    return table
+
+
+class TestNIRSChannelsTableIndex(TestCase):
+    """Unit tests for looking up channels in a NIRSChannelsTable"""
+
+    def setUp(self):
+        self.table = create_indexed_channels_table()
+
+    def assert_rows_match_scan(self, **key):
+        """Assert that find_channels returns the same rows as a scan of the columns"""
+        expected = [
+            row
+            for row in range(len(self.table))
+            if all(
+                getattr(self.table, field).data[row] == value
+                for field, value in key.items()
+            )
+        ]
+        np.testing.assert_array_equal(self.table.find_channels(**key), expected)
+
+    def test_find_channels_with_full_and_partial_keys(self):
+        """Verify that find_channels matches a scan for every combination of key fields"""
+        for key in [
+            dict(source=2),
+            dict(detector=3),
+            dict(source_wavelength=830.0),
+            dict(source=2, detector=3),
+            dict(source=0, source_wavelength=690.0),
+            dict(detector=1, source_wavelength=830.0),
+            dict(source=6, detector=3, source_wavelength=690.0),
+        ]:
+            with self.subTest(**key):
+                self.assert_rows_match_scan(**key)
+
+    def test_find_channels_by_label(self):
+        """Verify that sources and detectors can be given by label"""
+        np.testing.assert_array_equal(
+            self.table.find_channels(source="S3", detector="D4"),
+            self.table.find_channels(source=2, detector=3),
+        )
+        with self.assertRaises(KeyError):
+            self.table.find_channels(source="S42")
+
+    def test_find_channels_without_matches(self):
+        """Verify that an empty array is returned when no channel matches"""
+        self.assertEqual(len(self.table.find_channels(source=1)), 0)
+        self.assertEqual(len(self.table.find_channels(source=0, detector=3)), 0)
+
+    def test_find_channels_without_key_returns_all_rows(self):
+        """Verify that all rows are returned when no key fields are given"""
+        np.testing.assert_array_equal(
+            self.table.find_channels(), np.arange(len(self.table))
+        )
+
+    def test_get_channel(self):
+        """Verify that get_channel returns the row of a unique channel"""
+        self.assertEqual(
+            self.table.get_channel(source=2, detector="D4", source_wavelength=830), 7
+        )
+        with self.assertRaises(KeyError):
+            self.table.get_channel(source=1, detector=0, source_wavelength=830.0)
+
+    def test_index_is_reused_until_table_changes(self):
+        """Verify that the index is built once and rebuilt after rows are added"""
+        index = self.table.channel_index
+        self.assertIs(self.table.channel_index, index)
+
+        self.table.add_row(label="new", source=1, detector=0, source_wavelength=690.0)
+        self.assertIsNot(self.table.channel_index, index)
+        np.testing.assert_array_equal(self.table.find_channels(source=1), [10])
+
+    def test_index_is_rebuilt_when_sources_change(self):
+        """Verify that the index is rebuilt when a source is added or the table is set"""
+        index = self.table.channel_index
+        self.table.source.table.add_row(label="S8", x=0.0, y=0.0)
+        self.assertIsNot(self.table.channel_index, index)
+
+        table = NIRSChannelsTable(detectors=create_fake_detectors_table())
+        table.add_row(label="foo", source=2, detector=0, source_wavelength=690.0)
+        with self.assertRaises(KeyError):
+            table.find_channels(source="S3")
+        table.set_sources_table(create_fake_sources_table())
+        np.testing.assert_array_equal(table.find_channels(source="S3"), [0])
+
+
+class TestNIRSChannelsTableGeometry(TestCase):
+    """Unit tests for the geometry of the channels of a NIRSChannelsTable"""
+
+    def setUp(self):
+        self.table = create_indexed_channels_table()
+
+    def test_geometry(self):
+        """Verify that positions, distances and midpoints match those of each channel's
+        optodes
+        """
+        geometry = self.table.geometry
+        sources, detectors = self.table.source.table, self.table.detector.table
+        for row in range(len(self.table)):
+            source = self.table.source.data[row]
+            detector = self.table.detector.data[row]
+            source_position = [sources.x.data[source], sources.y.data[source]]
+            detector_position = [detectors.x.data[detector], detectors.y.data[detector]]
+            np.testing.assert_array_equal(
+                geometry.source_positions[row], source_position
+            )
+            np.testing.assert_array_equal(
+                geometry.detector_positions[row], detector_position
+            )
+            self.assertAlmostEqual(
+                geometry.distances[row],
+                np.hypot(*np.subtract(detector_position, source_position)),
+            )
+            np.testing.assert_array_equal(
+                geometry.midpoints[row],
+                np.add(source_position, detector_position) / 2,
+            )
+        with self.assertRaises(ValueError):
+            geometry.distances[0] = 0.0
+
+    def test_geometry_in_3d(self):
+        """Verify that z coordinates are used when both optode tables have them"""
+        table = NIRSChannelsTable(
+            sources=NIRSSourcesTable.from_coordinates(
+                label=["S1"], coordinates=[[0.0, 0.0, 0.0]]
+            ),
+            detectors=NIRSDetectorsTable.from_coordinates(
+                label=["D1", "D2"], coordinates=[[0.03, 0.0, 0.04], [0.0, 0.008, 0.0]]
+            ),
+        )
+        table.add_channels(
+            label=["S1D1", "S1D2"],
+            source=[0, 0],
+            detector=[0, 1],
+            source_wavelength=[760.0, 760.0],
+        )
+        geometry = table.geometry
+        np.testing.assert_allclose(geometry.distances, [0.05, 0.008])
+        np.testing.assert_allclose(
+            geometry.midpoints, [[0.015, 0, 0.02], [0, 0.004, 0]]
+        )
+        np.testing.assert_array_equal(geometry.short_channel_mask(), [False, True])
+        np.testing.assert_array_equal(
+            geometry.short_channel_mask(threshold=0.06), [True, True]
+        )
+
+    def test_geometry_is_reused_until_tables_change(self):
+        """Verify that the geometry is computed once and recomputed after rows are added"""
+        geometry = self.table.geometry
+        self.assertIs(self.table.geometry, geometry)
+
+        self.table.detector.table.add_row(label="D5", x=-1.5, y=-1.0)
+        rebuilt = self.table.geometry
+        self.assertIsNot(rebuilt, geometry)
+        self.assertIs(self.table.geometry, rebuilt)
+
+        self.table.add_row(label="short", source=0, detector=4, source_wavelength=690.0)
+        self.assertEqual(self.table.geometry.distances[-1], 0.0)
+
 
 class TestNIRSDevice(TestCase):
     """Unit tests for NIRSDevice"""
@@ -304,3 +628,109 @@ class TestNIRSSeries(TestCase):
         np.testing.assert_array_equal(series.data[:], fake_data)
         self.assertIs(series.channels.table, channels)
         self.assertEqual(series.unit, "V")
+
+    def create_series_with_channels(self, channels, region_rows):
+        """Returns a NIRSSeries over the given rows of channels with random data"""
+        return NIRSSeries(
+            name="nirs_data",
+            description="The raw NIRS channel data",
+            timestamps=np.arange(0, 10, 0.1),
+            channels=DynamicTableRegion(
+                name="channels",
+                description="an ordered map to the channels in this NIRS series",
+                table=channels,
+                data=region_rows,
+            ),
+            data=np.random.rand(100, len(region_rows)),
+            unit="V",
+        )
+
+    def test_find_columns(self):
+        """Verify that channel criteria are resolved to data columns through the region"""
+        channels = create_indexed_channels_table()
+        # the series holds a subset of the channels, in a different order
+        region_rows = [9, 8, 2, 3, 4, 5, 0]
+        series = self.create_series_with_channels(channels, region_rows)
+
+        np.testing.assert_array_equal(series.find_columns(), np.arange(7))
+        np.testing.assert_array_equal(series.find_columns(rows=[0, 8]), [1, 6])
+        np.testing.assert_array_equal(
+            series.find_columns(labels=["S3D2 830", "S1D2 690"]), [2, 5]
+        )
+        np.testing.assert_array_equal(
+            series.find_columns(source_wavelength=830.0), [0, 3, 5]
+        )
+        np.testing.assert_array_equal(series.find_columns(source="S1"), [2, 3, 6])
+        np.testing.assert_array_equal(
+            series.find_columns(
+                where=lambda ch: ch["detector"] == 3, source_wavelength=690.0
+            ),
+            [1],
+        )
+        with self.assertRaises(KeyError):
+            series.find_columns(rows=[1])
+        with self.assertRaises(KeyError):
+            series.find_columns(labels="not a channel")
+        with self.assertRaises(ValueError):
+            series.find_columns(where=lambda ch: [True])
+
+    def test_get_channel_data(self):
+        """Verify that only the data columns of the matching channels are returned"""
+        channels = create_indexed_channels_table()
+        series = self.create_series_with_channels(channels, channels.id[:])
+
+        np.testing.assert_array_equal(
+            series.get_channel_data(source_wavelength=690.0),
+            series.data[:, ::2],
+        )
+        np.testing.assert_array_equal(
+            series.get_channel_data(labels=["S7D4 830", "S1D1 690"]),
+            series.data[:, [0, 9]],
+        )
+
+    def test_find_samples(self):
+        """Verify that time windows are converted to sample ranges with timestamps or a rate"""
+        channels = create_indexed_channels_table()
+        series = self.create_series_with_channels(channels, channels.id[:])
+        self.assertEqual(series.find_samples(), slice(0, 100))
+        self.assertEqual(
+            series.find_samples(start_time=0.3, stop_time=0.7), slice(3, 7)
+        )
+        self.assertEqual(series.find_samples(start_time=0.25), slice(3, 100))
+        self.assertEqual(
+            series.find_samples(start_time=-5.0, stop_time=50.0), slice(0, 100)
+        )
+        self.assertEqual(
+            series.find_samples(start_time=5.0, stop_time=2.0), slice(50, 50)
+        )
+
+        rate_series = NIRSSeries(
+            name="nirs_data",
+            description="The raw NIRS channel data",
+            starting_time=2.0,
+            rate=10.0,
+            channels=series.channels,
+            data=series.data,
+            unit="V",
+        )
+        self.assertEqual(rate_series.find_samples(), slice(0, 100))
+        self.assertEqual(
+            rate_series.find_samples(start_time=2.3, stop_time=2.7), slice(3, 7)
+        )
+        self.assertEqual(rate_series.find_samples(start_time=2.25), slice(3, 100))
+        self.assertEqual(rate_series.find_samples(stop_time=1.0), slice(0, 0))
+        self.assertEqual(rate_series.find_samples(start_time=20.0), slice(100, 100))
+
+    def test_get_time_window(self):
+        """Verify that only the samples and channels in the window are returned"""
+        channels = create_indexed_channels_table()
+        series = self.create_series_with_channels(channels, channels.id[:])
+
+        np.testing.assert_array_equal(
+            series.get_time_window(start_time=1.0, stop_time=2.0), series.data[10:20]
+        )
+        np.testing.assert_array_equal(
+            series.get_time_window(stop_time=0.5, source_wavelength=830.0),
+            series.data[:5, 1::2],
+        )
+        self.assertEqual(series.get_time_window(start_time=11.0).shape, (0, 10))
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from ndx_nirs.overview import _bin, _PyramidBuilder
+
+
+def expected_level(data, factor):
+    """Returns the (bins, channels, 3) min, max and mean of data over bins of factor
+    samples, computed bin by bin
+    """
+    bins = np.split(data, np.arange(factor, len(data), factor))
+    return np.stack(
+        [
+            np.array([values.min(axis=0) for values in bins]),
+            np.array([values.max(axis=0) for values in bins]),
+            np.array([values.mean(axis=0) for values in bins]),
+        ],
+        axis=-1,
+    )
+
+
+@pytest.mark.parametrize("n_samples", [1, 15, 16, 17, 100, 256, 1000])
+@pytest.mark.parametrize("block_size", [16, 48, 128])
+def test_pyramid_builder(n_samples, block_size):
+    """Verify that the levels built from blocks of samples match the statistics of each
+    bin, including the partial bins at the end
+    """
+    data = np.random.default_rng(n_samples).normal(size=(n_samples, 3))
+    factors = [4]
+    while factors[-1] < n_samples:
+        factors.append(factors[-1] * 2)
+    builder = _PyramidBuilder(len(factors))
+    levels = [[] for _ in factors]
+    for block in np.split(data, np.arange(block_size, n_samples, block_size)):
+        builder.add(_bin(block, 4))
+        for output, bins in zip(levels, builder.pop()):
+            if bins is not None:
+                output.append(bins)
+    builder.finish()
+    for output, bins in zip(levels, builder.pop()):
+        if bins is not None:
+            output.append(bins)
+
+    for factor, output in zip(factors, levels):
+        np.testing.assert_allclose(
+            np.concatenate(output), expected_level(data, factor), err_msg=str(factor)
+        )
+    assert len(levels[-1][0]) == 1
+
+
+def test_bin_partial_block():
+    """Verify that the samples after the last full bin form a last, partial bin"""
+    block = np.arange(10.0).reshape(5, 2)
+    minimum, maximum, total, count = _bin(block, 2)
+    np.testing.assert_array_equal(minimum, [[0, 1], [4, 5], [8, 9]])
+    np.testing.assert_array_equal(maximum, [[2, 3], [6, 7], [8, 9]])
+    np.testing.assert_array_equal(total, [[2, 4], [10, 12], [8, 9]])
+    np.testing.assert_array_equal(count, [2, 2, 1])
@@ -0,0 +1,112 @@
+import threading
+
+import numpy as np
+import pytest
+
+from ndx_nirs import PrefetchingBlockIterator
+
+from .test_ndx_nirs import create_indexed_channels_table
+from .test_validation import create_series
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_iter_blocks(prefetch):
+    """Verify that the blocks hold the timestamps and data of consecutive samples, in
+    order, with a shorter last block
+    """
+    series = create_series(create_indexed_channels_table())
+    with series.iter_blocks(block_size=8, prefetch=prefetch) as blocks:
+        assert len(blocks) == 3
+        read = list(blocks)
+    assert [len(data) for _, data in read] == [8, 8, 4]
+    np.testing.assert_array_equal(np.concatenate([d for _, d in read]), series.data)
+    timestamps = np.concatenate([t for t, _ in read])
+    np.testing.assert_allclose(timestamps, np.arange(20) / series.rate)
+    assert blocks.read_seconds > 0
+    assert blocks.wait_seconds >= 0
+
+
+def test_iter_blocks_time_window():
+    """Verify that only the samples of the time window are read"""
+    series = create_series(create_indexed_channels_table(), timestamps=np.arange(20.0))
+    with series.iter_blocks(block_size=4, start_time=3.0, stop_time=13.0) as blocks:
+        read = list(blocks)
+    timestamps = np.concatenate([t for t, _ in read])
+    np.testing.assert_array_equal(timestamps, np.arange(3.0, 13.0))
+    np.testing.assert_array_equal(
+        np.concatenate([d for _, d in read]), series.data[3:13]
+    )
+
+
+def test_iter_blocks_close():
+    """Verify that closing the iterator cancels the pending reads and stops iteration"""
+    series = create_series(create_indexed_channels_table())
+    blocks = series.iter_blocks(block_size=2, prefetch=4)
+    next(blocks)
+    assert len(blocks._pending) == 4
+    blocks.close()
+    assert not blocks._pending
+    assert blocks._executor._shutdown
+    assert list(blocks) == []
+    blocks.close()
+
+
+def test_iter_blocks_bounded():
+    """Verify that no more than prefetch blocks are read ahead of the consumer"""
+    series = create_series(create_indexed_channels_table())
+    started = []
+    release = threading.Event()
+
+    class Data:
+        dtype = series.data.dtype
+        shape = series.data.shape
+
+        def __getitem__(self, block):
+            started.append(block.start)
+            release.wait(5)
+            return series.data[block]
+
+        def __len__(self):
+            return len(series.data)
+
+    blocks = PrefetchingBlockIterator(series, block_size=2, prefetch=2)
+    blocks._data = Data()
+    try:
+        blocks._request()
+        assert len(blocks._pending) == 2
+        release.set()
+        next(blocks)
+        assert len(blocks._pending) == 2
+        assert len(started) <= 3
+    finally:
+        release.set()
+        blocks.close()
+
+
+def test_iter_blocks_read_error():
+    """Verify that an error while reading a block is raised to the consumer and closes
+    the iterator
+    """
+    series = create_series(create_indexed_channels_table())
+
+    class Data:
+        def __getitem__(self, block):
+            raise OSError("read failed")
+
+    blocks = PrefetchingBlockIterator(series, block_size=4, prefetch=2)
+    blocks._data = Data()
+    with pytest.raises(OSError, match="read failed"):
+        next(blocks)
+    assert list(blocks) == []
+
+
+@pytest.mark.parametrize(
+    "kwargs", [dict(block_size=0), dict(workers=0), dict(prefetch=-1)]
+)
+def test_iter_blocks_invalid(kwargs):
+    """Verify that a block size or a number of workers below 1, or a negative prefetch,
+    is rejected
+    """
+    series = create_series(create_indexed_channels_table())
+    with pytest.raises(ValueError, match="must be at least"):
+        PrefetchingBlockIterator(series, **kwargs)
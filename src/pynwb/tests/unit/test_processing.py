@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from hdmf.common import DynamicTableRegion
+
+from ndx_nirs import HemoglobinConverter, NIRSSeries
+from ndx_nirs.processing import extinction_coefficients
+
+from .test_ndx_nirs import create_indexed_channels_table
+
+# the source-detector distances in cm of the pairs of create_indexed_channels_table
+PAIR_DISTANCES = 100.0 * np.hypot([2.0, 3.0, 1.0, 1.0, 1.0], [2.5, 1.5, 3.5, 1.5, 0.5])
+
+
+def create_raw_series(region_rows, n_samples=300, dpf=6.0, rate=None):
+    """Returns a NIRSSeries of the intensities produced by known concentration changes,
+    along with those (n_samples, n_pairs, 2) HbO and HbR changes and the baseline
+    """
+    channels = create_indexed_channels_table()
+    rng = np.random.default_rng(0)
+    concentrations = rng.normal(scale=1e-6, size=(n_samples, 5, 2))
+    pairs = np.asarray(region_rows) // 2
+    wavelengths = np.asarray(channels.source_wavelength.data)[region_rows]
+    absorption = (
+        extinction_coefficients(wavelengths) * (PAIR_DISTANCES[pairs] * dpf)[:, None]
+    )
+    optical_density = np.einsum("tck,ck->tc", concentrations[:, pairs], absorption)
+    baseline = rng.uniform(1.0, 2.0, size=len(region_rows))
+    timing = dict(timestamps=np.arange(n_samples) / 10.0)
+    if rate is not None:
+        timing = dict(rate=rate, starting_time=1.0)
+    series = NIRSSeries(
+        name="nirs_data",
+        description="The raw NIRS channel data",
+        channels=DynamicTableRegion(
+            name="channels",
+            description="an ordered map to the channels in this NIRS series",
+            table=channels,
+            data=list(region_rows),
+        ),
+        data=baseline * 10 ** (-optical_density),
+        unit="V",
+        **timing,
+    )
+    return series, concentrations, baseline
+
+
+def test_extinction_coefficients():
+    """Verify that coefficients are tabulated and interpolated between wavelengths"""
+    np.testing.assert_array_equal(
+        extinction_coefficients([690.0, 830.0]), [[276.0, 2051.96], [974.0, 693.04]]
+    )
+    np.testing.assert_allclose(
+        extinction_coefficients(695.0), [(276.0 + 290.0) / 2, (2051.96 + 1794.28) / 2]
+    )
+    with pytest.raises(ValueError):
+        extinction_coefficients([690.0, 950.0])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 1000])
+@pytest.mark.parametrize(
+    "region_rows", [list(range(10)), [9, 3, 8, 0, 2, 5, 1, 4, 7, 6]]
+)
+def test_convert_in_chunks(chunk_size, region_rows):
+    """Verify that the known concentration changes are recovered chunk by chunk"""
+    series, concentrations, baseline = create_raw_series(region_rows)
+    converter = HemoglobinConverter(series, baseline=baseline, chunk_size=chunk_size)
+    chunks = list(converter.iter_chunks())
+    assert len(chunks) == -(-300 // chunk_size)
+    pair_order = np.argsort([row // 2 for row in converter.pair_rows])
+    hbo = np.concatenate([hbo for hbo, _ in chunks])
+    hbr = np.concatenate([hbr for _, hbr in chunks])
+    np.testing.assert_allclose(hbo[:, pair_order], concentrations[..., 0], atol=1e-15)
+    np.testing.assert_allclose(hbr[:, pair_order], concentrations[..., 1], atol=1e-15)
+
+
+def test_default_baseline_and_dpf():
+    """Verify that the baseline defaults to the mean intensity and the DPF can be given
+    per wavelength
+    """
+    series, concentrations, _ = create_raw_series(list(range(10)), dpf=5.0)
+    converter = HemoglobinConverter(series, dpf={690.0: 5.0, 830.0: 5.0}, chunk_size=7)
+    np.testing.assert_allclose(converter.baseline, series.data.mean(axis=0))
+    hbo, hbr = converter.convert(series.data)
+    # relative to the mean intensity, the changes are offset by a constant per pair
+    np.testing.assert_allclose(
+        hbo - hbo.mean(axis=0),
+        concentrations[..., 0] - concentrations[..., 0].mean(axis=0),
+        atol=1e-15,
+    )
+
+
+def test_pair_without_two_wavelengths():
+    """Verify that each source-detector pair needs two distinct wavelengths"""
+    series, _, _ = create_raw_series([0, 1, 2])
+    with pytest.raises(ValueError):
+        HemoglobinConverter(series)
+
+
+@pytest.mark.parametrize("rate", [None, 10.0])
+def test_create_series(rate):
+    """Verify that the HbO and HbR series reference the pairs and share the timing of the
+    raw series, and that their data is computed chunk by chunk
+    """
+    series, concentrations, baseline = create_raw_series(
+        [1, 0, 3, 2, 5, 4, 7, 6, 9, 8], rate=rate
+    )
+    converter = HemoglobinConverter(series, baseline=baseline, chunk_size=50)
+    hbo, hbr = converter.create_series()
+
+    assert (hbo.name, hbr.name) == ("HbO", "HbR")
+    for output, index in ((hbo, 0), (hbr, 1)):
+        assert output.unit == "M"
+        assert output.channels.table is series.channels.table
+        np.testing.assert_array_equal(output.channels.data, [0, 2, 4, 6, 8])
+        if rate is None:
+            assert output.timestamps is series.timestamps
+        else:
+            assert (output.rate, output.starting_time) == (10.0, 1.0)
+        data_chunks = list(output.data)
+        assert [chunk.data.shape for chunk in data_chunks] == [(50, 5)] * 6
+        data = np.concatenate([chunk.data for chunk in data_chunks])
+        np.testing.assert_allclose(data, concentrations[..., index], atol=1e-15)
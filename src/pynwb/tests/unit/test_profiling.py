@@ -0,0 +1,128 @@
+import json
+
+import hdmf.utils
+import pytest
+from hdmf.backends.hdf5 import HDF5IO
+
+import ndx_nirs.profiling
+from ndx_nirs import NIRSChannelsTable, NIRSSeries, NIRSSourcesTable, profile
+from ndx_nirs.profiling import (
+    PROFILE_ENV_VAR,
+    get_profile_report,
+    profile_from_environment,
+    start_profiling,
+    stop_profiling,
+)
+
+from .test_ndx_nirs import create_fake_channels_table, create_fake_detectors_table
+
+
+def hot_paths():
+    return {
+        "parse_args": vars(hdmf.utils)["__parse_args"],
+        "sources_init": vars(NIRSSourcesTable)["__init__"],
+        "sources_add_row": vars(NIRSSourcesTable).get("add_row"),
+        "add_channels": vars(NIRSChannelsTable)["add_channels"],
+        "series_init": vars(NIRSSeries).get("__init__"),
+        "write_dataset": vars(HDF5IO)["write_dataset"],
+    }
+
+
+def test_profile_records_phases_and_rows():
+    """Verify that the NIRS constructors, docval and added rows are recorded"""
+    with profile() as report:
+        table = create_fake_channels_table()
+        table.add_channels(
+            label=["A", "B"], source=[0, 1], detector=[0, 1], source_wavelength=[1, 2]
+        )
+    assert report.phases["init.NIRSSourcesTable"].calls == 1
+    assert report.phases["init.NIRSChannelsTable"].calls == 1
+    # 7 sources, 4 detectors and 14 channels added with add_row, 2 with add_channels
+    assert report.phases["add_rows"].calls == 26
+    assert report.counters["rows_added"] == 27
+    assert report.phases["docval"].calls > 26
+    assert report.seconds >= report.phases["init.NIRSChannelsTable"].seconds > 0
+    assert "build" not in report.phases
+
+
+def test_profile_restores_hot_paths():
+    """Verify that nothing is wrapped outside of a profiling session, also after an
+    error
+    """
+    original = hot_paths()
+    with pytest.raises(ZeroDivisionError):
+        with profile():
+            assert hot_paths()["sources_init"] is not original["sources_init"]
+            assert hot_paths()["sources_add_row"] is not None
+            1 / 0
+    assert hot_paths() == original
+    assert get_profile_report() is None
+    assert stop_profiling() is None
+
+
+def test_docval_hook_exists():
+    """Verify that the hdmf function timed as the docval phase exists, so that a new
+    version of hdmf which renames it fails here instead of silently not timing docval
+    """
+    assert callable(vars(hdmf.utils).get(ndx_nirs.profiling._DOCVAL_HOOK))
+
+
+def test_profile_warns_without_docval_hook(monkeypatch):
+    """Verify that profiling warns when docval cannot be timed, and times the rest"""
+    monkeypatch.setattr(ndx_nirs.profiling, "_DOCVAL_HOOK", "__renamed_parse_args")
+    with pytest.warns(RuntimeWarning, match="docval is not timed"):
+        with profile() as report:
+            create_fake_detectors_table()
+    assert "docval" not in report.phases
+    assert report.phases["init.NIRSDetectorsTable"].calls == 1
+
+
+def test_profile_cannot_be_nested():
+    """Verify that a profiling session cannot be started inside another one"""
+    with profile() as report:
+        assert get_profile_report() is report
+        with pytest.raises(RuntimeError):
+            start_profiling()
+    create_fake_detectors_table()
+    assert "init.NIRSDetectorsTable" not in report.phases
+
+
+def test_report_as_dict_and_format():
+    """Verify that the report is converted to plain values and to a table"""
+    with profile() as report:
+        create_fake_detectors_table()
+    values = json.loads(json.dumps(report.as_dict()))
+    assert values["phases"]["add_rows"]["calls"] == 4
+    assert values["counters"] == dict(rows_added=4, datasets_created=0, bytes_written=0)
+    text = report.format()
+    assert "init.NIRSDetectorsTable" in text
+    assert "rows_added: 4" in text
+
+
+@pytest.mark.parametrize("value", ["", "0"])
+def test_profile_from_environment_disabled(monkeypatch, value):
+    """Verify that profiling is not started unless the environment variable is set"""
+    monkeypatch.setenv(PROFILE_ENV_VAR, value)
+    profile_from_environment()
+    assert get_profile_report() is None
+
+
+def test_profile_from_environment(monkeypatch, tmp_path):
+    """Verify that the environment variable starts profiling and writes the report to a
+    JSON file at exit
+    """
+    path = tmp_path / "profile.json"
+    handlers = []
+    monkeypatch.setenv(PROFILE_ENV_VAR, str(path))
+    monkeypatch.setattr(
+        ndx_nirs.profiling.atexit, "register", lambda *args: handlers.append(args)
+    )
+    profile_from_environment()
+    try:
+        create_fake_detectors_table()
+    finally:
+        for handler, *args in handlers:
+            handler(*args)
+    assert get_profile_report() is None
+    report = json.loads(path.read_text())
+    assert report["counters"]["rows_added"] == 4
@@ -0,0 +1,111 @@
+import h5py
+import numpy as np
+import pytest
+
+from ndx_nirs import selection
+from ndx_nirs.selection import contiguous_runs, read_columns
+
+
+@pytest.mark.parametrize(
+    "columns, expected_runs",
+    [
+        ([], []),
+        ([3], [(3, 4)]),
+        ([0, 1, 2, 3], [(0, 4)]),
+        ([0, 1, 4, 5, 6, 9], [(0, 2), (4, 7), (9, 10)]),
+        ([1, 3, 5], [(1, 2), (3, 4), (5, 6)]),
+    ],
+)
+def test_contiguous_runs(columns, expected_runs):
+    """Verify that adjacent columns are merged into runs"""
+    assert contiguous_runs(columns) == expected_runs
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Returns an h5py dataset of shape (50, 12) along with its contents"""
+    data = np.random.rand(50, 12)
+    with h5py.File(tmp_path / "data.h5", "w") as f:
+        f.create_dataset("data", data=data, chunks=(10, 4))
+    with h5py.File(tmp_path / "data.h5", "r") as f:
+        yield f["data"], data
+
+
+@pytest.mark.parametrize("columns", [[], [5], [0, 1, 2], [0, 1, 4, 5, 6, 11]])
+@pytest.mark.parametrize("time_slice", [slice(None), slice(10, 23), slice(45, 60)])
+def test_read_columns_from_dataset(dataset, columns, time_slice):
+    """Verify that read_columns reads the selected columns and samples from disk"""
+    h5_data, data = dataset
+    np.testing.assert_array_equal(
+        read_columns(h5_data, columns, time_slice), data[time_slice][:, columns]
+    )
+
+
+def test_read_columns_from_array():
+    """Verify that read_columns reads the selected columns from in-memory data"""
+    data = np.random.rand(20, 6)
+    np.testing.assert_array_equal(
+        read_columns(data, [1, 2, 5], slice(3, 8)), data[3:8, [1, 2, 5]]
+    )
+    np.testing.assert_array_equal(read_columns(data.tolist(), [4]), data[:, [4]])
+
+
+def test_read_columns_requires_contiguous_time_slice():
+    """Verify that a strided time slice is rejected"""
+    with pytest.raises(ValueError):
+        read_columns(np.zeros((10, 2)), [0], slice(0, 10, 2))
+
+
+@pytest.mark.parametrize("chunks", [None, (7,), (64,)])
+@pytest.mark.parametrize("value", [-1.0, 0.0, 0.05, 3.5, 3.55, 9.95, 10.0, 12.0])
+def test_search_sorted_dataset(tmp_path, chunks, value, monkeypatch):
+    """Verify that the chunk-aware binary search agrees with numpy.searchsorted"""
+    monkeypatch.setattr(selection, "SEARCH_BLOCK_SIZE", 16)
+    timestamps = np.arange(0, 10, 0.1)
+    with h5py.File(tmp_path / "timestamps.h5", "w") as f:
+        dataset = f.create_dataset("timestamps", data=timestamps, chunks=chunks)
+        expected = np.searchsorted(timestamps, value, side="left")
+        assert selection.search_sorted(dataset, value) == expected
+        assert selection.search_sorted(timestamps.tolist(), value) == expected
+
+
+@pytest.mark.parametrize("value", [-1.0, 0.05, 3.55, 10.0])
+def test_search_sorted_zarr_array(value):
+    """Verify that the chunk-aware binary search also runs on zarr arrays"""
+    zarr = pytest.importorskip("zarr")
+    timestamps = np.arange(0, 10, 0.1)
+    array = zarr.array(timestamps, chunks=(7,))
+    assert selection.is_zarr_array(array)
+    assert not selection.is_zarr_array(timestamps)
+    expected = np.searchsorted(timestamps, value, side="left")
+    assert selection.search_sorted(array, value) == expected
+
+
+def test_read_columns_from_zarr_array():
+    """Verify that read_columns reads the selected columns from a zarr array"""
+    zarr = pytest.importorskip("zarr")
+    data = np.random.rand(50, 12)
+    array = zarr.array(data, chunks=(10, 4))
+    columns = [0, 1, 4, 5, 6, 11]
+    np.testing.assert_array_equal(
+        read_columns(array, columns, slice(10, 23)), data[10:23][:, columns]
+    )
+
+
+def test_sample_times():
+    """Verify that the times of a range of samples are read from the timestamps, or
+    computed from the rate and starting time
+    """
+    from pynwb import TimeSeries
+
+    data = np.zeros((10, 2))
+    timestamps = np.arange(10, dtype=np.int32) * 2
+    with_timestamps = TimeSeries(name="a", data=data, unit="V", timestamps=timestamps)
+    times = selection.sample_times(with_timestamps, slice(3, 6))
+    assert times.dtype == np.float64
+    np.testing.assert_array_equal(times, [6.0, 8.0, 10.0])
+
+    with_rate = TimeSeries(name="b", data=data, unit="V", rate=4.0, starting_time=1.0)
+    np.testing.assert_allclose(
+        selection.sample_times(with_rate, slice(8, None)), [3.0, 3.25]
+    )
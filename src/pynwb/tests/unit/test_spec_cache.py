@@ -0,0 +1,69 @@
+import os
+import shutil
+
+import pynwb
+from hdmf.spec.namespace import YAMLSpecReader
+
+import ndx_nirs
+from ndx_nirs.spec_cache import SPEC_CACHE_FILENAME, load_spec_cache, write_spec_cache
+
+
+def test_spec_cache_is_up_to_date():
+    """Verify that the spec cache matches the YAML spec files
+
+    If this fails, regenerate the spec with src/spec/create_extension_spec.py.
+    """
+    assert load_spec_cache(ndx_nirs.ndx_nirs_specpath) is not None
+
+
+def test_cached_spec_is_loaded_into_pynwb():
+    """Verify that the global type map of pynwb is found, so that the spec cache is used,
+    and that the ndx-nirs namespace was loaded into it
+
+    If this fails after upgrading pynwb, ndx_nirs._global_type_map needs to be updated.
+    """
+    type_map = ndx_nirs._global_type_map()
+    assert type_map is not None
+    assert "ndx-nirs" in type_map.namespace_catalog.namespaces
+    assert "ndx-nirs" in pynwb.available_namespaces()
+
+
+def test_spec_cache_matches_yaml_reader():
+    """Verify that the cached spec reader returns the same contents as the YAML reader"""
+    spec_dir = os.path.dirname(ndx_nirs.ndx_nirs_specpath)
+    yaml_reader = YAMLSpecReader(indir=spec_dir)
+    cached_reader = load_spec_cache(ndx_nirs.ndx_nirs_specpath)
+
+    assert cached_reader.source == yaml_reader.source
+    assert cached_reader.read_namespace(
+        ndx_nirs.ndx_nirs_specpath
+    ) == yaml_reader.read_namespace(ndx_nirs.ndx_nirs_specpath)
+    assert cached_reader.read_spec("ndx-nirs.extensions.yaml") == yaml_reader.read_spec(
+        "ndx-nirs.extensions.yaml"
+    )
+
+
+def test_stale_spec_cache_is_ignored(tmp_path):
+    """Verify that the spec cache is not used after a YAML spec file changes"""
+    spec_dir = os.path.dirname(ndx_nirs.ndx_nirs_specpath)
+    for filename in os.listdir(spec_dir):
+        shutil.copy(os.path.join(spec_dir, filename), tmp_path)
+    namespace_path = str(tmp_path / "ndx-nirs.namespace.yaml")
+    assert load_spec_cache(namespace_path) is not None
+
+    with open(tmp_path / "ndx-nirs.extensions.yaml", "a") as f:
+        f.write("\n")
+    assert load_spec_cache(namespace_path) is None
+
+    write_spec_cache(namespace_path)
+    assert load_spec_cache(namespace_path) is not None
+
+
+def test_missing_spec_cache_is_ignored(tmp_path):
+    """Verify that no reader is returned when there is no spec cache"""
+    spec_dir = os.path.dirname(ndx_nirs.ndx_nirs_specpath)
+    for filename in os.listdir(spec_dir):
+        if filename != SPEC_CACHE_FILENAME:
+            shutil.copy(os.path.join(spec_dir, filename), tmp_path)
+
+    assert load_spec_cache(str(tmp_path / "ndx-nirs.namespace.yaml")) is None
@@ -0,0 +1,167 @@
+import time
+
+import numpy as np
+from hdmf.common import DynamicTable, DynamicTableRegion
+
+from ndx_nirs import (
+    NIRSChannelsTable,
+    NIRSDetectorsTable,
+    NIRSDevice,
+    NIRSSeries,
+    NIRSSourcesTable,
+    validate_device,
+    validate_series,
+)
+
+from .test_ndx_nirs import create_indexed_channels_table
+
+
+def create_device(channels):
+    return NIRSDevice(
+        name="device",
+        description="A NIRS device",
+        manufacturer="XYZ",
+        nirs_mode="continuous-wave",
+        channels=channels,
+        sources=channels.source.table,
+        detectors=channels.detector.table,
+    )
+
+
+def create_series(channels, rows=None, n_columns=None, **kwargs):
+    rows = list(range(len(channels))) if rows is None else rows
+    n_columns = len(rows) if n_columns is None else n_columns
+    if "timestamps" not in kwargs:
+        kwargs["rate"] = 10.0
+    return NIRSSeries(
+        name="nirs_data",
+        description="Random NIRS data",
+        channels=DynamicTableRegion(
+            name="channels",
+            description="the channels of the series",
+            table=channels,
+            data=rows,
+        ),
+        data=np.random.rand(20, n_columns),
+        unit="V",
+        **kwargs,
+    )
+
+
+def codes(problems):
+    """Returns the rows of each problem by container, code and column"""
+    return {
+        (problem.container, problem.code, problem.column): list(problem.rows)
+        for problem in problems
+    }
+
+
+def test_valid_device_and_series():
+    """Verify that a consistent device and series have no problems"""
+    channels = create_indexed_channels_table()
+    assert validate_device(create_device(channels)) == []
+    assert validate_series(create_series(channels)) == []
+    assert validate_series(create_series(channels, timestamps=np.arange(20.0))) == []
+
+
+def test_validate_device_problems():
+    """Verify that each kind of problem of the device tables is reported with its rows"""
+    channels = create_indexed_channels_table()
+    device = create_device(channels)
+    device.sources.x.data[2] = np.nan
+    device.detectors.y.data[1] = np.inf
+    device.detectors.label.data[3] = "D1"
+    channels.source.data[4] = 7
+    channels.detector.data[9] = -1
+    channels.source_wavelength.data[3] = 690.0
+    channels.source_wavelength.data[6] = 0.0
+    channels.label.data[8] = channels.label.data[0]
+
+    problems = validate_device(device)
+    assert codes(problems) == {
+        ("device/sources", "non_finite_coordinate", "x"): [2],
+        ("device/detectors", "non_finite_coordinate", "y"): [1],
+        ("device/detectors", "duplicate_label", "label"): [0, 3],
+        ("device/channels", "duplicate_label", "label"): [0, 8],
+        ("device/channels", "index_out_of_range", "source"): [4],
+        ("device/channels", "index_out_of_range", "detector"): [9],
+        ("device/channels", "invalid_wavelength", "source_wavelength"): [6],
+        ("device/channels", "duplicate_channel", None): [2, 3],
+    }
+    out_of_range = [p for p in problems if p.code == "index_out_of_range"]
+    assert out_of_range[0].as_dict() == dict(
+        code="index_out_of_range",
+        container="device/channels",
+        message="1 source indices are not rows of the 7 sources",
+        column="source",
+        rows=[4],
+    )
+
+
+def test_validate_device_table_mismatch():
+    """Verify that channels referencing optode tables other than those of the device are
+    reported
+    """
+    channels = create_indexed_channels_table()
+    device = create_device(channels)
+    device.fields["sources"] = create_indexed_channels_table().source.table
+    assert codes(validate_device(device)) == {
+        ("device/channels", "table_mismatch", "source"): []
+    }
+
+
+def test_validate_series_problems():
+    """Verify that data widths, channels regions and timestamps which do not match are
+    reported
+    """
+    channels = create_indexed_channels_table()
+    series = create_series(
+        channels, rows=[0, 1, 12], n_columns=4, timestamps=np.arange(21.0)
+    )
+    series.timestamps[5] = series.timestamps[4]
+    assert codes(validate_series(series)) == {
+        ("nirs_data", "data_width_mismatch", "data"): [],
+        ("nirs_data", "index_out_of_range", "channels"): [2],
+        ("nirs_data", "timestamps_length_mismatch", "timestamps"): [],
+        ("nirs_data", "timestamps_not_increasing", "timestamps"): [4],
+    }
+
+    table = DynamicTable(name="other", description="not a channels table")
+    table.add_column(name="value", description="a value")
+    table.add_row(value=1.0)
+    series = create_series(table, rows=[0])
+    assert codes(validate_series(series)) == {
+        ("nirs_data", "wrong_table_type", "channels"): []
+    }
+
+
+def test_validate_device_scales_to_large_montages():
+    """Verify that a 10,000-channel device is checked with whole-column operations, well
+    within the time of building it
+    """
+    n_channels = 10000
+    rng = np.random.default_rng(0)
+    sources = NIRSSourcesTable.from_coordinates(
+        label=[f"S{index}" for index in range(100)], coordinates=rng.random((100, 3))
+    )
+    detectors = NIRSDetectorsTable.from_coordinates(
+        label=[f"D{index}" for index in range(50)], coordinates=rng.random((50, 3))
+    )
+    channels = NIRSChannelsTable(sources=sources, detectors=detectors)
+    pairs = np.arange(n_channels // 2)
+    channels.add_channels(
+        label=[f"CH{index}" for index in range(n_channels)],
+        source=np.repeat(pairs // 50, 2),
+        detector=np.repeat(pairs % 50, 2),
+        source_wavelength=np.tile([690.0, 830.0], n_channels // 2),
+    )
+    channels.source_wavelength.data[-1] = 690.0
+    device = create_device(channels)
+
+    start = time.perf_counter()
+    problems = validate_device(device)
+    elapsed = time.perf_counter() - start
+    assert codes(problems) == {
+        ("device/channels", "duplicate_channel", None): [n_channels - 2, n_channels - 1]
+    }
+    assert elapsed < 0.5
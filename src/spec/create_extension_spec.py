@@ -1,3 +1,4 @@
+import importlib.util
 import os.path
 
 from pynwb.spec import (
@@ -9,12 +10,25 @@ from pynwb.spec import (
 )
 
 
+def load_spec_cache_module():
+    """Imports ndx_nirs/spec_cache.py from its file, without importing the ndx_nirs
+    package, which loads the current spec and needs to be installed
+    """
+    path = os.path.join(
+        os.path.dirname(__file__), "..", "pynwb", "ndx_nirs", "spec_cache.py"
+    )
+    spec = importlib.util.spec_from_file_location("ndx_nirs_spec_cache", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
 def main():
     # these arguments were auto-generated from your cookiecutter inputs
     ns_builder = NWBNamespaceBuilder(
         doc="""An NWB extension for storing Near-Infrared Spectroscopy (NIRS) data.""",
         name="""ndx-nirs""",
-        version="""0.3.0""",
+        version="""0.4.0""",
         author=list(
             map(
                 str.strip,
@@ -46,6 +60,7 @@ def main():
     ns_builder.include_type("VectorData", namespace="hdmf-common")
     ns_builder.include_type("Data", namespace="hdmf-common")
     ns_builder.include_type("ElementIdentifiers", namespace="hdmf-common")
+    ns_builder.include_type("EnumData", namespace="hdmf-experimental")
     ns_builder.include_type("Device", namespace="core")
 
     # define your new data types
@@ -59,7 +74,10 @@ def main():
         datasets=[
             NWBDatasetSpec(
                 name="label",
-                doc="The label of the source.",
+                doc=(
+                    "The label of the source. The labels may be stored as fixed-length"
+                    " strings."
+                ),
                 dtype="text",
                 shape=(None,),
                 neurodata_type_inc="VectorData",
@@ -105,7 +123,10 @@ def main():
         datasets=[
             NWBDatasetSpec(
                 name="label",
-                doc="The label of the detector.",
+                doc=(
+                    "The label of the detector. The labels may be stored as fixed-length"
+                    " strings."
+                ),
                 dtype="text",
                 shape=(None,),
                 neurodata_type_inc="VectorData",
@@ -151,7 +172,10 @@ def main():
         datasets=[
             NWBDatasetSpec(
                 name="label",
-                doc="The label of the channel.",
+                doc=(
+                    "The label of the channel. The labels may be stored as fixed-length"
+                    " strings."
+                ),
                 dtype="text",
                 shape=(None,),
                 neurodata_type_inc="VectorData",
@@ -170,8 +194,12 @@ def main():
             ),
             NWBDatasetSpec(
                 name="source_wavelength",
-                doc="The wavelength of light in nm emitted by the source for this channel.",
-                dtype="float",
+                doc=(
+                    "The wavelength of light in nm emitted by the source for this channel."
+                    " The wavelengths are stored either as floats or as an EnumData of"
+                    " unsigned integer indices into source_wavelength_elements."
+                ),
+                dtype="numeric",
                 shape=(None,),
                 neurodata_type_inc="VectorData",
             ),
@@ -180,7 +208,31 @@ def main():
                 doc=(
                     "The wavelength of light in nm emitted by the fluorophore under "
                     "fluorescent spectroscopy for this channel. Only used for fluorescent"
-                    " spectroscopy."
+                    " spectroscopy. The wavelengths are stored either as floats or as an"
+                    " EnumData of unsigned integer indices into"
+                    " emission_wavelength_elements."
+                ),
+                dtype="numeric",
+                shape=(None,),
+                neurodata_type_inc="VectorData",
+                quantity="?",
+            ),
+            NWBDatasetSpec(
+                name="source_wavelength_elements",
+                doc=(
+                    "The distinct wavelengths in nm of source_wavelength, if it is stored"
+                    " as an EnumData."
+                ),
+                dtype="float",
+                shape=(None,),
+                neurodata_type_inc="VectorData",
+                quantity="?",
+            ),
+            NWBDatasetSpec(
+                name="emission_wavelength_elements",
+                doc=(
+                    "The distinct wavelengths in nm of emission_wavelength, if it is"
+                    " stored as an EnumData."
                 ),
                 dtype="float",
                 shape=(None,),
@@ -336,6 +388,10 @@ def main():
     )
     export_spec(ns_builder, new_data_types, output_dir)
 
+    # write the pre-parsed spec cache which is used to load the namespace quickly
+    spec_cache = load_spec_cache_module()
+    spec_cache.write_spec_cache(os.path.join(output_dir, "ndx-nirs.namespace.yaml"))
+
 
 if __name__ == "__main__":
     # usage: python create_extension_spec.py